@@ -0,0 +1,94 @@
+"""
+Latency benchmarks of the contract operations.
+
+    python -m benchmarks [--iterations 20] [--standin] [--output report.json]
+                         [--baseline baseline.json] [--max-regression 0.2]
+                         [operation ...]
+
+Prints (or writes) a JSON report with p50/p95/p99 latencies per phase and the
+throughput of each operation. With `--baseline`, operations whose total p50 or
+p95 latency regressed by more than `--max-regression` are listed in the report
+and the exit status is 1. Contracts must be compiled first (see README.md).
+"""
+
+import json
+import sys
+from argparse import ArgumentParser
+from datetime import datetime, timezone
+from os import environ
+
+
+def main() -> int:
+    parser = ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument(
+        "operations", nargs="*", help="operations to run (default: all)"
+    )
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument(
+        "--standin",
+        action="store_true",
+        help="run against the in-process stand-in node instead of localnet",
+    )
+    parser.add_argument("--output", help="write the report to this file")
+    parser.add_argument("--baseline", help="report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args()
+
+    if args.standin:
+        # Read by util.client when it is first imported.
+        environ["ALGORAND_NODE"] = "standin"
+
+    from benchmarks.harness import Recorder, compare, skip_reason, summarize
+    from benchmarks.operations import OPERATIONS
+    from util.account import close_account_pool
+    from util.client import ALGORAND_NODE
+
+    names = args.operations or list(OPERATIONS)
+    unknown = set(names) - set(OPERATIONS)
+    if unknown:
+        parser.error("unknown operations: {}".format(", ".join(sorted(unknown))))
+
+    report: dict = {
+        "node": ALGORAND_NODE,
+        "iterations": args.iterations,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "operations": {},
+    }
+    try:
+        for name in names:
+            recorder = Recorder()
+            OPERATIONS[name](recorder, args.iterations)
+            report["operations"][name] = summarize(recorder.samples)
+            print(
+                "{}: p50 {:.2f}ms".format(
+                    name, report["operations"][name]["total"]["p50"]
+                ),
+                file=sys.stderr,
+            )
+    finally:
+        close_account_pool()
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, "r") as baseline_file:
+            baseline = json.load(baseline_file)
+        reason = skip_reason(report, baseline)
+        if reason is None:
+            regressions = compare(report, baseline, args.max_regression)
+            report["regressions"] = regressions
+        else:
+            print("Not compared to the baseline: {}".format(reason), file=sys.stderr)
+            report["comparison_skipped"] = reason
+
+    encoded = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(encoded + "\n")
+    else:
+        print(encoded)
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+"""
+Simulated contention on `5_auction` bids.
+
+    python -m benchmarks.bidding [--auctions 10] [--bidders 50]
+                                 [--bids-per-bidder 5] [--seed 0]
+                                 [--contention 0 0.3 0.7]
+
+Places the same random bids with a `util.bidding.BiddingEngine` and with naive
+clients on simulated auctions, once per `--contention` level (the chance that a
+competing bid lands on an auction each round), and prints the failed
+submissions per successful bid of each as JSON. No node is needed.
+"""
+
+import json
+from argparse import ArgumentParser
+
+from util.bidding import simulate
+
+
+def main() -> None:
+    parser = ArgumentParser(prog="python -m benchmarks.bidding")
+    parser.add_argument("--auctions", type=int, default=10)
+    parser.add_argument("--bidders", type=int, default=50)
+    parser.add_argument("--bids-per-bidder", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--contention", type=float, nargs="+", default=[0.0, 0.3, 0.7])
+    args = parser.parse_args()
+
+    print(
+        json.dumps(
+            {
+                str(contention): simulate(
+                    args.auctions,
+                    args.bidders,
+                    args.bids_per_bidder,
+                    contention,
+                    args.seed,
+                )
+                for contention in args.contention
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
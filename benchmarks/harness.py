@@ -0,0 +1,158 @@
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Callable, Iterator
+
+from algosdk.atomic_transaction_composer import (
+    AtomicTransactionComposer,
+    TransactionWithSigner,
+)
+from algosdk.transaction import wait_for_confirmation
+
+from util.client import AlgodClient, algod_client
+
+# Phases of executing an atomic group.
+BUILD = "build"
+SIGN = "sign"
+SUBMIT = "submit"
+CONFIRM = "confirm"
+
+PERCENTILES = (50, 95, 99)
+
+
+class Recorder:
+    """
+    Records the duration of each phase of each sample of an operation.
+
+        with recorder.sample():
+            with recorder.phase(BUILD):
+                ...
+    """
+
+    def __init__(self) -> None:
+        # One {phase: seconds} dict per sample.
+        self.samples: list[dict[str, float]] = []
+        self._current: dict[str, float] | None = None
+
+    @contextmanager
+    def sample(self) -> Iterator[None]:
+        """Record the phases timed inside as one sample, unless it fails."""
+
+        self._current = {}
+        try:
+            yield
+            self.samples.append(self._current)
+        finally:
+            self._current = None
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started_at = perf_counter()
+        try:
+            yield
+        finally:
+            if self._current is not None:
+                self._current[name] = (
+                    self._current.get(name, 0.0) + perf_counter() - started_at
+                )
+
+
+def execute_timed(
+    recorder: Recorder,
+    build: Callable[[], list[TransactionWithSigner]],
+    client: AlgodClient = algod_client,
+) -> list[str]:
+    """
+    Execute the group returned by `build`, timing each phase of it, and return
+    its tx ids.
+    """
+
+    with recorder.phase(BUILD):
+        atc = AtomicTransactionComposer()
+        for txn in build():
+            atc.add_transaction(txn)
+        atc.build_group()
+    with recorder.phase(SIGN):
+        atc.gather_signatures()
+    with recorder.phase(SUBMIT):
+        tx_ids = atc.submit(client)
+    with recorder.phase(CONFIRM):
+        wait_for_confirmation(client, tx_ids[0], 5)
+    return tx_ids
+
+
+def summarize(samples: list[dict[str, float]]) -> dict:
+    """Latency percentiles (in milliseconds) per phase and in total, and throughput."""
+
+    totals = [sum(sample.values()) for sample in samples]
+    phases = sorted({phase for sample in samples for phase in sample})
+    return {
+        "count": len(samples),
+        # Operations per second when run back to back.
+        "throughput": len(samples) / sum(totals) if sum(totals) else 0.0,
+        "total": _latencies(totals),
+        "phases": {
+            phase: _latencies([sample.get(phase, 0.0) for sample in samples])
+            for phase in phases
+        },
+    }
+
+
+def compare(report: dict, baseline: dict, max_regression: float) -> list[str]:
+    """
+    Describe every operation whose total p50 or p95 latency grew by more than
+    `max_regression` (e.g. 0.2 for 20%) compared to `baseline`.
+
+    Raises `ValueError` if `baseline` cannot be compared to (see `skip_reason`).
+    """
+
+    reason = skip_reason(report, baseline)
+    if reason is not None:
+        raise ValueError("Cannot compare to the baseline: {}".format(reason))
+
+    regressions = []
+    for name, summary in report["operations"].items():
+        baseline_summary = baseline.get("operations", {}).get(name)
+        if baseline_summary is None:
+            continue
+        for percentile in ("p50", "p95"):
+            current = summary["total"][percentile]
+            previous = baseline_summary["total"][percentile]
+            if previous > 0 and current > previous * (1 + max_regression):
+                regressions.append(
+                    "{} {}: {:.2f}ms -> {:.2f}ms (+{:.0%})".format(
+                        name, percentile, previous, current, current / previous - 1
+                    )
+                )
+    return regressions
+
+
+def skip_reason(report: dict, baseline: dict) -> str | None:
+    """
+    Why `report` cannot be compared to `baseline`, if it cannot: latencies
+    measured against different nodes (e.g. localnet and the stand-in node) are
+    not comparable.
+    """
+
+    if report.get("node") != baseline.get("node"):
+        return "the baseline was measured on {}, not {}".format(
+            baseline.get("node"), report.get("node")
+        )
+    return None
+
+
+def percentile(values: list[float], q: float) -> float:
+    """The `q`th percentile of `values`, linearly interpolated."""
+
+    if not values:
+        return 0.0
+    values = sorted(values)
+    position = (len(values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def _latencies(seconds: list[float]) -> dict[str, float]:
+    latencies = {"p{}".format(q): percentile(seconds, q) * 1000 for q in PERCENTILES}
+    latencies["mean"] = sum(seconds) / len(seconds) * 1000 if seconds else 0.0
+    return latencies
@@ -0,0 +1,174 @@
+"""
+Opcode cost, inner transactions and fees of every contract method.
+
+    python -m benchmarks.method_costs [--tolerance 0.05] [--update] [call ...]
+
+Measures each method call of `benchmarks.operations.METHOD_CALLS` (all of them
+by default) and compares it to the checked-in baseline in `method_costs.json`:
+the opcode cost of the call, the inner transactions it submits and the minimum
+fee of its group. That fee is derived rather than measured: the minimum fee
+for each of the group's transactions and inner transactions. Methods over the
+baseline by more than `--tolerance` (or missing from it) are listed and the
+exit status is 1; `tests/test_method_costs.py` runs the same check. After an
+intended change, rerun with `--update` to rewrite the baseline and commit it
+with the change.
+
+Whatever `ALGORAND_NODE` and `CONTRACTS_SOURCE_DIR` are set to, the calls are
+measured on the reference answers in `contracts/answers/` against a stand-in
+node of their own (see `util.standin`), whose opcode costs are exact: in a
+child process started with `BASELINE_ENVIRONMENT`, as the contracts are
+deployed with the process's client and contract builder.
+"""
+
+import json
+import sys
+from argparse import SUPPRESS, ArgumentParser
+from os import environ, path
+from subprocess import PIPE, run
+
+from util.box_codec import CONTRACTS_PATH_PREFIX
+
+BASELINE_PATH = path.join(path.dirname(__file__), "method_costs.json")
+# Node the figures are measured on, recorded in the baseline.
+BASELINE_NODE = "standin"
+# Sources the figures are measured on, and the directory of their builds.
+ANSWERS_SOURCE_DIR = CONTRACTS_PATH_PREFIX + "answers/"
+ANSWERS_BUILD_DIR = CONTRACTS_PATH_PREFIX + "build/answers/"
+# Environment of the child process measuring the calls.
+BASELINE_ENVIRONMENT = {
+    "ALGORAND_NODE": BASELINE_NODE,
+    "CONTRACTS_SOURCE_DIR": ANSWERS_SOURCE_DIR,
+    "CONTRACTS_BUILD_DIR": ANSWERS_BUILD_DIR,
+}
+# Settings of the calling process not passed on to the child process.
+PROCESS_ENVIRONMENT = ("FUNDING_ACCOUNT_CACHE_PATH", "INSTRUMENT_CLIENTS")
+
+# Growth of any figure over its baseline tolerated by `compare_costs`.
+DEFAULT_TOLERANCE = 0.05
+
+
+def measure_costs(names: list[str]) -> dict[str, dict[str, int]]:
+    """
+    Measure the method calls `names` in a child process, on a stand-in node of
+    its own and the reference answers.
+    """
+
+    env = {
+        name: value
+        for name, value in environ.items()
+        if name not in PROCESS_ENVIRONMENT
+    }
+    env.update(BASELINE_ENVIRONMENT)
+    result = run(
+        [sys.executable, "-m", "benchmarks.method_costs", "--measure", *names],
+        cwd=path.join(path.dirname(__file__), ".."),
+        env=env,
+        stdout=PIPE,
+        check=True,
+    )
+    return json.loads(result.stdout)
+
+
+def measure(name: str) -> dict[str, int]:
+    """Set up the method call `name` and measure it against this process's node."""
+
+    from benchmarks.operations import METHOD_CALLS
+    from util.client import get_suggested_params
+    from util.opcode_profile import build_source_map, profile_group
+
+    call = METHOD_CALLS[name]()
+    signed_txns = call.sign()
+    profile = profile_group(signed_txns, build_source_map(call.contract))
+    return {
+        "opcode_cost": profile.cost,
+        "inner_txns": profile.inner_txns,
+        "min_group_fee": get_suggested_params().min_fee
+        * (len(signed_txns) + profile.inner_txns),
+    }
+
+
+def compare_costs(
+    report: dict[str, dict[str, int]], baseline: dict, tolerance: float
+) -> list[str]:
+    """
+    Describe every figure of `report` that grew by more than `tolerance` (e.g.
+    0.05 for 5%) over `baseline`, and every method missing from it.
+    """
+
+    regressions = []
+    for name, figures in report.items():
+        baseline_figures = baseline.get(name)
+        if baseline_figures is None:
+            regressions.append("{}: not in the baseline".format(name))
+            continue
+        for figure, current in figures.items():
+            previous = baseline_figures.get(figure, 0)
+            if current > previous * (1 + tolerance):
+                regressions.append(
+                    "{} {}: {} -> {}".format(name, figure, previous, current)
+                )
+    return regressions
+
+
+def load_baseline() -> dict:
+    """The baseline's node and its figures per method (under `"methods"`)."""
+
+    with open(BASELINE_PATH, "r") as baseline:
+        return json.load(baseline)
+
+
+def main() -> int:
+    from benchmarks.operations import METHOD_CALLS
+
+    parser = ArgumentParser(prog="python -m benchmarks.method_costs")
+    parser.add_argument(
+        "calls", nargs="*", help="method calls to measure (default: all)"
+    )
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument(
+        "--update", action="store_true", help="write the figures to the baseline"
+    )
+    # Set by `measure_costs` in the child process: print the figures only.
+    parser.add_argument("--measure", action="store_true", help=SUPPRESS)
+    args = parser.parse_args()
+
+    names = args.calls or list(METHOD_CALLS)
+    unknown = set(names) - set(METHOD_CALLS)
+    if unknown:
+        parser.error("unknown method calls: {}".format(", ".join(sorted(unknown))))
+
+    if args.measure:
+        from util.account import close_account_pool
+
+        if any(
+            environ.get(name) != value for name, value in BASELINE_ENVIRONMENT.items()
+        ):
+            parser.error("--measure only runs in the child process of measure_costs")
+        try:
+            report = {name: measure(name) for name in names}
+        finally:
+            close_account_pool()
+        print(json.dumps(report))
+        return 0
+
+    report = measure_costs(names)
+    baseline = (
+        load_baseline()
+        if path.exists(BASELINE_PATH)
+        else {"node": BASELINE_NODE, "methods": {}}
+    )
+    if args.update:
+        baseline["node"] = BASELINE_NODE
+        baseline["methods"].update(report)
+        with open(BASELINE_PATH, "w") as output:
+            output.write(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        regressions = []
+    else:
+        regressions = compare_costs(report, baseline["methods"], args.tolerance)
+
+    print(json.dumps({"methods": report, "regressions": regressions}, indent=2))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
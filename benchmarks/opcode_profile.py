@@ -0,0 +1,54 @@
+"""
+Opcode cost profiles of contract method calls.
+
+    python -m benchmarks.opcode_profile [--output-dir profiles] [call ...]
+
+Sets up each method call of `benchmarks.operations.METHOD_CALLS` (all of them
+by default), evaluates it without committing it and maps its opcode cost back
+to the `.tl` lines its contract's build was compiled from. For each call,
+prints the per-line heat report and writes it to `<output-dir>/<call>.txt`,
+along with the folded stacks in `<output-dir>/<call>.folded` (e.g.
+`flamegraph.pl profiles/x.folded > x.svg`, or open the file in speedscope). Set `ALGORAND_NODE=standin` to run
+against the in-process stand-in node.
+"""
+
+import sys
+from argparse import ArgumentParser
+from os import makedirs, path
+
+from benchmarks.operations import METHOD_CALLS
+from util.account import close_account_pool
+from util.opcode_profile import build_source_map, profile_group
+
+
+def main() -> int:
+    parser = ArgumentParser(prog="python -m benchmarks.opcode_profile")
+    parser.add_argument(
+        "calls", nargs="*", help="method calls to profile (default: all)"
+    )
+    parser.add_argument("--output-dir", default="profiles")
+    args = parser.parse_args()
+
+    names = args.calls or list(METHOD_CALLS)
+    unknown = set(names) - set(METHOD_CALLS)
+    if unknown:
+        parser.error("unknown method calls: {}".format(", ".join(sorted(unknown))))
+
+    makedirs(args.output_dir, exist_ok=True)
+    try:
+        for name in names:
+            call = METHOD_CALLS[name]()
+            profile = profile_group(call.sign(), build_source_map(call.contract))
+            heat_report = "\n".join(profile.heat_report()) + "\n"
+            print(heat_report)
+            with open(path.join(args.output_dir, name + ".txt"), "w") as output:
+                output.write(heat_report)
+            with open(path.join(args.output_dir, name + ".folded"), "w") as output:
+                output.write("\n".join(profile.folded()) + "\n")
+    finally:
+        close_account_pool()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,756 @@
+"""
+Benchmarked operations.
+
+Each operation does its setup (deploying apps, funding accounts, ...) outside
+of the recorded samples, then records `iterations` samples.
+"""
+
+from base64 import b64decode
+from time import time
+from typing import Callable, NamedTuple
+
+from algosdk.atomic_transaction_composer import (
+    AccountTransactionSigner,
+    AtomicTransactionComposer,
+    TransactionWithSigner,
+)
+from algosdk.account import generate_account
+from algosdk.encoding import decode_address
+from algosdk.logic import get_application_address
+from algosdk.transaction import (
+    ApplicationCloseOutTxn,
+    ApplicationNoOpTxn,
+    ApplicationOptInTxn,
+    AssetCreateTxn,
+    AssetOptInTxn,
+    AssetTransferTxn,
+    PaymentTxn,
+    SignedTransaction,
+    StateSchema,
+    SuggestedParams,
+)
+
+from benchmarks.harness import Recorder, execute_timed
+from util.account import AccountManager, get_account_pool
+from util.app import deploy_app
+from util.batch_signing import sign_composers
+from util.box_codec import load_codecs
+from util.client import algod_client, get_suggested_params, unique_note
+
+# Box MBR + asset opt-in MBR of an auction in `5_auction`.
+AUCTION_MBR_AMOUNT = 147_300
+MINIMUM_BID = 10_000
+PROFILE_MBR_AMOUNT = 30_500
+TICKET_PRICE = 1_000
+# Transactions signed by each phase of `sign_composers`, to show how signing
+# scales in the process (under `util.batch_signing.POOL_THRESHOLD`) and across
+# the pool of processes (over it).
+SIGNING_BATCH_SIZES = (16, 256, 1024, 4096)
+
+AUCTION_KEY = load_codecs("5_auction.tl")["AuctionKey"]
+
+Operation = Callable[[Recorder, int], None]
+OPERATIONS: dict[str, Operation] = {}
+
+
+class MethodCall(NamedTuple):
+    # Tealish source of the called app's approval program.
+    contract: str
+    # The group calling the method, ready to be signed.
+    txns: list[TransactionWithSigner]
+
+    def sign(self) -> list[SignedTransaction]:
+        atc = AtomicTransactionComposer()
+        for txn in self.txns:
+            atc.add_transaction(txn)
+        return atc.gather_signatures()
+
+
+# Set up the state a method is called in and return the call, e.g. to profile
+# it (see `benchmarks.opcode_profile`).
+MethodCallSetup = Callable[[], MethodCall]
+METHOD_CALLS: dict[str, MethodCallSetup] = {}
+
+
+def operation(name: str) -> Callable[[Operation], Operation]:
+    def register(function: Operation) -> Operation:
+        OPERATIONS[name] = function
+        return function
+
+    return register
+
+
+def method_call(name: str) -> Callable[[MethodCallSetup], MethodCallSetup]:
+    def register(function: MethodCallSetup) -> MethodCallSetup:
+        METHOD_CALLS[name] = function
+        return function
+
+    return register
+
+
+def _sp(fee_multiplier: int = 1) -> SuggestedParams:
+    sp = get_suggested_params()
+    if fee_multiplier > 1:
+        sp.flat_fee = True
+        sp.fee = sp.min_fee * fee_multiplier
+    return sp
+
+
+def _call(
+    sender: str, signer: AccountTransactionSigner, app_id: int, *app_args, **kwargs
+) -> TransactionWithSigner:
+    fee_multiplier = kwargs.pop("fee_multiplier", 1)
+    # Samples repeat the same calls and payments, so each gets its own note.
+    return TransactionWithSigner(
+        ApplicationNoOpTxn(
+            sender,
+            _sp(fee_multiplier),
+            app_id,
+            app_args=list(app_args),
+            note=unique_note(),
+            **kwargs,
+        ),
+        signer,
+    )
+
+
+def _pay(
+    sender: str, signer: AccountTransactionSigner, receiver: str, amount: int
+) -> TransactionWithSigner:
+    return TransactionWithSigner(
+        PaymentTxn(sender, _sp(), receiver, amount, note=unique_note()), signer
+    )
+
+
+def _execute(*txns: TransactionWithSigner) -> dict:
+    recorder = Recorder()
+    tx_id = execute_timed(recorder, lambda: list(txns))[-1]
+    return algod_client.pending_transaction_info(tx_id)
+
+
+@operation("deploy_app")
+def deploy_app_operation(recorder: Recorder, iterations: int) -> None:
+    address, signer = get_account_pool().acquire(1)[0]
+    for _ in range(iterations):
+        with recorder.sample(), recorder.phase("deploy"):
+            deploy_app(
+                signer,
+                "2_counter.teal",
+                "clear.teal",
+                get_suggested_params(),
+                StateSchema(num_uints=1, num_byte_slices=0),
+                StateSchema(num_uints=0, num_byte_slices=0),
+            )
+    get_account_pool().release(address)
+
+
+@operation("fund_account")
+def fund_account_operation(recorder: Recorder, iterations: int) -> None:
+    account_manager = AccountManager()
+    for _ in range(iterations):
+        with recorder.sample(), recorder.phase("fund"):
+            account_manager.create_new_funded_account()
+
+
+def _deploy_counter(signer: AccountTransactionSigner) -> int:
+    return deploy_app(
+        signer,
+        "2_counter.teal",
+        "clear.teal",
+        get_suggested_params(),
+        StateSchema(num_uints=1, num_byte_slices=0),
+        StateSchema(num_uints=0, num_byte_slices=0),
+    )[0]
+
+
+@operation("counter.increment_counter")
+def increment_counter_operation(recorder: Recorder, iterations: int) -> None:
+    address, signer = get_account_pool().acquire(1)[0]
+    app_id = _deploy_counter(signer)
+
+    for _ in range(iterations):
+        with recorder.sample():
+            execute_timed(
+                recorder, lambda: [_call(address, signer, app_id, "increment_counter")]
+            )
+    get_account_pool().release(address)
+
+
+def _deploy_user_profile(signer: AccountTransactionSigner) -> tuple[int, str]:
+    return deploy_app(
+        signer,
+        "3_user_profile.teal",
+        "clear.teal",
+        get_suggested_params(),
+        StateSchema(num_uints=1, num_byte_slices=0),
+        StateSchema(num_uints=0, num_byte_slices=1),
+        funding=100_000,
+    )
+
+
+def _profile_opt_in(
+    address: str, signer: AccountTransactionSigner, app_id: int, app_address: str
+) -> list[TransactionWithSigner]:
+    return [
+        _pay(address, signer, app_address, PROFILE_MBR_AMOUNT),
+        TransactionWithSigner(
+            ApplicationOptInTxn(
+                address,
+                _sp(),
+                app_id,
+                app_args=[b"10/03/1999", b"blue" + bytes(16), 0],
+                boxes=[(app_id, decode_address(address))],
+            ),
+            signer,
+        ),
+    ]
+
+
+@operation("user_profile.opt_in")
+def profile_opt_in_operation(recorder: Recorder, iterations: int) -> None:
+    account_pool = get_account_pool()
+    (manager_address, manager_signer), *users = account_pool.acquire(iterations + 1)
+    app_id, app_address = _deploy_user_profile(manager_signer)
+
+    for address, signer in users:
+        with recorder.sample():
+            execute_timed(
+                recorder,
+                lambda: _profile_opt_in(address, signer, app_id, app_address),
+            )
+    account_pool.release(manager_address, *(address for address, _ in users))
+
+
+@operation("user_profile.update_user_info")
+def profile_update_operation(recorder: Recorder, iterations: int) -> None:
+    _profile_method(
+        recorder, iterations, "update_user_info", b"06/02/2023", b"red" + bytes(17), 1
+    )
+
+
+@operation("user_profile.set_status")
+def profile_set_status_operation(recorder: Recorder, iterations: int) -> None:
+    _profile_method(recorder, iterations, "set_status", "Hello, world!")
+
+
+def _profile_method(recorder: Recorder, iterations: int, *app_args) -> None:
+    account_pool = get_account_pool()
+    (manager_address, manager_signer), (address, signer) = account_pool.acquire(2)
+    app_id, app_address = _deploy_user_profile(manager_signer)
+    _execute(*_profile_opt_in(address, signer, app_id, app_address))
+
+    for _ in range(iterations):
+        with recorder.sample():
+            execute_timed(
+                recorder,
+                lambda: [
+                    _call(
+                        address,
+                        signer,
+                        app_id,
+                        *app_args,
+                        boxes=[(app_id, decode_address(address))],
+                    )
+                ],
+            )
+    account_pool.release(manager_address, address)
+
+
+def _deploy_ticketing(signer: AccountTransactionSigner) -> tuple[int, str]:
+    return deploy_app(
+        signer,
+        "4_ticketing.teal",
+        "clear.teal",
+        get_suggested_params(),
+        StateSchema(num_uints=2, num_byte_slices=0),
+        StateSchema(num_uints=0, num_byte_slices=0),
+        funding=200_000,
+    )
+
+
+def _create_ticket(
+    address: str, signer: AccountTransactionSigner, app_id: int
+) -> list[TransactionWithSigner]:
+    return [
+        _call(
+            address,
+            signer,
+            app_id,
+            "create_ticket",
+            1_000_000,
+            "TEST",
+            "Benchmark Ticket",
+            TICKET_PRICE,
+            fee_multiplier=2,
+        )
+    ]
+
+
+@operation("ticketing.create_ticket")
+def create_ticket_operation(recorder: Recorder, iterations: int) -> None:
+    address, signer = get_account_pool().acquire(1)[0]
+    # A ticketing app only creates one ticket.
+    app_ids = [_deploy_ticketing(signer)[0] for _ in range(iterations)]
+
+    for app_id in app_ids:
+        with recorder.sample():
+            execute_timed(recorder, lambda: _create_ticket(address, signer, app_id))
+    get_account_pool().release(address)
+
+
+@operation("ticketing.buy_ticket")
+def buy_ticket_operation(recorder: Recorder, iterations: int) -> None:
+    account_pool = get_account_pool()
+    (manager_address, manager_signer), (address, signer) = account_pool.acquire(2)
+    app_id, app_address = _deploy_ticketing(manager_signer)
+    created = _execute(*_create_ticket(manager_address, manager_signer, app_id))
+    asset_id = int.from_bytes(b64decode(created["logs"][0]), "big")
+    _execute(TransactionWithSigner(AssetOptInTxn(address, _sp(), asset_id), signer))
+
+    for _ in range(iterations):
+        with recorder.sample():
+            execute_timed(
+                recorder,
+                lambda: [
+                    _pay(address, signer, app_address, TICKET_PRICE),
+                    _call(
+                        address,
+                        signer,
+                        app_id,
+                        "buy_ticket",
+                        1,
+                        foreign_assets=[asset_id],
+                        fee_multiplier=2,
+                    ),
+                ],
+            )
+    account_pool.release(manager_address, address)
+
+
+def _deploy_auction(signer: AccountTransactionSigner) -> tuple[int, str]:
+    return deploy_app(
+        signer,
+        "5_auction.teal",
+        "clear.teal",
+        get_suggested_params(),
+        StateSchema(num_uints=2, num_byte_slices=0),
+        StateSchema(num_uints=3, num_byte_slices=0),
+        # Cover MBR of contract.
+        funding=100_000,
+    )
+
+
+def _opt_in_auction(
+    address: str, signer: AccountTransactionSigner, app_id: int
+) -> None:
+    _execute(TransactionWithSigner(ApplicationOptInTxn(address, _sp(), app_id), signer))
+
+
+def _create_nft(address: str, signer: AccountTransactionSigner) -> int:
+    return _execute(
+        TransactionWithSigner(
+            AssetCreateTxn(
+                address,
+                _sp(),
+                total=1,
+                decimals=0,
+                default_frozen=False,
+                unit_name="NFT",
+                asset_name="Benchmark NFT",
+                note=unique_note(),
+            ),
+            signer,
+        )
+    )["asset-index"]
+
+
+def _create_auction(
+    address: str,
+    signer: AccountTransactionSigner,
+    app_id: int,
+    asset_id: int,
+    end_timestamp: int,
+) -> list[TransactionWithSigner]:
+    app_address = get_application_address(app_id)
+    key = AUCTION_KEY.encode(decode_address(address), asset_id)
+    return [
+        _pay(address, signer, app_address, AUCTION_MBR_AMOUNT),
+        _call(
+            address,
+            signer,
+            app_id,
+            "create_auction",
+            end_timestamp,
+            MINIMUM_BID,
+            0,
+            foreign_assets=[asset_id],
+            boxes=[(app_id, key)],
+            fee_multiplier=2,
+        ),
+        TransactionWithSigner(
+            AssetTransferTxn(address, _sp(), app_address, 1, asset_id), signer
+        ),
+    ]
+
+
+@operation("auction.create_auction")
+def create_auction_operation(recorder: Recorder, iterations: int) -> None:
+    address, signer = get_account_pool().acquire(1)[0]
+    app_id, _ = _deploy_auction(signer)
+    _opt_in_auction(address, signer, app_id)
+    asset_ids = [_create_nft(address, signer) for _ in range(iterations)]
+
+    for asset_id in asset_ids:
+        with recorder.sample():
+            execute_timed(
+                recorder,
+                lambda: _create_auction(
+                    address, signer, app_id, asset_id, int(time()) + 3600
+                ),
+            )
+    get_account_pool().release(address)
+
+
+@operation("auction.place_bid")
+def place_bid_operation(recorder: Recorder, iterations: int) -> None:
+    account_pool = get_account_pool()
+    (seller_address, seller_signer), (address, signer) = account_pool.acquire(2)
+    app_id, app_address = _deploy_auction(seller_signer)
+    _opt_in_auction(seller_address, seller_signer, app_id)
+    asset_id = _create_nft(seller_address, seller_signer)
+    _execute(
+        *_create_auction(
+            seller_address, seller_signer, app_id, asset_id, int(time()) + 3600
+        )
+    )
+    key = AUCTION_KEY.encode(decode_address(seller_address), asset_id)
+
+    for bid in range(1, iterations + 1):
+        with recorder.sample():
+            execute_timed(
+                recorder,
+                lambda: [
+                    _pay(address, signer, app_address, MINIMUM_BID * (bid + 1)),
+                    _call(
+                        address,
+                        signer,
+                        app_id,
+                        "place_bid",
+                        key,
+                        boxes=[(app_id, key)],
+                        # The previous bid, if any, is refunded to the bidder.
+                        accounts=[address],
+                        fee_multiplier=2,
+                    ),
+                ],
+            )
+    account_pool.release(seller_address, address)
+
+
+@operation("auction.settle")
+def settle_operation(recorder: Recorder, iterations: int) -> None:
+    address, signer = get_account_pool().acquire(1)[0]
+    app_id, _ = _deploy_auction(signer)
+    _opt_in_auction(address, signer, app_id)
+
+    # Auctions without bids that have already ended, settled by their seller.
+    asset_ids = []
+    for _ in range(iterations):
+        asset_id = _create_nft(address, signer)
+        _execute(*_create_auction(address, signer, app_id, asset_id, 1))
+        asset_ids.append(asset_id)
+
+    for asset_id in asset_ids:
+        key = AUCTION_KEY.encode(decode_address(address), asset_id)
+        with recorder.sample():
+            execute_timed(
+                recorder,
+                lambda: [
+                    _call(
+                        address,
+                        signer,
+                        app_id,
+                        "settle",
+                        key,
+                        foreign_assets=[asset_id],
+                        boxes=[(app_id, key)],
+                        fee_multiplier=3,
+                    )
+                ],
+            )
+    get_account_pool().release(address)
+
+
+@operation("sign_composers")
+def sign_composers_operation(recorder: Recorder, iterations: int) -> None:
+    # Payments between throwaway accounts, signed but never submitted.
+    accounts = [
+        (address, AccountTransactionSigner(private_key))
+        for private_key, address in (generate_account() for _ in range(16))
+    ]
+    sp = get_suggested_params()
+
+    def composers(size: int) -> list[AtomicTransactionComposer]:
+        atcs = []
+        for _ in range(0, size, AtomicTransactionComposer.MAX_GROUP_SIZE):
+            atc = AtomicTransactionComposer()
+            for address, signer in accounts:
+                atc.add_transaction(
+                    TransactionWithSigner(
+                        PaymentTxn(address, sp, address, 0, note=unique_note()), signer
+                    )
+                )
+            atcs.append(atc)
+        return atcs
+
+    for _ in range(iterations):
+        with recorder.sample():
+            for size in SIGNING_BATCH_SIZES:
+                atcs = composers(size)
+                with recorder.phase("sign_{}".format(size)):
+                    sign_composers(atcs)
+
+
+# Method calls are evaluated without being committed, so their accounts are
+# released as soon as the calls are built.
+
+
+@method_call("hello_world.noop")
+def hello_world_call() -> MethodCall:
+    address, signer = get_account_pool().acquire(1)[0]
+    app_id, _ = deploy_app(
+        signer,
+        "1_hello_world.teal",
+        "clear.teal",
+        get_suggested_params(),
+        StateSchema(num_uints=0, num_byte_slices=0),
+        StateSchema(num_uints=0, num_byte_slices=0),
+    )
+    get_account_pool().release(address)
+    return MethodCall("1_hello_world.tl", [_call(address, signer, app_id)])
+
+
+@method_call("counter.increment_counter")
+def increment_counter_call() -> MethodCall:
+    address, signer = get_account_pool().acquire(1)[0]
+    app_id = _deploy_counter(signer)
+    get_account_pool().release(address)
+    return MethodCall(
+        "2_counter.tl", [_call(address, signer, app_id, "increment_counter")]
+    )
+
+
+def _user_profile_call(opt_in: bool) -> tuple[str, AccountTransactionSigner, int, str]:
+    account_pool = get_account_pool()
+    (manager_address, manager_signer), (address, signer) = account_pool.acquire(2)
+    app_id, app_address = _deploy_user_profile(manager_signer)
+    if opt_in:
+        _execute(*_profile_opt_in(address, signer, app_id, app_address))
+    account_pool.release(manager_address, address)
+    return address, signer, app_id, app_address
+
+
+@method_call("user_profile.opt_in")
+def profile_opt_in_call() -> MethodCall:
+    address, signer, app_id, app_address = _user_profile_call(opt_in=False)
+    return MethodCall(
+        "3_user_profile.tl", _profile_opt_in(address, signer, app_id, app_address)
+    )
+
+
+@method_call("user_profile.update_user_info")
+def profile_update_call() -> MethodCall:
+    address, signer, app_id, _ = _user_profile_call(opt_in=True)
+    return MethodCall(
+        "3_user_profile.tl",
+        [
+            _call(
+                address,
+                signer,
+                app_id,
+                "update_user_info",
+                b"06/02/2023",
+                b"red" + bytes(17),
+                1,
+                boxes=[(app_id, decode_address(address))],
+            )
+        ],
+    )
+
+
+@method_call("user_profile.set_status")
+def profile_set_status_call() -> MethodCall:
+    address, signer, app_id, _ = _user_profile_call(opt_in=True)
+    return MethodCall(
+        "3_user_profile.tl",
+        [
+            _call(
+                address,
+                signer,
+                app_id,
+                "set_status",
+                "Hello, world!",
+                boxes=[(app_id, decode_address(address))],
+            )
+        ],
+    )
+
+
+@method_call("user_profile.close_out")
+def profile_close_out_call() -> MethodCall:
+    address, signer, app_id, _ = _user_profile_call(opt_in=True)
+    return MethodCall(
+        "3_user_profile.tl",
+        [TransactionWithSigner(ApplicationCloseOutTxn(address, _sp(), app_id), signer)],
+    )
+
+
+@method_call("ticketing.create_ticket")
+def create_ticket_call() -> MethodCall:
+    address, signer = get_account_pool().acquire(1)[0]
+    app_id, _ = _deploy_ticketing(signer)
+    get_account_pool().release(address)
+    return MethodCall("4_ticketing.tl", _create_ticket(address, signer, app_id))
+
+
+@method_call("ticketing.update_ticket_price")
+def update_ticket_price_call() -> MethodCall:
+    address, signer = get_account_pool().acquire(1)[0]
+    app_id, _ = _deploy_ticketing(signer)
+    _execute(*_create_ticket(address, signer, app_id))
+    get_account_pool().release(address)
+    return MethodCall(
+        "4_ticketing.tl",
+        [_call(address, signer, app_id, "update_ticket_price", TICKET_PRICE * 2)],
+    )
+
+
+@method_call("ticketing.buy_ticket")
+def buy_ticket_call() -> MethodCall:
+    account_pool = get_account_pool()
+    (manager_address, manager_signer), (address, signer) = account_pool.acquire(2)
+    app_id, app_address = _deploy_ticketing(manager_signer)
+    created = _execute(*_create_ticket(manager_address, manager_signer, app_id))
+    asset_id = int.from_bytes(b64decode(created["logs"][0]), "big")
+    _execute(TransactionWithSigner(AssetOptInTxn(address, _sp(), asset_id), signer))
+    account_pool.release(manager_address, address)
+    return MethodCall(
+        "4_ticketing.tl",
+        [
+            _pay(address, signer, app_address, TICKET_PRICE),
+            _call(
+                address,
+                signer,
+                app_id,
+                "buy_ticket",
+                1,
+                foreign_assets=[asset_id],
+                fee_multiplier=2,
+            ),
+        ],
+    )
+
+
+@method_call("auction.opt_in")
+def auction_opt_in_call() -> MethodCall:
+    address, signer = get_account_pool().acquire(1)[0]
+    app_id, _ = _deploy_auction(signer)
+    get_account_pool().release(address)
+    return MethodCall(
+        "5_auction.tl",
+        [TransactionWithSigner(ApplicationOptInTxn(address, _sp(), app_id), signer)],
+    )
+
+
+@method_call("auction.close_out")
+def auction_close_out_call() -> MethodCall:
+    address, signer = get_account_pool().acquire(1)[0]
+    app_id, _ = _deploy_auction(signer)
+    _opt_in_auction(address, signer, app_id)
+    get_account_pool().release(address)
+    return MethodCall(
+        "5_auction.tl",
+        [TransactionWithSigner(ApplicationCloseOutTxn(address, _sp(), app_id), signer)],
+    )
+
+
+@method_call("auction.create_auction")
+def create_auction_call() -> MethodCall:
+    address, signer = get_account_pool().acquire(1)[0]
+    app_id, _ = _deploy_auction(signer)
+    _opt_in_auction(address, signer, app_id)
+    asset_id = _create_nft(address, signer)
+    get_account_pool().release(address)
+    return MethodCall(
+        "5_auction.tl",
+        _create_auction(address, signer, app_id, asset_id, int(time()) + 3600),
+    )
+
+
+def _live_auction(
+    end_timestamp: int,
+) -> tuple[str, AccountTransactionSigner, int, int, bytes]:
+    """
+    Deploy `5_auction` and create an auction on it, returning its seller and
+    signer, the app id, the auctioned asset and the auction key.
+    """
+
+    address, signer = get_account_pool().acquire(1)[0]
+    app_id, _ = _deploy_auction(signer)
+    _opt_in_auction(address, signer, app_id)
+    asset_id = _create_nft(address, signer)
+    _execute(*_create_auction(address, signer, app_id, asset_id, end_timestamp))
+    get_account_pool().release(address)
+    return (
+        address,
+        signer,
+        app_id,
+        asset_id,
+        AUCTION_KEY.encode(decode_address(address), asset_id),
+    )
+
+
+@method_call("auction.place_bid")
+def place_bid_call() -> MethodCall:
+    # Acquired first, so that the bidder is not the seller.
+    address, signer = get_account_pool().acquire(1)[0]
+    _, _, app_id, _, key = _live_auction(int(time()) + 3600)
+    get_account_pool().release(address)
+    return MethodCall(
+        "5_auction.tl",
+        [
+            _pay(address, signer, get_application_address(app_id), MINIMUM_BID * 2),
+            _call(
+                address,
+                signer,
+                app_id,
+                "place_bid",
+                key,
+                boxes=[(app_id, key)],
+                accounts=[address],
+                fee_multiplier=2,
+            ),
+        ],
+    )
+
+
+@method_call("auction.settle")
+def settle_call() -> MethodCall:
+    # Settled by the seller without bids: the NFT is sent back to the seller
+    # and the box MBR refunded.
+    address, signer, app_id, asset_id, key = _live_auction(0)
+    return MethodCall(
+        "5_auction.tl",
+        [
+            _call(
+                address,
+                signer,
+                app_id,
+                "settle",
+                key,
+                foreign_assets=[asset_id],
+                boxes=[(app_id, key)],
+                fee_multiplier=3,
+            )
+        ],
+    )
@@ -0,0 +1,462 @@
+"""
+Load generator for a ticket drop on `4_ticketing`.
+
+    python -m benchmarks.ticket_drop [--buyers 500] [--tickets 1] [--supply N]
+                                     [--rate 100] [--concurrency 32]
+                                     [--output report.json]
+
+Deploys the app, creates the ticket, funds a population of buyers and
+pre-signs each buyer's opt-in + payment + `buy_ticket` group. The groups are
+then submitted at `--rate` groups per second (as fast as possible if 0) with at
+most `--concurrency` submissions in flight, and confirmed by following blocks.
+
+The JSON report has the sustained TPS, the submission and confirmation latency
+percentiles, the rejection reasons and the final ticket balances. A growing
+`schedule_lag` means the client cannot keep up with the target rate. Set
+`ALGORAND_NODE=standin` to run against the in-process stand-in node.
+
+The groups are signed with the same validity window of at most 1000 rounds. On
+a dev mode localnet every confirmed group makes a round, so drops of more than
+about 900 buyers outlive it: groups within `RESIGN_MARGIN` rounds of their last
+valid round when their turn comes, or rejected as expired, are signed again
+from fresh params and counted as `resigned`. Signing them is then part of their
+submission latency.
+"""
+
+import asyncio
+import json
+import re
+import sys
+from argparse import ArgumentParser
+from base64 import b64decode
+from collections import Counter
+from copy import copy
+from typing import Callable, NamedTuple
+
+from algosdk.atomic_transaction_composer import AccountTransactionSigner
+from algosdk.error import AlgodHTTPError
+from algosdk.transaction import (
+    ApplicationNoOpTxn,
+    AssetOptInTxn,
+    PaymentTxn,
+    StateSchema,
+    SuggestedParams,
+    wait_for_confirmation,
+)
+
+from benchmarks.harness import PERCENTILES, percentile
+from util.account import AccountPool, close_account_pool, get_account_pool
+from util.app import deploy_app
+from util.async_client import AsyncAlgodClient, async_algod_client
+from util.batch_signing import sign_batch
+from util.client import (
+    ALGORAND_NODE,
+    algod_client,
+    get_suggested_params,
+    suggested_params_cache,
+)
+from util.confirmation import (
+    EXPIRED_REJECTION,
+    ConfirmationWaiter,
+    TransactionExpiredError,
+)
+from util.txn_template import GroupTemplate
+
+TICKET_PRICE = 1_000
+# Account MBR + asset opt-in MBR + the fees of a buyer's group.
+BUYER_OVERHEAD = 100_000 + 100_000 + 6 * 1_000
+
+# Rounds before their last valid round under which groups are signed again
+# before being submitted, as every confirmed group may make a round.
+RESIGN_MARGIN = 100
+
+# Tx ids and addresses in rejection messages, replaced to group rejections.
+_IDENTIFIER = re.compile(r"\b[A-Z2-7]{58}\b|\b[A-Z2-7]{52}\b")
+
+
+class TicketDrop(NamedTuple):
+    app_id: int
+    app_address: str
+    asset_id: int
+    price: int
+    # Tickets bought by each buyer.
+    tickets: int
+    buyers: list[tuple[str, AccountTransactionSigner]]
+    # Funded the buyers; `close()` it to return their leftover funds.
+    buyer_pool: AccountPool
+
+
+class PresignedGroup(NamedTuple):
+    buyer: str
+    # Id of the group's first transaction, confirmed with the whole group.
+    tx_id: str
+    last_valid: int
+    # The signed group, encoded as sent to algod.
+    encoded: bytes
+
+
+class GroupOutcome(NamedTuple):
+    # Seconds after the start of the run.
+    scheduled_at: float
+    submitted_at: float
+    # `None` if the group was rejected or expired.
+    accepted_at: float | None
+    confirmed_at: float | None
+    rejection: str | None
+    # Whether the group was signed again as it was about to expire.
+    resigned: bool = False
+
+
+def setup_drop(
+    buyers: int, tickets: int = 1, supply: int | None = None, price: int = TICKET_PRICE
+) -> TicketDrop:
+    """
+    Deploy `4_ticketing`, create `supply` tickets (enough for every buyer by
+    default) and fund `buyers` new accounts to buy `tickets` each.
+
+    Close the drop's `buyer_pool` once done with the buyers.
+    """
+
+    ((manager_address, manager_signer),) = get_account_pool().acquire(1)
+    try:
+        app_id, app_address = deploy_app(
+            manager_signer,
+            "4_ticketing.teal",
+            "clear.teal",
+            get_suggested_params(),
+            StateSchema(num_uints=2, num_byte_slices=0),
+            StateSchema(num_uints=0, num_byte_slices=0),
+            funding=200_000,
+        )
+
+        sp = get_suggested_params()
+        sp.flat_fee = True
+        sp.fee = sp.min_fee * 2
+        stxn = ApplicationNoOpTxn(
+            manager_address,
+            sp,
+            app_id,
+            app_args=[
+                "create_ticket",
+                supply if supply is not None else buyers * tickets,
+                "DROP",
+                "Ticket Drop",
+                price,
+            ],
+        ).sign(manager_signer.private_key)
+        tx_id = algod_client.send_transaction(stxn)
+        logs = wait_for_confirmation(algod_client, tx_id, 5)["logs"]
+        asset_id = int.from_bytes(b64decode(logs[-1]), "big")
+    finally:
+        get_account_pool().release(manager_address)
+
+    buyer_pool = AccountPool(
+        batch_size=buyers, initial_funds=BUYER_OVERHEAD + price * tickets
+    )
+    return TicketDrop(
+        app_id,
+        app_address,
+        asset_id,
+        price,
+        tickets,
+        buyer_pool.acquire(buyers),
+        buyer_pool,
+    )
+
+
+def presign_groups(
+    drop: TicketDrop,
+    sp: SuggestedParams,
+    buyers: list[tuple[str, AccountTransactionSigner]] | None = None,
+) -> list[PresignedGroup]:
+    """
+    Sign every buyer's opt-in + payment + `buy_ticket` group up front, or the
+    groups of `buyers` only.
+    """
+
+    if buyers is None:
+        buyers = drop.buyers
+
+    sp = copy(sp)
+    sp.flat_fee = True
+    sp.fee = sp.min_fee
+    call_sp = copy(sp)
+    # Covers the inner asset transfer.
+    call_sp.fee = sp.min_fee * 4
+
+    # Encoded once, then patched with each buyer's address.
+    buyer = buyers[0][0] if buyers else drop.app_address
+    template = GroupTemplate(
+        [
+            AssetOptInTxn(buyer, sp, drop.asset_id),
+            PaymentTxn(buyer, sp, drop.app_address, drop.price * drop.tickets),
+            ApplicationNoOpTxn(
+                buyer,
+                call_sp,
+                drop.app_id,
+                app_args=["buy_ticket", drop.tickets],
+                foreign_assets=[drop.asset_id],
+            ),
+        ],
+        # An opt-in is a transfer to the sender.
+        [
+            {"sender": "buyer", "receiver": "buyer"},
+            {"sender": "buyer"},
+            {"sender": "buyer"},
+        ],
+    )
+
+    encoded_groups = [template.encode(buyer=address) for address, _ in buyers]
+    # Signed across the signing pool for large populations.
+    signed = iter(
+        sign_batch(
+            [
+                (txn, signer.private_key)
+                for (_, signer), (encoded, _) in zip(buyers, encoded_groups)
+                for txn in encoded
+            ]
+        )
+    )
+    return [
+        PresignedGroup(
+            buyer=address,
+            tx_id=tx_ids[0],
+            last_valid=sp.last,
+            encoded=b"".join(next(signed) for _ in encoded),
+        )
+        for (address, _), (encoded, tx_ids) in zip(buyers, encoded_groups)
+    ]
+
+
+def group_resigner(drop: TicketDrop) -> Callable[[PresignedGroup], PresignedGroup]:
+    """A function signing a group of `drop` again from the current params."""
+
+    signers = dict(drop.buyers)
+
+    def resign(group: PresignedGroup) -> PresignedGroup:
+        sp = get_suggested_params()
+        if sp.last <= group.last_valid:
+            # The cache has not seen the rounds pass (e.g. another client
+            # confirmed them).
+            suggested_params_cache.invalidate()
+            sp = get_suggested_params()
+        return presign_groups(drop, sp, [(group.buyer, signers[group.buyer])])[0]
+
+    return resign
+
+
+async def submit_groups(
+    groups: list[PresignedGroup],
+    rate: float,
+    concurrency: int,
+    client: AsyncAlgodClient = async_algod_client,
+    resign: Callable[[PresignedGroup], PresignedGroup] | None = None,
+) -> list[GroupOutcome]:
+    """
+    Submit `groups` in order, the `i`th one `i / rate` seconds after the start
+    (all at once if `rate` is 0), with at most `concurrency` submissions in
+    flight, and wait for each accepted group to be confirmed.
+
+    Groups within `RESIGN_MARGIN` rounds of their last valid round, or that
+    the node rejects as expired, are passed to `resign` (e.g.
+    `group_resigner(drop)`) and the group it returns is submitted instead.
+    """
+
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    waiter = ConfirmationWaiter(client)
+    await waiter.start()
+    started_at = loop.time()
+
+    async def submit(index: int, group: PresignedGroup) -> GroupOutcome:
+        scheduled_at = index / rate if rate else 0.0
+        delay = started_at + scheduled_at - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        async with semaphore:
+            submitted_at = loop.time() - started_at
+            resigned = (
+                resign is not None
+                and group.last_valid - waiter.last_round <= RESIGN_MARGIN
+            )
+            if resigned:
+                group = resign(group)
+            confirmation = waiter.register(group.tx_id, group.last_valid)
+            try:
+                try:
+                    await client.send_raw_transaction(group.encoded)
+                except AlgodHTTPError as e:
+                    # The waiter can lag behind the node: resend a group the
+                    # node already finds expired once, signed again.
+                    if resign is None or resigned or EXPIRED_REJECTION not in str(e):
+                        raise
+                    confirmation.cancel()
+                    group, resigned = resign(group), True
+                    confirmation = waiter.register(group.tx_id, group.last_valid)
+                    await client.send_raw_transaction(group.encoded)
+            except AlgodHTTPError as e:
+                confirmation.cancel()
+                return GroupOutcome(
+                    scheduled_at,
+                    submitted_at,
+                    None,
+                    None,
+                    rejection_reason(str(e)),
+                    resigned,
+                )
+            accepted_at = loop.time() - started_at
+
+        try:
+            await confirmation
+        except TransactionExpiredError:
+            return GroupOutcome(
+                scheduled_at, submitted_at, accepted_at, None, "expired", resigned
+            )
+        return GroupOutcome(
+            scheduled_at,
+            submitted_at,
+            accepted_at,
+            loop.time() - started_at,
+            None,
+            resigned,
+        )
+
+    try:
+        return await asyncio.gather(
+            *(submit(index, group) for index, group in enumerate(groups))
+        )
+    finally:
+        await waiter.stop()
+
+
+async def ticket_balances(
+    drop: TicketDrop, client: AsyncAlgodClient = async_algod_client
+) -> dict:
+    """Tickets held by the buyers (in total and per amount held) and by the app."""
+
+    async def holding(address: str) -> int:
+        try:
+            info = await client.account_asset_info(address, drop.asset_id)
+        except AlgodHTTPError as e:
+            if e.code == 404:
+                return 0
+            raise
+        return info["asset-holding"]["amount"]
+
+    amounts = await asyncio.gather(
+        *(holding(address) for address, _ in drop.buyers), holding(drop.app_address)
+    )
+    buyer_amounts = amounts[:-1]
+    return {
+        "sold": sum(buyer_amounts),
+        "unsold": amounts[-1],
+        "buyers_by_tickets_held": {
+            str(amount): count
+            for amount, count in sorted(Counter(buyer_amounts).items())
+        },
+    }
+
+
+def summarize_load(outcomes: list[GroupOutcome], group_size: int = 3) -> dict:
+    """TPS, latency percentiles (in milliseconds) and rejections of a run."""
+
+    confirmed = [outcome for outcome in outcomes if outcome.confirmed_at is not None]
+    last_confirmed_at = max(
+        (outcome.confirmed_at for outcome in confirmed), default=0.0
+    )
+    last_submitted_at = max((outcome.submitted_at for outcome in outcomes), default=0.0)
+
+    return {
+        "groups": len(outcomes),
+        "confirmed": len(confirmed),
+        "rejected": Counter(
+            outcome.rejection for outcome in outcomes if outcome.rejection is not None
+        ),
+        "resigned": sum(outcome.resigned for outcome in outcomes),
+        # Groups per second actually submitted, to compare with the target rate.
+        "submission_rate": len(outcomes) / last_submitted_at
+        if last_submitted_at
+        else 0.0,
+        "tps": len(confirmed) * group_size / last_confirmed_at
+        if last_confirmed_at
+        else 0.0,
+        "schedule_lag": _latencies(
+            [outcome.submitted_at - outcome.scheduled_at for outcome in outcomes]
+        ),
+        "submission_latency": _latencies(
+            [
+                outcome.accepted_at - outcome.submitted_at
+                for outcome in outcomes
+                if outcome.accepted_at is not None
+            ]
+        ),
+        "confirmation_latency": _latencies(
+            [outcome.confirmed_at - outcome.submitted_at for outcome in confirmed]
+        ),
+    }
+
+
+def rejection_reason(message: str) -> str:
+    """`message` without the tx ids and addresses in it."""
+
+    return _IDENTIFIER.sub("<id>", message)
+
+
+def _latencies(seconds: list[float]) -> dict[str, float]:
+    return {"p{}".format(q): percentile(seconds, q) * 1000 for q in PERCENTILES}
+
+
+def main() -> int:
+    parser = ArgumentParser(prog="python -m benchmarks.ticket_drop")
+    parser.add_argument("--buyers", type=int, default=500)
+    parser.add_argument("--tickets", type=int, default=1, help="tickets per buyer")
+    parser.add_argument(
+        "--supply", type=int, help="tickets created (default: enough for all buyers)"
+    )
+    parser.add_argument(
+        "--rate", type=float, default=100, help="groups per second, 0 for no limit"
+    )
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--output", help="write the report to this file")
+    args = parser.parse_args()
+
+    try:
+        print("Funding {} buyers...".format(args.buyers), file=sys.stderr)
+        drop = setup_drop(args.buyers, args.tickets, args.supply)
+    finally:
+        close_account_pool()
+
+    async def run() -> tuple[list[GroupOutcome], dict]:
+        outcomes = await submit_groups(
+            groups, args.rate, args.concurrency, resign=group_resigner(drop)
+        )
+        return outcomes, await ticket_balances(drop)
+
+    try:
+        groups = presign_groups(drop, get_suggested_params())
+        print("Submitting {} groups...".format(len(groups)), file=sys.stderr)
+        outcomes, balances = asyncio.run(run())
+    finally:
+        drop.buyer_pool.close()
+
+    report = {
+        "node": ALGORAND_NODE,
+        "buyers": args.buyers,
+        "tickets": args.tickets,
+        "rate": args.rate,
+        "concurrency": args.concurrency,
+        **summarize_load(outcomes),
+        "balances": balances,
+    }
+    encoded = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(encoded + "\n")
+    else:
+        print(encoded)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,34 @@
-from pytest import Session
+import json
+from collections import Counter
+from os import getenv
+from time import perf_counter
+
+import pytest
+from _pytest.terminal import TerminalReporter
+from pytest import Config, Session, TestReport
+
+from util.account import WorkerFunders, close_account_pool, set_funding_account
+from util.app_pool import close_app_pools, get_app_pool
+from util.client import ALGORAND_NODE, INSTRUMENT_CLIENTS
+from util.compile_cache import compile_cache
+from util.instrumentation import process_profile
+
+# Where to write the per-endpoint client request report when running with
+# INSTRUMENT_CLIENTS=1.
+CLIENT_REQUESTS_REPORT_PATH = getenv("CLIENT_REQUESTS_REPORT_PATH")
+
+# microAlgos given to each worker's own funding account when running with
+# pytest-xdist (`pytest -n <workers>`).
+WORKER_FUNDS = 100_000_000_000
+
+# Controller state, only set when tests are distributed across workers.
+_worker_funders: WorkerFunders | None = None
+_worker_results: dict[str, dict] = {}
+_worker_compile_cache_stats: Counter[str] = Counter()
+
+# Results of the tests run by this process.
+_results = {"passed": 0, "failed": 0, "skipped": 0, "duration": 0.0}
+_session_started_at = 0.0
 
 
 def pytest_sessionstart(session: Session) -> None:
@@ -6,7 +36,63 @@ def pytest_sessionstart(session: Session) -> None:
     Called after the Session object has been created and
     before performing collection and entering the run test loop.
     """
-    ...
+    global _session_started_at, _worker_funders
+    _session_started_at = perf_counter()
+
+    config = session.config
+    if ALGORAND_NODE == "standin":
+        # Every process runs its own stand-in node, with its own funding account.
+        pass
+    elif hasattr(config, "workerinput"):
+        # Fund this worker's accounts from its own funding account so workers
+        # never compete for the same sender.
+        set_funding_account(*config.workerinput["funding_account"])
+    elif _worker_count(config) > 0:
+        _worker_funders = WorkerFunders(WORKER_FUNDS)
+        _worker_funders.split(
+            ["gw{}".format(index) for index in range(_worker_count(config))]
+        )
+
+
+def pytest_collection_finish(session: Session) -> None:
+    """
+    Start deploying the apps of the collected test classes with an
+    `app_deployment` (see `util.app_pool`), one per test.
+    """
+    if hasattr(session.config, "workerinput"):
+        # Workers collect every test but only run some of them, so their app
+        # pools only deploy once a test asks for an app.
+        return
+
+    for item in session.items:
+        deployment = getattr(item.cls, "app_deployment", None)
+        if deployment is not None:
+            get_app_pool(deployment).expect(1)
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node) -> None:
+    """Hand each pytest-xdist worker its own funding account."""
+    if _worker_funders is not None:
+        node.workerinput["funding_account"] = _worker_funders.funder(
+            node.workerinput["workerid"]
+        )
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error) -> None:
+    """Collect the results a pytest-xdist worker sent back when it finished."""
+    _worker_results[node.workerinput["workerid"]] = node.workeroutput["results"]
+    _worker_compile_cache_stats.update(node.workeroutput["compile_cache"])
+    if "client_requests" in node.workeroutput:
+        process_profile.merge(node.workeroutput["client_requests"])
+
+
+def pytest_runtest_logreport(report: TestReport) -> None:
+    """Tally the outcomes of, and time spent in, this process's tests."""
+    _results["duration"] += report.duration
+    if report.when == "call" or not report.passed:
+        _results[report.outcome] += 1
 
 
 def pytest_sessionfinish(session: Session, exitstatus: int) -> None:
@@ -14,4 +100,68 @@ def pytest_sessionfinish(session: Session, exitstatus: int) -> None:
     Called after whole test run finished, right before
     returning the exit status to the system.
     """
-    ...
+    # Stop deploying apps, then return the leftover balances of pooled test
+    # accounts to the funding account.
+    close_app_pools()
+    close_account_pool()
+
+    config = session.config
+    if hasattr(config, "workerinput"):
+        config.workeroutput["results"] = {
+            **_results,
+            "wall_clock": perf_counter() - _session_started_at,
+        }
+        config.workeroutput["compile_cache"] = compile_cache.stats()
+        if INSTRUMENT_CLIENTS:
+            config.workeroutput["client_requests"] = process_profile.as_dict()
+        return
+
+    if _worker_funders is not None:
+        # Close the workers' funding accounts back to the KMD funding account.
+        _worker_funders.close()
+
+    if INSTRUMENT_CLIENTS and CLIENT_REQUESTS_REPORT_PATH:
+        with open(CLIENT_REQUESTS_REPORT_PATH, "w") as report:
+            json.dump(process_profile.as_dict(), report, indent=2)
+
+
+def pytest_terminal_summary(
+    terminalreporter: TerminalReporter, exitstatus: int, config: Config
+) -> None:
+    """
+    Report how often compiled programs were served from the compile cache, the
+    requests made by the clients with INSTRUMENT_CLIENTS=1, and when tests are
+    distributed, the results of each worker, which funded its accounts from
+    its own funding account (of WORKER_FUNDS, closed back at the end) or, on
+    the stand-in node, from its own node's.
+    """
+    # Including the workers' lookups when tests are distributed.
+    stats = Counter(compile_cache.stats())
+    stats.update(_worker_compile_cache_stats)
+    terminalreporter.write_sep("-", "compile cache")
+    terminalreporter.write_line(
+        ", ".join("{}: {}".format(name, count) for name, count in stats.items())
+    )
+
+    if INSTRUMENT_CLIENTS:
+        terminalreporter.write_sep("-", "client requests")
+        for line in process_profile.format():
+            terminalreporter.write_line(line)
+
+    if _worker_results:
+        terminalreporter.write_sep("-", "workers")
+        for worker_id, results in sorted(_worker_results.items()):
+            terminalreporter.write_line(
+                "{}: {passed} passed, {failed} failed, {skipped} skipped, "
+                "{duration:.2f}s in tests, {wall_clock:.2f}s wall clock".format(
+                    worker_id, **results
+                )
+            )
+
+
+def _worker_count(config: Config) -> int:
+    if not config.pluginmanager.hasplugin("xdist"):
+        return 0
+    if config.getoption("dist", "no") == "no":
+        return 0
+    return config.getoption("numprocesses", 0) or 0
@@ -10,35 +10,38 @@ from algosdk.transaction import (
 )
 from util.app import deploy_app
 
-from util.client import algod_client
-from util.account import AccountManager
+from util.client import algod_client, get_suggested_params
+from util.account import get_account_pool
 
 
 class TestHelloWorld:
     def setup_method(self):
         """Create account(s) and app before each test."""
 
-        (
-            self.manager_address,
-            self.manager_txn_signer,
-        ) = AccountManager().create_new_funded_account()
+        account_pool = get_account_pool()
+        self.manager_address, self.manager_txn_signer = account_pool.acquire(1)[0]
 
         self.app_id, self.app_address = deploy_app(
             self.manager_txn_signer,
             "1_hello_world.teal",
             "clear.teal",
-            algod_client.suggested_params(),
+            get_suggested_params(),
             StateSchema(num_uints=0, num_byte_slices=0),
             StateSchema(num_uints=0, num_byte_slices=0),
         )
 
+    def teardown_method(self):
+        """Return account(s) to the pool after each test."""
+
+        get_account_pool().release(self.manager_address)
+
     def test_greeting(self):
         atc = AtomicTransactionComposer()
         atc.add_transaction(
             TransactionWithSigner(
                 txn=ApplicationCallTxn(
                     sender=self.manager_address,
-                    sp=algod_client.suggested_params(),
+                    sp=get_suggested_params(),
                     index=self.app_id,
                     on_complete=OnComplete.NoOpOC.real,
                 ),
@@ -8,51 +8,60 @@ from algosdk.transaction import (
     OnComplete,
     StateSchema,
 )
-from util.app import deploy_app
+from util.app import AppDeployment
+from util.app_pool import get_app_pool
 
-from util.client import algod_client
-from util.account import AccountManager
-from util.state_decode import decode_state
+from util.client import algod_client, get_suggested_params, unique_note
+from util.account import get_account_pool
+from util.state_decode import UINT, StateDecoder
+
+GLOBAL_STATE = StateDecoder({"counter": UINT}, "CounterGlobalState")
 
 
 class TestCounter:
+    # Deployed ahead of the tests by the app pool (see `tests/conftest.py`).
+    app_deployment = AppDeployment(
+        "2_counter.teal",
+        "clear.teal",
+        StateSchema(num_uints=1, num_byte_slices=0),
+        StateSchema(num_uints=0, num_byte_slices=0),
+    )
+
     def setup_method(self):
-        """Create account(s) and app before each test."""
+        """Take an unused app and its manager from the app pool before each test."""
 
         (
+            self.app_id,
+            self.app_address,
             self.manager_address,
             self.manager_txn_signer,
-        ) = AccountManager().create_new_funded_account()
+        ) = get_app_pool(self.app_deployment).acquire()
 
-        self.app_id, self.app_address = deploy_app(
-            self.manager_txn_signer,
-            "2_counter.teal",
-            "clear.teal",
-            algod_client.suggested_params(),
-            StateSchema(num_uints=1, num_byte_slices=0),
-            StateSchema(num_uints=0, num_byte_slices=0),
-        )
+    def teardown_method(self):
+        """Return account(s) to the pool after each test."""
+
+        get_account_pool().release(self.manager_address)
 
     def test_increment_counter_as_manager(self):
         global_state = self._increment_counter(
             self.manager_address, self.manager_txn_signer
         )
-        assert global_state["counter"] == 1
+        assert global_state.counter == 1
 
         global_state = self._increment_counter(
             self.manager_address, self.manager_txn_signer
         )
-        assert global_state["counter"] == 2
+        assert global_state.counter == 2
 
         global_state = self._increment_counter(
             self.manager_address, self.manager_txn_signer
         )
-        assert global_state["counter"] == 3
+        assert global_state.counter == 3
 
         global_state = self._increment_counter(
             self.manager_address, self.manager_txn_signer
         )
-        assert global_state["counter"] == 3
+        assert global_state.counter == 3
 
     def _increment_counter(self, address: str, txn_signer: AccountTransactionSigner):
         atc = AtomicTransactionComposer()
@@ -60,17 +69,19 @@ class TestCounter:
             TransactionWithSigner(
                 txn=ApplicationCallTxn(
                     sender=address,
-                    sp=algod_client.suggested_params(),
+                    sp=get_suggested_params(),
                     index=self.app_id,
                     on_complete=OnComplete.NoOpOC.real,
                     app_args=["increment_counter"],
+                    # Each call is otherwise identical to the previous one.
+                    note=unique_note(),
                 ),
                 signer=txn_signer,
             )
         )
         atc.execute(algod_client, 5).tx_ids[0]
 
-        global_state = decode_state(
+        global_state = GLOBAL_STATE.decode(
             algod_client.application_info(self.app_id)["params"]["global-state"]
         )
 
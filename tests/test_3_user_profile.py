@@ -12,50 +12,44 @@ from algosdk.transaction import (
     PaymentTxn,
     StateSchema,
 )
-from util.app import deploy_app
-from util.client import algod_client
-from util.account import AccountManager
-from util.state_decode import decode_state
+from util.app import AppDeployment
+from util.app_pool import get_app_pool
+from util.box_codec import load_codecs
+from util.client import algod_client, get_suggested_params
+from util.account import get_account_pool
+from util.state_decode import STR, UINT, StateDecoder
+
+USER_INFO = load_codecs("3_user_profile.tl")["UserInfo"]
+GLOBAL_STATE = StateDecoder({"users": UINT}, "UserProfileGlobalState")
+LOCAL_STATE = StateDecoder({"status": STR}, "UserProfileLocalState")
 
 
 class TestUserProfile:
-    def setup_method(self) -> None:
-        """Create account(s) and app before each test."""
+    # Deployed ahead of the tests by the app pool (see `tests/conftest.py`).
+    app_deployment = AppDeployment(
+        "3_user_profile.teal",
+        "clear.teal",
+        StateSchema(num_uints=1, num_byte_slices=0),
+        StateSchema(num_uints=0, num_byte_slices=1),
+        # Cover MBR of contract.
+        funding=100_000,
+    )
 
-        account_manager = AccountManager()
+    def setup_method(self) -> None:
+        """Take an unused app and its manager from the app pool before each test."""
 
         (
+            self.app_id,
+            self.app_address,
             self.manager_address,
             self.manager_txn_signer,
-        ) = account_manager.create_new_funded_account()
-        (
-            self.user_address,
-            self.user_txn_signer,
-        ) = account_manager.create_new_funded_account()
+        ) = get_app_pool(self.app_deployment).acquire()
+        ((self.user_address, self.user_txn_signer),) = get_account_pool().acquire(1)
 
-        self.app_id, self.app_address = deploy_app(
-            self.manager_txn_signer,
-            "3_user_profile.teal",
-            "clear.teal",
-            algod_client.suggested_params(),
-            StateSchema(num_uints=1, num_byte_slices=0),
-            StateSchema(num_uints=0, num_byte_slices=1),
-        )
+    def teardown_method(self) -> None:
+        """Return account(s) to the pool after each test."""
 
-        # Cover MBR of contract.
-        atc = AtomicTransactionComposer()
-        atc.add_transaction(
-            TransactionWithSigner(
-                txn=PaymentTxn(
-                    sender=self.manager_address,
-                    sp=algod_client.suggested_params(),
-                    receiver=self.app_address,
-                    amt=100_000,
-                ),
-                signer=self.manager_txn_signer,
-            )
-        )
-        atc.execute(algod_client, 5)
+        get_account_pool().release(self.manager_address, self.user_address)
 
     def test_opt_in(self) -> None:
         birthday = b"10/03/1999"
@@ -63,19 +57,19 @@ class TestUserProfile:
         number_of_pets = 0
         self._opt_in(birthday, favourite_colour, number_of_pets)
 
-        global_state = decode_state(
+        global_state = GLOBAL_STATE.decode(
             algod_client.application_info(self.app_id)["params"]["global-state"]
         )
 
-        assert global_state["users"] == 1
+        assert global_state.users == 1
 
-        local_state = decode_state(
+        local_state = LOCAL_STATE.decode(
             algod_client.account_application_info(self.user_address, self.app_id)[
                 "app-local-state"
             ]["key-value"]
         )
 
-        assert local_state["status"] == ""
+        assert local_state.status == ""
 
         box = algod_client.application_box_by_name(
             self.app_id, decode_address(self.user_address)
@@ -83,11 +77,11 @@ class TestUserProfile:
 
         assert encode_address(b64decode(box["name"])) == self.user_address
 
-        box_value = b64decode(box["value"])
+        user_info = USER_INFO.decode(b64decode(box["value"]))
 
-        assert box_value[:10] == birthday
-        assert box_value[10:30] == favourite_colour
-        assert int.from_bytes(box_value[30:], byteorder="big") == number_of_pets
+        assert user_info.birthday == birthday
+        assert user_info.favourite_colour == favourite_colour
+        assert user_info.number_of_pets == number_of_pets
 
     def test_close_out(self) -> None:
         birthday = b"10/03/1999"
@@ -100,7 +94,7 @@ class TestUserProfile:
             TransactionWithSigner(
                 txn=ApplicationCloseOutTxn(
                     sender=self.user_address,
-                    sp=algod_client.suggested_params(),
+                    sp=get_suggested_params(),
                     index=self.app_id,
                     boxes=[(self.app_id, decode_address(self.user_address))],
                 ),
@@ -109,14 +103,14 @@ class TestUserProfile:
         )
         atc.execute(algod_client, 5)
 
-        global_state = decode_state(
+        global_state = GLOBAL_STATE.decode(
             algod_client.application_info(self.app_id)["params"]["global-state"]
         )
 
-        assert global_state["users"] == 0
+        assert global_state.users == 0
 
         try:
-            decode_state(
+            LOCAL_STATE.decode(
                 algod_client.account_application_info(self.user_address, self.app_id)[
                     "app-local-state"
                 ]["key-value"]
@@ -129,11 +123,11 @@ class TestUserProfile:
         )
         assert encode_address(b64decode(box["name"])) == self.user_address
 
-        box_value = b64decode(box["value"])
+        user_info = USER_INFO.decode(b64decode(box["value"]))
 
-        assert box_value[:10] == birthday
-        assert box_value[10:30] == favourite_colour
-        assert int.from_bytes(box_value[30:], byteorder="big") == number_of_pets
+        assert user_info.birthday == birthday
+        assert user_info.favourite_colour == favourite_colour
+        assert user_info.number_of_pets == number_of_pets
 
     def test_update_user_info(self) -> None:
         birthday = b"10/03/1999"
@@ -150,7 +144,7 @@ class TestUserProfile:
             TransactionWithSigner(
                 txn=ApplicationNoOpTxn(
                     sender=self.user_address,
-                    sp=algod_client.suggested_params(),
+                    sp=get_suggested_params(),
                     index=self.app_id,
                     app_args=[
                         "update_user_info",
@@ -165,19 +159,19 @@ class TestUserProfile:
         )
         atc.execute(algod_client, 5)
 
-        global_state = decode_state(
+        global_state = GLOBAL_STATE.decode(
             algod_client.application_info(self.app_id)["params"]["global-state"]
         )
 
-        assert global_state["users"] == 1
+        assert global_state.users == 1
 
-        local_state = decode_state(
+        local_state = LOCAL_STATE.decode(
             algod_client.account_application_info(self.user_address, self.app_id)[
                 "app-local-state"
             ]["key-value"]
         )
 
-        assert local_state["status"] == ""
+        assert local_state.status == ""
 
         box = algod_client.application_box_by_name(
             self.app_id, decode_address(self.user_address)
@@ -185,11 +179,11 @@ class TestUserProfile:
 
         assert encode_address(b64decode(box["name"])) == self.user_address
 
-        box_value = b64decode(box["value"])
+        user_info = USER_INFO.decode(b64decode(box["value"]))
 
-        assert box_value[:10] == birthday
-        assert box_value[10:30] == favourite_colour
-        assert int.from_bytes(box_value[30:], byteorder="big") == number_of_pets
+        assert user_info.birthday == birthday
+        assert user_info.favourite_colour == favourite_colour
+        assert user_info.number_of_pets == number_of_pets
 
     def test_set_status(self) -> None:
         birthday = b"10/03/1999"
@@ -204,7 +198,7 @@ class TestUserProfile:
             TransactionWithSigner(
                 txn=ApplicationNoOpTxn(
                     sender=self.user_address,
-                    sp=algod_client.suggested_params(),
+                    sp=get_suggested_params(),
                     index=self.app_id,
                     app_args=[
                         "set_status",
@@ -217,13 +211,13 @@ class TestUserProfile:
         )
         atc.execute(algod_client, 5)
 
-        local_state = decode_state(
+        local_state = LOCAL_STATE.decode(
             algod_client.account_application_info(self.user_address, self.app_id)[
                 "app-local-state"
             ]["key-value"]
         )
 
-        assert local_state["status"] == status
+        assert local_state.status == status
 
     def _opt_in(
         self, birthday: bytes, favourite_colour: bytes, number_of_pets: int
@@ -233,7 +227,7 @@ class TestUserProfile:
             TransactionWithSigner(
                 txn=PaymentTxn(
                     sender=self.user_address,
-                    sp=algod_client.suggested_params(),
+                    sp=get_suggested_params(),
                     receiver=self.app_address,
                     amt=30_500,
                 ),
@@ -244,7 +238,7 @@ class TestUserProfile:
             TransactionWithSigner(
                 txn=ApplicationOptInTxn(
                     sender=self.user_address,
-                    sp=algod_client.suggested_params(),
+                    sp=get_suggested_params(),
                     index=self.app_id,
                     app_args=[birthday, favourite_colour, number_of_pets],
                     boxes=[(self.app_id, decode_address(self.user_address))],
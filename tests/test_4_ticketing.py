@@ -11,50 +11,43 @@ from algosdk.transaction import (
     PaymentTxn,
     StateSchema,
 )
-from util.app import deploy_app
-from util.client import algod_client
-from util.account import AccountManager
-from util.state_decode import decode_state
+from util.app import AppDeployment
+from util.app_pool import get_app_pool
+from util.client import algod_client, get_suggested_params
+from util.account import get_account_pool
+from util.state_decode import UINT, StateDecoder
+
+GLOBAL_STATE = StateDecoder(
+    {"ticket_id": UINT, "ticket_price": UINT}, "TicketingGlobalState"
+)
 
 
 class TestTicketing:
-    def setup_method(self) -> None:
-        """Create account(s) and app before each test."""
+    # Deployed ahead of the tests by the app pool (see `tests/conftest.py`).
+    app_deployment = AppDeployment(
+        "4_ticketing.teal",
+        "clear.teal",
+        StateSchema(num_uints=2, num_byte_slices=0),
+        StateSchema(num_uints=0, num_byte_slices=0),
+        # Cover MBR of contract.
+        funding=200_000,
+    )
 
-        account_manager = AccountManager()
+    def setup_method(self) -> None:
+        """Take an unused app and its manager from the app pool before each test."""
 
         (
+            self.app_id,
+            self.app_address,
             self.manager_address,
             self.manager_txn_signer,
-        ) = account_manager.create_new_funded_account()
-        (
-            self.user_address,
-            self.user_txn_signer,
-        ) = account_manager.create_new_funded_account()
+        ) = get_app_pool(self.app_deployment).acquire()
+        ((self.user_address, self.user_txn_signer),) = get_account_pool().acquire(1)
 
-        self.app_id, self.app_address = deploy_app(
-            self.manager_txn_signer,
-            "4_ticketing.teal",
-            "clear.teal",
-            algod_client.suggested_params(),
-            StateSchema(num_uints=2, num_byte_slices=0),
-            StateSchema(num_uints=0, num_byte_slices=0),
-        )
+    def teardown_method(self) -> None:
+        """Return account(s) to the pool after each test."""
 
-        # Cover MBR of contract.
-        atc = AtomicTransactionComposer()
-        atc.add_transaction(
-            TransactionWithSigner(
-                txn=PaymentTxn(
-                    sender=self.manager_address,
-                    sp=algod_client.suggested_params(),
-                    receiver=self.app_address,
-                    amt=200_000,
-                ),
-                signer=self.manager_txn_signer,
-            )
-        )
-        atc.execute(algod_client, 5)
+        get_account_pool().release(self.manager_address, self.user_address)
 
     def test_create_ticket(self) -> None:
         unit_name = "TEST"
@@ -78,11 +71,11 @@ class TestTicketing:
         assert asset_params["name"] == asset_name
         assert asset_params["unit-name"] == unit_name
 
-        global_state = decode_state(
+        global_state = GLOBAL_STATE.decode(
             algod_client.application_info(self.app_id)["params"]["global-state"]
         )
 
-        assert global_state["ticket_price"] == price
+        assert global_state.ticket_price == price
 
     def test_update_ticket_price(self) -> None:
         unit_name = "TEST"
@@ -106,7 +99,7 @@ class TestTicketing:
             TransactionWithSigner(
                 txn=ApplicationNoOpTxn(
                     sender=self.manager_address,
-                    sp=algod_client.suggested_params(),
+                    sp=get_suggested_params(),
                     index=self.app_id,
                     app_args=["update_ticket_price", new_price],
                 ),
@@ -115,11 +108,11 @@ class TestTicketing:
         )
         atc.execute(algod_client, 5)
 
-        global_state = decode_state(
+        global_state = GLOBAL_STATE.decode(
             algod_client.application_info(self.app_id)["params"]["global-state"]
         )
 
-        assert global_state["ticket_price"] == new_price
+        assert global_state.ticket_price == new_price
 
     def test_buy_ticket(self) -> None:
         unit_name = "TEST"
@@ -136,7 +129,7 @@ class TestTicketing:
             price,
         )
 
-        sp = algod_client.suggested_params()
+        sp = get_suggested_params()
         sp.flat_fee = True
         amount = 3
 
@@ -194,7 +187,7 @@ class TestTicketing:
         asset_name: str,
         price: int,
     ) -> int:
-        sp = algod_client.suggested_params()
+        sp = get_suggested_params()
         sp.flat_fee = True
         sp.fee = sp.min_fee * 2
 
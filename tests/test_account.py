@@ -0,0 +1,219 @@
+import json
+from os import chmod, stat
+from pathlib import Path
+
+from algosdk.account import generate_account
+from algosdk.atomic_transaction_composer import (
+    AccountTransactionSigner,
+    AtomicTransactionComposer,
+    TransactionWithSigner,
+)
+from algosdk.transaction import AssetCreateTxn, PaymentTxn
+from pytest import MonkeyPatch, raises
+
+from util import account
+from util.account import AccountManager, AccountPool, WorkerFunders
+from util.client import algod_client, get_suggested_params
+
+
+def _close_accounts(
+    accounts: list[tuple[str, AccountTransactionSigner]], receiver: str
+) -> None:
+    """Send the whole balance of `accounts` back to `receiver`."""
+
+    sp = get_suggested_params()
+    for start in range(0, len(accounts), AtomicTransactionComposer.MAX_GROUP_SIZE):
+        atc = AtomicTransactionComposer()
+        for address, signer in accounts[
+            start : start + AtomicTransactionComposer.MAX_GROUP_SIZE
+        ]:
+            atc.add_transaction(
+                TransactionWithSigner(
+                    txn=PaymentTxn(
+                        sender=address,
+                        sp=sp,
+                        receiver=receiver,
+                        amt=0,
+                        close_remainder_to=receiver,
+                    ),
+                    signer=signer,
+                )
+            )
+        atc.execute(algod_client, 5)
+
+
+class TestAccountManager:
+    def setup_method(self) -> None:
+        self.account_manager = AccountManager()
+
+    def test_funds_accounts_across_groups(self) -> None:
+        # More accounts than fit in one group, each with its own amount.
+        amounts = [100_000 + index for index in range(20)]
+        accounts = self.account_manager.create_new_funded_accounts(20, amounts)
+
+        try:
+            assert len({address for address, _ in accounts}) == 20
+            for (address, _), amount in zip(accounts, amounts):
+                assert algod_client.account_info(address)["amount"] == amount
+        finally:
+            _close_accounts(accounts, self.account_manager.funding_address)
+
+    def test_funds_accounts_with_one_amount(self) -> None:
+        accounts = self.account_manager.create_new_funded_accounts(2, 200_000)
+
+        try:
+            for address, _ in accounts:
+                assert algod_client.account_info(address)["amount"] == 200_000
+        finally:
+            _close_accounts(accounts, self.account_manager.funding_address)
+
+    def test_rejects_mismatched_amounts(self) -> None:
+        with raises(ValueError, match="Expected 3 amounts, got 2."):
+            self.account_manager.create_new_funded_accounts(3, [100_000, 100_000])
+
+
+def _no_kmd_scan(account_manager: AccountManager) -> tuple[str, str]:
+    raise AssertionError("KMD was scanned for a funding account.")
+
+
+class TestFundingAccountCache:
+    def setup_method(self) -> None:
+        self.monkeypatch = MonkeyPatch()
+        # Forget the funding account found by this process.
+        self.monkeypatch.setattr(account, "_funding_account", None)
+
+    def teardown_method(self) -> None:
+        self.monkeypatch.undo()
+
+    def test_reuses_cached_account(self, tmp_path: Path) -> None:
+        cache_path = tmp_path / "funding_account.json"
+        cache_path.write_text("")
+        chmod(cache_path, 0o644)
+        self.monkeypatch.setattr(account, "FUNDING_ACCOUNT_CACHE_PATH", str(cache_path))
+
+        funding_address = AccountManager().funding_address
+
+        assert stat(cache_path).st_mode & 0o777 == 0o600
+        assert json.loads(cache_path.read_text())["address"] == funding_address
+
+        # Another process reads it back instead of scanning KMD.
+        self.monkeypatch.setattr(account, "_funding_account", None)
+        self.monkeypatch.setattr(AccountManager, "_get_funding_account", _no_kmd_scan)
+        assert AccountManager().funding_address == funding_address
+
+    def test_scans_kmd_when_cached_account_is_not_funded(self, tmp_path: Path) -> None:
+        private, address = generate_account()
+        cache_path = tmp_path / "funding_account.json"
+        cache_path.write_text(json.dumps({"address": address, "private_key": private}))
+        self.monkeypatch.setattr(account, "FUNDING_ACCOUNT_CACHE_PATH", str(cache_path))
+
+        funding_address = AccountManager().funding_address
+
+        assert funding_address != address
+        assert json.loads(cache_path.read_text())["address"] == funding_address
+
+
+class TestAccountPool:
+    def setup_method(self) -> None:
+        self.account_pool = AccountPool(
+            batch_size=2, initial_funds=1_000_000, minimum_funds=500_000
+        )
+        self.funding_address = self.account_pool.account_manager.funding_address
+
+    def teardown_method(self) -> None:
+        self.account_pool.close()
+
+    def test_reuses_released_accounts(self) -> None:
+        addresses = [address for address, _ in self.account_pool.acquire(2)]
+        for address in addresses:
+            assert algod_client.account_info(address)["amount"] == 1_000_000
+
+        self.account_pool.release(*addresses)
+
+        assert sorted(address for address, _ in self.account_pool.acquire(2)) == sorted(
+            addresses
+        )
+
+    def test_tops_up_spent_accounts(self) -> None:
+        ((address, signer),) = self.account_pool.acquire(1)
+        atc = AtomicTransactionComposer()
+        atc.add_transaction(
+            TransactionWithSigner(
+                txn=PaymentTxn(
+                    sender=address,
+                    sp=get_suggested_params(),
+                    receiver=self.funding_address,
+                    amt=500_000,
+                ),
+                signer=signer,
+            )
+        )
+        atc.execute(algod_client, 5)
+        self.account_pool.release(address)
+
+        # 399,000 spendable microAlgos are below the minimum of 500,000.
+        assert self.account_pool.acquire(1)[0][0] == address
+        assert algod_client.account_info(address)["amount"] == 1_000_000
+
+    def test_leaves_accounts_holding_more_than_initial_funds(self) -> None:
+        account_pool = AccountPool(batch_size=1, initial_funds=300_000)
+        try:
+            assert account_pool.minimum_funds == 150_000
+            ((address, _),) = account_pool.acquire(1)
+            account_pool.account_manager._fund_accounts([address], [100_000])
+            account_pool.release(address)
+
+            assert account_pool.acquire(1)[0][0] == address
+            assert algod_client.account_info(address)["amount"] == 400_000
+        finally:
+            account_pool.close()
+
+    def test_retires_accounts_with_asset_state(self) -> None:
+        ((address, signer),) = self.account_pool.acquire(1)
+        atc = AtomicTransactionComposer()
+        atc.add_transaction(
+            TransactionWithSigner(
+                txn=AssetCreateTxn(
+                    sender=address,
+                    sp=get_suggested_params(),
+                    total=1,
+                    decimals=0,
+                    default_frozen=False,
+                ),
+                signer=signer,
+            )
+        )
+        atc.execute(algod_client, 5)
+        self.account_pool.release(address)
+
+        assert address not in [acquired for acquired, _ in self.account_pool.acquire(2)]
+
+    def test_close_returns_balances(self) -> None:
+        addresses = [address for address, _ in self.account_pool.acquire(2)]
+        self.account_pool.release(addresses[0])
+
+        self.account_pool.close()
+
+        # Both the released account and the one still in use are closed.
+        for address in addresses:
+            assert algod_client.account_info(address)["amount"] == 0
+
+
+class TestWorkerFunders:
+    def test_funds_a_funder_per_worker(self) -> None:
+        worker_funders = WorkerFunders(10_000_000)
+        try:
+            worker_funders.split(["gw0", "gw1"])
+            funders = [worker_funders.funder(worker_id) for worker_id in ("gw0", "gw1")]
+            assert worker_funders.funder("gw0") == funders[0]
+            # e.g. a worker started to replace a crashed one.
+            funders.append(worker_funders.funder("gw2"))
+
+            assert len({address for address, _ in funders}) == 3
+            for address, _ in funders:
+                assert algod_client.account_info(address)["amount"] == 10_000_000
+        finally:
+            worker_funders.close()
+
+        for address, _ in funders:
+            assert algod_client.account_info(address)["amount"] == 0
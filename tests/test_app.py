@@ -0,0 +1,56 @@
+from algosdk.transaction import StateSchema
+from pytest import raises
+
+from util.account import get_account_pool
+from util.app import AppDeployment, deploy_apps
+from util.client import algod_client, get_suggested_params
+
+COUNTER = AppDeployment(
+    "2_counter.teal",
+    "clear.teal",
+    StateSchema(num_uints=1, num_byte_slices=0),
+    StateSchema(num_uints=0, num_byte_slices=0),
+    funding=100_000,
+)
+
+
+class TestDeployApps:
+    def setup_method(self) -> None:
+        self.accounts = get_account_pool().acquire(2)
+
+    def teardown_method(self) -> None:
+        get_account_pool().release(*(address for address, _ in self.accounts))
+
+    def test_deploys_across_groups(self) -> None:
+        (address, signer), _ = self.accounts
+
+        # 20 creations and 20 payments need several groups of 16.
+        apps = deploy_apps(signer, [COUNTER] * 20, get_suggested_params())
+
+        assert len({app_id for app_id, _ in apps}) == 20
+        for app_id, app_address in apps:
+            app_info = algod_client.application_info(app_id)
+            assert app_info["params"]["creator"] == address
+            assert algod_client.account_info(app_address)["amount"] == 100_000
+
+    def test_deploys_with_a_signer_per_app(self) -> None:
+        apps = deploy_apps(
+            [signer for _, signer in self.accounts],
+            [COUNTER, COUNTER._replace(funding=0)],
+            get_suggested_params(),
+        )
+
+        for (app_id, app_address), (address, _), funding in zip(
+            apps, self.accounts, (100_000, 0)
+        ):
+            app_info = algod_client.application_info(app_id)
+            assert app_info["params"]["creator"] == address
+            assert algod_client.account_info(app_address)["amount"] == funding
+
+    def test_rejects_mismatched_signers(self) -> None:
+        with raises(ValueError, match="Expected 3 signers, got 2."):
+            deploy_apps(
+                [signer for _, signer in self.accounts],
+                [COUNTER] * 3,
+                get_suggested_params(),
+            )
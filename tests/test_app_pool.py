@@ -0,0 +1,43 @@
+from algosdk.transaction import StateSchema
+from pytest import raises
+
+from util.account import get_account_pool
+from util.app import AppDeployment
+from util.app_pool import AppPool
+from util.client import algod_client
+
+USER_PROFILE = AppDeployment(
+    "3_user_profile.teal",
+    "clear.teal",
+    StateSchema(num_uints=1, num_byte_slices=0),
+    StateSchema(num_uints=0, num_byte_slices=1),
+    funding=100_000,
+)
+
+
+class TestAppPool:
+    def test_hands_out_funded_apps_once(self) -> None:
+        app_pool = AppPool(USER_PROFILE, size=2)
+        app_pool.expect(3)
+        try:
+            instances = [app_pool.acquire() for _ in range(4)]
+        finally:
+            app_pool.close()
+
+        assert len({instance.app_id for instance in instances}) == 4
+        for instance in instances:
+            app_info = algod_client.application_info(instance.app_id)
+            assert app_info["params"]["creator"] == instance.creator_address
+            assert algod_client.account_info(instance.app_address)["amount"] == 100_000
+
+        get_account_pool().release(
+            *(instance.creator_address for instance in instances)
+        )
+
+    def test_reports_deploy_errors(self) -> None:
+        app_pool = AppPool(USER_PROFILE._replace(approval_name="missing.teal"))
+        try:
+            with raises(Exception, match="Could not deploy missing.teal"):
+                app_pool.acquire()
+        finally:
+            app_pool.close()
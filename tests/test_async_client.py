@@ -0,0 +1,167 @@
+import asyncio
+import json
+from base64 import b64encode
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from time import sleep
+
+from algosdk.error import AlgodHTTPError
+from pytest import raises
+
+from util.async_client import AsyncAlgodClient, AsyncKMDClient
+
+TOKEN = "a" * 64
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Answers the few algod and KMD routes the tests below need."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        self._handle()
+
+    def do_POST(self) -> None:
+        self._handle()
+
+    def _handle(self) -> None:
+        server = self.server
+        with server.lock:
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        sleep(server.delay)
+
+        status, response = 200, {}
+        if self.path == "/v2/empty":
+            with server.lock:
+                server.in_flight -= 1
+            # No body, nor Content-Length.
+            self.send_response(204)
+            self.end_headers()
+            return
+        if self.path == "/v2/transactions/params":
+            response = {
+                "fee": 0,
+                "last-round": 10,
+                "genesis-hash": "gh",
+                "genesis-id": "localnet",
+                "consensus-version": "future",
+                "min-fee": 1000,
+            }
+        elif self.path.startswith("/v2/teal/compile"):
+            response = {"hash": "", "result": b64encode(body[::-1]).decode()}
+        elif self.path == "/v1/wallets":
+            response = {"wallets": [{"id": "1", "name": "default"}]}
+        elif self.path == "/v1/key/list":
+            response = {"addresses": [json.loads(body)["wallet_handle_token"]]}
+        else:
+            status, response = 404, {"message": "not found"}
+
+        with server.lock:
+            server.in_flight -= 1
+
+        encoded = json.dumps(response).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def log_message(self, *args) -> None:
+        ...
+
+
+class TestAsyncClient:
+    def setup_method(self) -> None:
+        """Start a local HTTP stand-in for algod and KMD before each test."""
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+        self.server.lock = Lock()
+        self.server.in_flight = 0
+        self.server.max_in_flight = 0
+        self.server.delay = 0
+        Thread(target=self.server.serve_forever, daemon=True).start()
+
+        self.address = "http://127.0.0.1:{}".format(self.server.server_port)
+
+    def teardown_method(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_suggested_params(self) -> None:
+        client = AsyncAlgodClient(TOKEN, self.address)
+
+        sp = asyncio.run(client.suggested_params())
+
+        assert sp.first == 10
+        assert sp.last == 1010
+        assert sp.min_fee == 1000
+
+    def test_compile(self) -> None:
+        client = AsyncAlgodClient(TOKEN, self.address)
+
+        response = asyncio.run(client.compile("int 1"))
+
+        assert response["result"] == b64encode(b"1 tni").decode()
+
+    def test_reuses_connections(self) -> None:
+        client = AsyncAlgodClient(TOKEN, self.address)
+
+        async def run() -> None:
+            for _ in range(20):
+                await client.suggested_params()
+            await client.close()
+
+        asyncio.run(run())
+
+        assert client.pool.connections_opened == 1
+
+    def test_reuses_connections_after_empty_responses(self) -> None:
+        client = AsyncAlgodClient(TOKEN, self.address)
+
+        async def run() -> dict:
+            response = await asyncio.wait_for(client.request("GET", "/empty"), 5)
+            await client.suggested_params()
+            await client.close()
+            return response
+
+        assert asyncio.run(run()) == {}
+        assert client.pool.connections_opened == 1
+
+    def test_limits_concurrency(self) -> None:
+        self.server.delay = 0.05
+        client = AsyncAlgodClient(TOKEN, self.address, max_connections=4)
+
+        async def run() -> None:
+            await asyncio.gather(*(client.suggested_params() for _ in range(20)))
+            await client.close()
+
+        asyncio.run(run())
+
+        assert self.server.max_in_flight <= 4
+        assert client.pool.connections_opened == 4
+
+    def test_http_error(self) -> None:
+        client = AsyncAlgodClient(TOKEN, self.address)
+
+        with raises(AlgodHTTPError) as e:
+            asyncio.run(client.application_info(1))
+
+        assert e.value.code == 404
+        assert "not found" in e.value.args[0]
+
+    def test_kmd_keys(self) -> None:
+        client = AsyncKMDClient(TOKEN, self.address)
+
+        async def run() -> tuple[list[dict], list[str]]:
+            wallets = await client.list_wallets()
+            keys = await client.list_keys("handle")
+            await client.close()
+            return wallets, keys
+
+        wallets, keys = asyncio.run(run())
+
+        assert wallets[0]["name"] == "default"
+        assert keys == ["handle"]
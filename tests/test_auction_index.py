@@ -0,0 +1,181 @@
+import asyncio
+from base64 import b64encode
+
+import msgpack
+from algosdk.account import generate_account
+from algosdk.encoding import decode_address
+from algosdk.error import AlgodHTTPError
+from pytest import raises
+
+from util.auction_index import AUCTION_KEY, AUCTION_VALUE, AuctionIndex
+
+APP_ID = 1001
+
+
+class StandInAlgod:
+    """Serves an app's boxes and blocks of app calls changing them."""
+
+    def __init__(self) -> None:
+        self.round = 1
+        self.boxes: dict[bytes, bytes] = {}
+        self.blocks: dict[int, bytes] = {}
+
+    async def status(self) -> dict:
+        return {"last-round": self.round}
+
+    async def status_after_block(self, round_num: int) -> dict:
+        await asyncio.sleep(3600)
+
+    async def application_box_names(self, app_id: int) -> list[bytes]:
+        return list(self.boxes)
+
+    async def application_box_by_name(self, app_id: int, name: bytes) -> dict:
+        if name not in self.boxes:
+            raise AlgodHTTPError("box not found", 404)
+        return {"value": b64encode(self.boxes[name]).decode()}
+
+    async def block_info(self, round_num: int, response_format: str) -> bytes:
+        return self.blocks[round_num]
+
+    def add_block(self, txns: list[dict]) -> None:
+        self.round += 1
+        self.blocks[self.round] = msgpack.packb(
+            {"block": {"rnd": self.round, "txns": [{"txn": txn} for txn in txns]}},
+            use_bin_type=True,
+        )
+
+
+class FlakyAlgod(StandInAlgod):
+    """Fails the first `failures` `status_after_block` calls."""
+
+    def __init__(self, failures: int) -> None:
+        super().__init__()
+        self.failures = failures
+
+    async def status_after_block(self, round_num: int) -> dict:
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionResetError("connection reset")
+        if self.round > round_num:
+            return {"last-round": self.round}
+        return await super().status_after_block(round_num)
+
+
+def _auction(
+    end_timestamp: int, current_price: int, bidder: bytes = bytes(32)
+) -> bytes:
+    return AUCTION_VALUE.encode(end_timestamp, 0, current_price, bidder, 0, 0)
+
+
+class TestAuctionIndex:
+    def setup_method(self) -> None:
+        _, self.seller = generate_account()
+        _, self.bidder = generate_account()
+        self.algod = StandInAlgod()
+        self.keys = [
+            AUCTION_KEY.encode(decode_address(self.seller), asset_id)
+            for asset_id in range(3)
+        ]
+        for asset_id, key in enumerate(self.keys):
+            self.algod.boxes[key] = _auction(100 + asset_id, 10_000 * (asset_id + 1))
+
+    def test_answers_queries(self) -> None:
+        index = self._run(lambda index: None)
+
+        assert [a.asset_id for a in index.ending_before(102)] == [0, 1]
+        assert [a.asset_id for a in index.top_by_current_price(2)] == [2, 1]
+        assert len(index.by_seller(self.seller)) == 3
+
+    def test_applies_block_changes(self) -> None:
+        def place_bid_and_settle(index: AuctionIndex) -> None:
+            self.algod.boxes[self.keys[0]] = _auction(
+                100, 50_000, decode_address(self.bidder)
+            )
+            del self.algod.boxes[self.keys[2]]
+            self.algod.add_block(
+                [
+                    {
+                        "type": "appl",
+                        "apid": APP_ID,
+                        "snd": b"",
+                        "apaa": [b"place_bid", self.keys[0]],
+                    },
+                    {
+                        "type": "appl",
+                        "apid": APP_ID,
+                        "snd": b"",
+                        "apaa": [b"settle", self.keys[2]],
+                    },
+                ]
+            )
+
+        index = self._run(place_bid_and_settle)
+
+        top = index.top_by_current_price(1)[0]
+        assert (top.asset_id, top.current_bidder) == (0, self.bidder)
+        assert [a.asset_id for a in index.ending_before(1000)] == [0, 1]
+
+    def test_restores_checkpoints(self, tmp_path) -> None:
+        path = str(tmp_path / "auctions.json")
+        self._run(lambda index: None).save(path)
+
+        restored = AuctionIndex.load(path, self.algod)
+
+        assert [a.asset_id for a in restored.top_by_current_price(3)] == [2, 1, 0]
+        assert restored.last_round == self.algod.round
+
+    def test_retries_following(self) -> None:
+        self.algod = FlakyAlgod(failures=2)
+        self.algod.boxes = {
+            self.keys[0]: _auction(100, 10_000, decode_address(self.bidder))
+        }
+
+        async def run() -> AuctionIndex:
+            index = AuctionIndex(APP_ID, self.algod, attempts=3, retry_delay=0)
+            await index.start()
+            self.algod.add_block(
+                [
+                    {
+                        "type": "appl",
+                        "apid": APP_ID,
+                        "snd": b"",
+                        "apaa": [b"settle", self.keys[0]],
+                    }
+                ]
+            )
+            del self.algod.boxes[self.keys[0]]
+            while index.last_round < self.algod.round:
+                await asyncio.sleep(0)
+            await index.stop()
+            return index
+
+        index = asyncio.run(run())
+
+        assert index.error is None
+        assert index.top_by_current_price(1) == []
+
+    def test_surfaces_errors_after_giving_up(self) -> None:
+        self.algod = FlakyAlgod(failures=3)
+
+        async def run() -> AuctionIndex:
+            index = AuctionIndex(APP_ID, self.algod, attempts=3, retry_delay=0)
+            await index.start()
+            await index._task
+            return index
+
+        index = asyncio.run(run())
+
+        assert isinstance(index.error, ConnectionResetError)
+        with raises(ConnectionResetError):
+            index.top_by_current_price(1)
+
+    def _run(self, change) -> AuctionIndex:
+        async def run() -> AuctionIndex:
+            index = AuctionIndex(APP_ID, self.algod)
+            await index.bootstrap()
+            change(index)
+            for round_num in range(index.last_round + 1, self.algod.round + 1):
+                await index.process_block(round_num)
+            return index
+
+        return asyncio.run(run())
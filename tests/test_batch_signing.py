@@ -0,0 +1,101 @@
+from base64 import b64decode, b64encode
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from algosdk import encoding
+from algosdk.account import generate_account
+from algosdk.atomic_transaction_composer import (
+    AccountTransactionSigner,
+    AtomicTransactionComposer,
+    AtomicTransactionComposerStatus,
+    TransactionWithSigner,
+)
+from algosdk.transaction import PaymentTxn, SuggestedParams
+
+from util.batch_signing import sign_batch, sign_composers
+
+SP = SuggestedParams(
+    1000, 1, 1001, b64encode(bytes(32)).decode(), "standin-v1", flat_fee=True
+)
+
+
+def _payments(count: int) -> list[tuple[PaymentTxn, str]]:
+    accounts = [generate_account() for _ in range(3)]
+    return [
+        (PaymentTxn(address, SP, address, index + 1), private_key)
+        for index in range(count)
+        for private_key, address in [accounts[index % len(accounts)]]
+    ]
+
+
+def _signed_by_algosdk(items: list[tuple[PaymentTxn, str]]) -> list[bytes]:
+    return [
+        b64decode(encoding.msgpack_encode(txn.sign(private_key)))
+        for txn, private_key in items
+    ]
+
+
+def _rekeyed_payments(count: int) -> list[tuple[PaymentTxn, str]]:
+    """Payments of senders rekeyed to the key signing them."""
+
+    auth_private_key, _ = generate_account()
+    return [
+        (PaymentTxn(address, SP, address, index + 1), auth_private_key)
+        for index in range(count)
+        for _, address in [generate_account()]
+    ]
+
+
+class TestBatchSigning:
+    def test_signs_in_process(self) -> None:
+        items = _payments(10)
+
+        assert sign_batch(items) == _signed_by_algosdk(items)
+
+    def test_signs_across_a_pool(self) -> None:
+        items = _payments(300)
+        encoded = [
+            (b64decode(encoding.msgpack_encode(txn)), private_key)
+            for txn, private_key in items[:5]
+        ]
+
+        with ProcessPoolExecutor(2, mp_context=get_context("spawn")) as pool:
+            assert sign_batch(items, pool) == _signed_by_algosdk(items)
+            assert sign_batch(encoded, pool) == _signed_by_algosdk(items[:5])
+
+    def test_signs_for_rekeyed_senders(self) -> None:
+        items = _rekeyed_payments(3)
+        encoded = [
+            (b64decode(encoding.msgpack_encode(txn)), private_key)
+            for txn, private_key in items
+        ]
+
+        assert sign_batch(items) == _signed_by_algosdk(items)
+        assert sign_batch(encoded) == _signed_by_algosdk(items)
+
+    def test_signs_composers(self) -> None:
+        items = _payments(18) + _rekeyed_payments(2)
+        atcs = []
+        for start in (0, 16):
+            atc = AtomicTransactionComposer()
+            for txn, private_key in items[start : start + 16]:
+                atc.add_transaction(
+                    TransactionWithSigner(txn, AccountTransactionSigner(private_key))
+                )
+            atcs.append(atc)
+
+        sign_composers(atcs)
+
+        for atc in atcs:
+            assert atc.status == AtomicTransactionComposerStatus.SIGNED
+            expected = [
+                b64decode(
+                    encoding.msgpack_encode(
+                        txn_with_signer.txn.sign(txn_with_signer.signer.private_key)
+                    )
+                )
+                for txn_with_signer in atc.txn_list
+            ]
+            assert [
+                b64decode(encoding.msgpack_encode(stxn)) for stxn in atc.signed_txns
+            ] == expected
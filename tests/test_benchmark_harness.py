@@ -0,0 +1,60 @@
+from pytest import raises
+
+from benchmarks.harness import Recorder, compare, percentile, skip_reason, summarize
+
+
+class TestBenchmarkHarness:
+    def test_records_phases(self) -> None:
+        recorder = Recorder()
+
+        for _ in range(3):
+            with recorder.sample():
+                with recorder.phase("build"):
+                    pass
+                with recorder.phase("submit"):
+                    pass
+
+        assert len(recorder.samples) == 3
+        assert set(summarize(recorder.samples)["phases"]) == {"build", "submit"}
+
+    def test_drops_failed_samples(self) -> None:
+        recorder = Recorder()
+
+        with raises(RuntimeError):
+            with recorder.sample():
+                with recorder.phase("build"):
+                    raise RuntimeError()
+        # Outside of any sample.
+        with recorder.phase("build"):
+            pass
+
+        assert recorder.samples == []
+
+    def test_interpolates_percentiles(self) -> None:
+        values = [float(value) for value in range(1, 101)]
+
+        assert percentile(values, 50) == 50.5
+        assert percentile(values, 99) == 99.01
+        assert percentile([], 95) == 0.0
+
+    def test_compares_to_baselines(self) -> None:
+        baseline = {
+            "node": "localnet",
+            "operations": {"op": summarize([{"build": 0.010}] * 10)},
+        }
+        report = {
+            "node": "localnet",
+            "operations": {"op": summarize([{"build": 0.015}] * 10)},
+        }
+
+        assert compare(report, baseline, 0.6) == []
+        assert len(compare(report, baseline, 0.2)) == 2
+
+    def test_refuses_baselines_of_other_nodes(self) -> None:
+        baseline = {"node": "localnet", "operations": {}}
+        report = {"node": "standin", "operations": {}}
+
+        assert skip_reason(report, baseline) is not None
+        assert skip_reason(report, {**baseline, "node": "standin"}) is None
+        with raises(ValueError):
+            compare(report, baseline, 0.2)
@@ -0,0 +1,238 @@
+import asyncio
+from time import time
+
+from algosdk.atomic_transaction_composer import (
+    AtomicTransactionComposer,
+    TransactionWithSigner,
+)
+from algosdk.encoding import decode_address
+from algosdk.transaction import (
+    ApplicationNoOpTxn,
+    ApplicationOptInTxn,
+    AssetCreateTxn,
+    AssetTransferTxn,
+    PaymentTxn,
+    StateSchema,
+)
+
+from util.account import get_account_pool
+from util.app import deploy_app
+from util.auction_index import AUCTION_KEY, Auction, AuctionIndex
+from util.bidding import (
+    COMPETITOR,
+    MINIMUM_BID,
+    BiddingEngine,
+    ChainMarket,
+    SimulatedMarket,
+    simulate,
+)
+from util.client import algod_client, get_suggested_params
+
+AUCTION_MBR_AMOUNT = 147_300
+
+
+class TestBiddingEngine:
+    def setup_method(self) -> None:
+        self.key = b"auction"
+        self.market = SimulatedMarket(
+            {self.key: Auction("SELLER", 1, 0, 0, MINIMUM_BID, None, 0, 0)}, 0.0
+        )
+
+    def test_bids_up_to_the_highest_maximum(self) -> None:
+        engine = BiddingEngine(self.market)
+
+        async def run() -> None:
+            engine.bid("A", self.key, 3 * MINIMUM_BID)
+            engine.bid("B", self.key, 5 * MINIMUM_BID)
+            engine.bid("A", self.key, 4 * MINIMUM_BID)
+            await engine.drain()
+
+        asyncio.run(run())
+        auction = self.market.auctions[self.key]
+
+        assert (auction.current_bidder, auction.current_price) == ("B", 4 * MINIMUM_BID)
+        assert engine.stats.coalesced == 1
+        assert engine.stats.outbid == 1
+        assert engine.stats.failed == 0
+
+    def test_bids_again_when_the_current_bidder_is_outbid(self) -> None:
+        engine = BiddingEngine(self.market)
+
+        async def run() -> None:
+            engine.bid("A", self.key, 5 * MINIMUM_BID)
+            await engine.drain()
+            # Once A's worker is done, a competitor outbids them.
+            await self.market.place_bid(
+                COMPETITOR, self.key, 3 * MINIMUM_BID, self.market.auctions[self.key]
+            )
+            await self.market.refresh([self.key])
+            await engine.drain()
+
+        asyncio.run(run())
+        auction = self.market.auctions[self.key]
+
+        assert (auction.current_bidder, auction.current_price) == ("A", 4 * MINIMUM_BID)
+        assert engine.stats.succeeded == 2
+
+    def test_wastes_fewer_submissions_than_naive_clients(self) -> None:
+        report = simulate(auctions=3, bidders=10, bids_per_bidder=2, contention=0.3)
+
+        assert report["engine"]["succeeded"] > 0
+        assert (
+            report["engine"]["wasted_per_success"]
+            < report["naive"]["wasted_per_success"]
+        )
+
+
+class TestChainMarket:
+    def setup_method(self) -> None:
+        (
+            (self.seller_address, self.seller_signer),
+            (self.first_address, self.first_signer),
+            (self.second_address, self.second_signer),
+        ) = get_account_pool().acquire(3)
+
+        self.app_id, self.app_address = deploy_app(
+            self.seller_signer,
+            "5_auction.teal",
+            "clear.teal",
+            get_suggested_params(),
+            StateSchema(num_uints=2, num_byte_slices=0),
+            StateSchema(num_uints=3, num_byte_slices=0),
+            funding=100_000,
+        )
+
+        atc = AtomicTransactionComposer()
+        for address, signer in (
+            (self.seller_address, self.seller_signer),
+            (self.first_address, self.first_signer),
+            (self.second_address, self.second_signer),
+        ):
+            atc.add_transaction(
+                TransactionWithSigner(
+                    ApplicationOptInTxn(address, get_suggested_params(), self.app_id),
+                    signer,
+                )
+            )
+        atc.add_transaction(
+            TransactionWithSigner(
+                AssetCreateTxn(
+                    self.seller_address,
+                    get_suggested_params(),
+                    total=1,
+                    decimals=0,
+                    default_frozen=False,
+                    unit_name="NFT",
+                    asset_name="Test NFT",
+                ),
+                self.seller_signer,
+            )
+        )
+        tx_id = atc.execute(algod_client, 5).tx_ids[-1]
+        self.asset_id = algod_client.pending_transaction_info(tx_id)["asset-index"]
+
+        self.key = AUCTION_KEY.encode(
+            decode_address(self.seller_address), self.asset_id
+        )
+        sp = get_suggested_params()
+        sp.flat_fee = True
+        sp.fee = sp.min_fee * 2
+        atc = AtomicTransactionComposer()
+        for txn in (
+            PaymentTxn(
+                self.seller_address,
+                get_suggested_params(),
+                self.app_address,
+                AUCTION_MBR_AMOUNT,
+            ),
+            ApplicationNoOpTxn(
+                self.seller_address,
+                sp,
+                self.app_id,
+                app_args=["create_auction", int(time()) + 3600, MINIMUM_BID, 0],
+                foreign_assets=[self.asset_id],
+                boxes=[(self.app_id, self.key)],
+            ),
+            AssetTransferTxn(
+                self.seller_address,
+                get_suggested_params(),
+                self.app_address,
+                1,
+                self.asset_id,
+            ),
+        ):
+            atc.add_transaction(TransactionWithSigner(txn, self.seller_signer))
+        atc.execute(algod_client, 5)
+
+    def teardown_method(self) -> None:
+        get_account_pool().release(
+            self.seller_address, self.first_address, self.second_address
+        )
+
+    def test_places_bids(self) -> None:
+        index = AuctionIndex(self.app_id)
+        market = ChainMarket(
+            index,
+            {
+                self.first_address: self.first_signer,
+                self.second_address: self.second_signer,
+            },
+        )
+        engine = BiddingEngine(market)
+
+        async def run() -> None:
+            await index.bootstrap()
+            await market.start()
+            try:
+                engine.bid(self.first_address, self.key, 3 * MINIMUM_BID)
+                engine.bid(self.second_address, self.key, 5 * MINIMUM_BID)
+                await engine.drain()
+            finally:
+                await market.stop()
+
+        asyncio.run(run())
+        auction = index.auctions[self.key]
+
+        assert auction.current_bidder == self.second_address
+        assert auction.current_price == 4 * MINIMUM_BID
+        assert engine.stats.succeeded == 3
+        assert market.groups_signed == 3
+
+    def test_signs_expired_bids_again(self) -> None:
+        index = AuctionIndex(self.app_id)
+        last_round = algod_client.status()["last-round"]
+        params = []
+
+        def suggested_params():
+            sp = get_suggested_params()
+            if not params:
+                # A window that has passed, as if the bid was signed long ago.
+                sp.first, sp.last = last_round - 2, last_round - 1
+            params.append(sp)
+            return sp
+
+        market = ChainMarket(
+            index,
+            {self.first_address: self.first_signer},
+            suggested_params=suggested_params,
+        )
+
+        async def run() -> bool:
+            await index.bootstrap()
+            await market.start()
+            try:
+                auction = index.auctions[self.key]
+                confirmed = await market.place_bid(
+                    self.first_address,
+                    self.key,
+                    auction.current_price + MINIMUM_BID,
+                    auction,
+                )
+                await market.refresh([self.key])
+                return confirmed
+            finally:
+                await market.stop()
+
+        assert asyncio.run(run())
+        assert market.groups_signed == 2
+        assert index.auctions[self.key].current_bidder == self.first_address
@@ -0,0 +1,54 @@
+from pytest import raises
+
+from util.box_codec import load_codecs, parse_structs
+
+
+class TestBoxCodec:
+    def test_parses_contract_structs(self) -> None:
+        codecs = load_codecs("5_auction.tl")
+
+        assert codecs["AuctionKey"].size == 40
+        assert codecs["AuctionValue"].size == 72
+
+    def test_round_trips(self) -> None:
+        user_info = load_codecs("3_user_profile.tl")["UserInfo"]
+
+        encoded = user_info.encode(
+            birthday=b"10/03/1999", favourite_colour=b"blue", number_of_pets=2
+        )
+
+        assert len(encoded) == 38
+        assert user_info.decode(memoryview(encoded)) == (
+            b"10/03/1999",
+            b"blue" + bytes(16),
+            2,
+        )
+
+    def test_rejects_long_byte_fields(self) -> None:
+        user_info = load_codecs("3_user_profile.tl")["UserInfo"]
+
+        with raises(
+            ValueError, match="UserInfo.birthday is 11 bytes, longer than its 10"
+        ):
+            user_info.encode(
+                birthday=b"10/03/19999", favourite_colour=b"blue", number_of_pets=2
+            )
+
+    def test_decodes_arrays(self) -> None:
+        codec = parse_structs(
+            """
+struct Pair:
+    name: bytes[4]  # Padded.
+    value: int
+end
+"""
+        )["Pair"]
+        buffer = codec.encode(b"a", 1) + codec.encode(b"b", 2)
+
+        array = codec.as_array(buffer)
+
+        assert list(array["value"]) == [1, 2]
+        assert [pair.name for pair in codec.iter_decode(buffer)] == [
+            b"a" + bytes(3),
+            b"b" + bytes(3),
+        ]
@@ -0,0 +1,70 @@
+import numpy
+from algosdk.account import generate_account
+from algosdk.encoding import decode_address, encode_address
+
+from util.async_client import AsyncAlgodClient
+from util.box_codec import load_codecs
+from util.box_export import export_boxes
+from util.standin import start_standin_node
+from util.standin.ledger import App
+
+AUCTION_CODECS = load_codecs("5_auction.tl")
+
+
+class TestBoxExport:
+    def setup_method(self) -> None:
+        self.node = start_standin_node()
+        self.client = AsyncAlgodClient("a" * 64, self.node.address)
+
+        _, self.seller = generate_account()
+        _, self.bidder = generate_account()
+        self.app = App(1001, decode_address(self.seller), b"", b"", (0, 0), (0, 0), 0)
+        self.node.ledger.state.apps[self.app.id] = self.app
+        for asset_id in range(10):
+            key = AUCTION_CODECS["AuctionKey"].encode(
+                decode_address(self.seller), asset_id
+            )
+            self.app.boxes[key] = AUCTION_CODECS["AuctionValue"].encode(
+                1000 + asset_id, 0, asset_id * 10, decode_address(self.bidder), 0, 0
+            )
+
+    def teardown_method(self) -> None:
+        self.node.stop()
+
+    def test_exports_boxes(self) -> None:
+        auctions = export_boxes(
+            self.app.id,
+            AUCTION_CODECS["AuctionValue"],
+            AUCTION_CODECS["AuctionKey"],
+            client=self.client,
+            max_concurrency=4,
+        )
+
+        auctions.sort(order="asset_id")
+        assert list(auctions["asset_id"]) == list(range(10))
+        assert list(auctions["current_price"]) == [i * 10 for i in range(10)]
+        assert encode_address(auctions["current_bidder"][3].tobytes()) == self.bidder
+
+    def test_pages_box_listings(self) -> None:
+        self.node.max_api_box_per_application = 3
+
+        auctions = export_boxes(
+            self.app.id, AUCTION_CODECS["AuctionValue"], client=self.client
+        )
+
+        assert sorted(auctions["end_timestamp"]) == list(range(1000, 1010))
+
+    def test_exports_to_memmapped_files(self, tmp_path) -> None:
+        out_path = str(tmp_path / "auctions.npy")
+
+        export_boxes(
+            self.app.id,
+            AUCTION_CODECS["AuctionValue"],
+            out_path=out_path,
+            client=self.client,
+        )
+
+        auctions = numpy.load(out_path, mmap_mode="r")
+        assert len(auctions) == 10
+        assert auctions["name"].dtype.itemsize == 40
+        assert sorted(auctions["end_timestamp"]) == list(range(1000, 1010))
@@ -0,0 +1,80 @@
+from base64 import b64encode
+
+from algosdk.error import AlgodHTTPError
+from algosdk.transaction import SuggestedParams
+from pytest import raises
+
+from util.client import FeeAwareAlgodClient, SuggestedParamsCache
+
+
+class FakeAlgodClient(FeeAwareAlgodClient):
+    def __init__(self) -> None:
+        super().__init__("", "http://fake:4001")
+        self.round = 100
+        self.min_fee = 1000
+        self.fetches = 0
+        self.rejection = "transaction already in ledger"
+
+    def suggested_params(self) -> SuggestedParams:
+        self.fetches += 1
+        return SuggestedParams(
+            0,
+            self.round,
+            self.round + 1000,
+            b64encode(bytes(32)).decode(),
+            "fake-v1",
+            min_fee=self.min_fee,
+        )
+
+    def algod_request(self, method: str, requrl: str, **kwargs) -> dict:
+        raise AlgodHTTPError(self.rejection, 400)
+
+
+class TestSuggestedParamsCache:
+    def setup_method(self) -> None:
+        self.client = FakeAlgodClient()
+        self.cache = SuggestedParamsCache(self.client, round_window=10)
+
+    def test_refreshes_after_round_window(self) -> None:
+        for _ in range(1200):
+            params = self.cache.get()
+            # Every copy keeps the whole validity window.
+            assert (params.first, params.last) == (100, 1100)
+        assert self.client.fetches == 1
+
+        self.client.round = 109
+        self.cache.observe_round(109)
+        assert self.cache.get().first == 100
+
+        self.client.round = 110
+        self.cache.observe_round(110)
+        assert self.cache.get().first == 110
+        assert self.client.fetches == 2
+
+    def test_hands_out_independent_copies(self) -> None:
+        params = self.cache.get()
+        params.flat_fee = True
+        params.fee = 5000
+
+        params = self.cache.get()
+        assert (params.flat_fee, params.fee) == (False, 0)
+
+    def test_refreshes_after_fee_rejection(self) -> None:
+        self.client.params_cache = self.cache
+        self.cache.get()
+
+        # Other rejections keep the params.
+        with raises(AlgodHTTPError):
+            self.client.send_raw_transaction("")
+        self.cache.get()
+        assert self.client.fetches == 1
+
+        self.client.min_fee = 2000
+        self.client.rejection = (
+            "txgroup had 1000 in fees, which is less than the minimum 1 * 2000"
+        )
+        with raises(AlgodHTTPError):
+            self.client.send_raw_transaction("")
+
+        assert self.cache.get().min_fee == 2000
+        assert self.client.fetches == 2
@@ -0,0 +1,76 @@
+from base64 import b64encode
+from os import listdir, utime
+from pathlib import Path
+
+from util.compile_cache import CompileCache
+
+
+class FakeCompileClient:
+    algod_address = "http://fake:4001"
+
+    def __init__(self) -> None:
+        self.compiled: list[str] = []
+
+    def versions(self) -> dict:
+        return {"build": {"major": 3, "minor": 0, "build_number": 0, "commit_hash": ""}}
+
+    def compile(self, source_code: str) -> dict:
+        self.compiled.append(source_code)
+        return {"result": b64encode(source_code.encode("utf-8")).decode()}
+
+
+class TestCompileCache:
+    def setup_method(self) -> None:
+        self.client = FakeCompileClient()
+
+    def test_hits_memory(self, tmp_path: Path) -> None:
+        cache = CompileCache(str(tmp_path))
+
+        assert cache.compile("int 1", self.client) == b"int 1"
+        assert cache.compile("int 1", self.client) == b"int 1"
+
+        assert self.client.compiled == ["int 1"]
+        assert cache.stats() == {"memory_hits": 1, "disk_hits": 0, "misses": 1}
+
+    def test_hits_disk_in_new_instance(self, tmp_path: Path) -> None:
+        CompileCache(str(tmp_path)).compile("int 1", self.client)
+        cache = CompileCache(str(tmp_path))
+
+        assert cache.compile("int 1", self.client) == b"int 1"
+        assert cache.compile("int 1", self.client) == b"int 1"
+
+        assert self.client.compiled == ["int 1"]
+        assert cache.stats() == {"memory_hits": 1, "disk_hits": 1, "misses": 0}
+
+    def test_evicts_least_recently_used(self, tmp_path: Path) -> None:
+        # Room for two of the 5 byte programs.
+        cache = CompileCache(str(tmp_path), max_disk_bytes=10)
+        for mtime, source_code in enumerate(("int 1", "int 2"), 1):
+            entries = set(listdir(tmp_path))
+            cache.compile(source_code, self.client)
+            # Used in this order, whatever the resolution of the clock.
+            (entry,) = set(listdir(tmp_path)) - entries
+            utime(tmp_path / entry, (mtime, mtime))
+
+        # Reading "int 1" from disk makes "int 2" the least recently used.
+        CompileCache(str(tmp_path)).compile("int 1", self.client)
+        cache.compile("int 3", self.client)
+
+        assert len(listdir(tmp_path)) == 2
+        cache = CompileCache(str(tmp_path))
+        for source_code in ("int 1", "int 2", "int 3"):
+            cache.compile(source_code, self.client)
+        assert cache.stats() == {"memory_hits": 0, "disk_hits": 2, "misses": 1}
+        assert self.client.compiled == ["int 1", "int 2", "int 3", "int 2"]
+
+    def test_leaves_entries_being_written(self, tmp_path: Path) -> None:
+        # As written by another process, over `max_disk_bytes` on its own.
+        (tmp_path / ".partial.tmp").write_bytes(b"x" * 20)
+        cache = CompileCache(str(tmp_path), max_disk_bytes=10)
+
+        cache.compile("int 1", self.client)
+
+        assert sorted(listdir(tmp_path))[0] == ".partial.tmp"
+        assert len(listdir(tmp_path)) == 2
+        assert CompileCache(str(tmp_path)).compile("int 1", self.client) == b"int 1"
+        assert self.client.compiled == ["int 1"]
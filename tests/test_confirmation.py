@@ -0,0 +1,142 @@
+import asyncio
+from base64 import b64decode, b64encode
+
+import msgpack
+from algosdk import encoding
+from algosdk.account import generate_account
+from algosdk.transaction import PaymentTxn, SuggestedParams
+from pytest import raises
+
+from util.confirmation import ConfirmationWaiter, TransactionExpiredError
+
+GENESIS_ID = "localnet-v1"
+GENESIS_HASH = bytes(32)
+
+
+class StandInAlgod:
+    """Produces one block per `status_after_block` call from queued txns."""
+
+    def __init__(self) -> None:
+        self.round = 1
+        self.blocks: dict[int, bytes] = {}
+        self.queued: list[dict] = []
+
+    async def status(self) -> dict:
+        return {"last-round": self.round}
+
+    async def status_after_block(self, round_num: int) -> dict:
+        await asyncio.sleep(0)
+        self.round += 1
+        self.blocks[self.round] = msgpack.packb(
+            {
+                "block": {
+                    "gen": GENESIS_ID,
+                    "gh": GENESIS_HASH,
+                    "rnd": self.round,
+                    "txns": self.queued,
+                }
+            },
+            use_bin_type=True,
+        )
+        self.queued = []
+        return {"last-round": self.round}
+
+    async def block_info(self, round_num: int, response_format: str) -> bytes:
+        return self.blocks[round_num]
+
+    def submit(self, stxn) -> None:
+        stxn_in_block = msgpack.unpackb(b64decode(encoding.msgpack_encode(stxn)))
+        del stxn_in_block["txn"]["gen"]
+        del stxn_in_block["txn"]["gh"]
+        stxn_in_block["hgi"] = True
+        self.queued.append(stxn_in_block)
+
+
+class FlakyAlgod(StandInAlgod):
+    """Drops the connection of the first `failures` calls to `status_after_block`."""
+
+    def __init__(self, failures: int) -> None:
+        super().__init__()
+        self.failures = failures
+
+    async def status_after_block(self, round_num: int) -> dict:
+        if self.failures > 0:
+            self.failures -= 1
+            raise ConnectionResetError("Connection reset by peer")
+        return await super().status_after_block(round_num)
+
+
+class TestConfirmationWaiter:
+    def setup_method(self) -> None:
+        self.private, self.address = generate_account()
+        self.sp = SuggestedParams(
+            0, 1, 10, b64encode(GENESIS_HASH).decode(), GENESIS_ID, min_fee=1000
+        )
+
+    def test_confirms_transactions(self) -> None:
+        algod = StandInAlgod()
+        txns = [
+            PaymentTxn(self.address, self.sp, self.address, amount)
+            for amount in range(20)
+        ]
+
+        async def run() -> list[int]:
+            waiter = ConfirmationWaiter(algod)
+            await waiter.start()
+            futures = waiter.wait([txn.get_txid() for txn in txns], self.sp.last)
+            for txn in txns:
+                algod.submit(txn.sign(self.private))
+            rounds = await futures
+            await waiter.stop()
+            return rounds
+
+        assert asyncio.run(run()) == [2] * len(txns)
+
+    def test_expires_transactions(self) -> None:
+        algod = StandInAlgod()
+        txn = PaymentTxn(self.address, self.sp, self.address, 0)
+
+        async def run() -> None:
+            waiter = ConfirmationWaiter(algod)
+            await waiter.start()
+            try:
+                await waiter.register(txn.get_txid(), 3)
+            finally:
+                await waiter.stop()
+
+        with raises(TransactionExpiredError):
+            asyncio.run(run())
+
+    def test_retries_failed_requests(self) -> None:
+        algod = FlakyAlgod(failures=2)
+        txn = PaymentTxn(self.address, self.sp, self.address, 0)
+
+        async def run() -> int:
+            waiter = ConfirmationWaiter(algod, attempts=3, retry_delay=0)
+            await waiter.start()
+            future = waiter.register(txn.get_txid(), self.sp.last)
+            algod.submit(txn.sign(self.private))
+            try:
+                return await future
+            finally:
+                await waiter.stop()
+
+        assert asyncio.run(run()) == 2
+
+    def test_fails_pending_transactions_when_giving_up(self) -> None:
+        algod = FlakyAlgod(failures=3)
+        txn = PaymentTxn(self.address, self.sp, self.address, 0)
+
+        async def run() -> None:
+            waiter = ConfirmationWaiter(algod, attempts=3, retry_delay=0)
+            await waiter.start()
+            try:
+                with raises(ConnectionResetError):
+                    await waiter.register(txn.get_txid(), self.sp.last)
+                # Later registrations fail straight away.
+                with raises(ConnectionResetError):
+                    await waiter.register(txn.get_txid(), self.sp.last)
+            finally:
+                await waiter.stop()
+
+        asyncio.run(run())
@@ -0,0 +1,61 @@
+from os import path, remove
+from pathlib import Path
+from shutil import copy
+
+from pytest import raises
+from tealish import compile_program
+
+from util.box_codec import CONTRACTS_PATH_PREFIX
+from util.contract_build import ContractBuilder
+
+
+class TestContractBuilder:
+    def setup_method(self) -> None:
+        self.sources = Path(CONTRACTS_PATH_PREFIX, "answers")
+
+    def _builder(self, tmp_path: Path, processes: int = 1) -> ContractBuilder:
+        source_dir = tmp_path / "contracts"
+        source_dir.mkdir(exist_ok=True)
+        for name in ("1_hello_world.tl", "2_counter.tl"):
+            if not (source_dir / name).exists():
+                copy(self.sources / name, source_dir)
+        return ContractBuilder(
+            str(source_dir), str(tmp_path / "contracts" / "build"), processes
+        )
+
+    def test_only_compiles_stale_contracts(self, tmp_path: Path) -> None:
+        builder = self._builder(tmp_path)
+        build_dir = Path(builder.build_dir)
+
+        assert builder.ensure_built() == ["1_hello_world", "2_counter"]
+        teal, _ = compile_program((self.sources / "2_counter.tl").read_text())
+        assert (build_dir / "2_counter.teal").read_text() == "\n".join(teal + [""])
+        assert builder.ensure_built(["2_counter.teal"]) == []
+
+        # Edited sources and missing builds are compiled again, also by other
+        # processes.
+        counter = Path(builder.source_dir, "2_counter.tl")
+        counter.write_text(counter.read_text() + "\n")
+        remove(build_dir / "1_hello_world.teal")
+        assert self._builder(tmp_path).ensure_built() == [
+            "1_hello_world",
+            "2_counter",
+        ]
+        assert builder.ensure_built() == []
+        # Sources without changes, touched or not, are not compiled again.
+        counter.write_text(counter.read_text())
+        assert builder.ensure_built() == []
+        assert builder.compiled == ["1_hello_world", "2_counter"]
+
+    def test_compiles_across_processes(self, tmp_path: Path) -> None:
+        builder = self._builder(tmp_path, processes=2)
+
+        assert builder.ensure_built() == ["1_hello_world", "2_counter"]
+        assert path.exists(path.join(builder.build_dir, "1_hello_world.teal"))
+
+    def test_reports_compile_errors(self, tmp_path: Path) -> None:
+        builder = self._builder(tmp_path)
+        Path(builder.source_dir, "2_counter.tl").write_text("block main:\n")
+
+        with raises(ValueError, match="2_counter.tl"):
+            builder.ensure_built(["2_counter.teal"])
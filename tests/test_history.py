@@ -0,0 +1,80 @@
+from base64 import b64encode
+
+from util.history import AppHistory, HistoryCheckpoint, decode_log
+
+APP_ID = 1001
+
+
+def _app_call(index: int) -> dict:
+    return {
+        "id": "TX{}".format(index),
+        "confirmed-round": index,
+        "round-time": 1_000 + index,
+        "tx-type": "appl",
+        "sender": "SENDER",
+        "application-transaction": {
+            "application-id": APP_ID,
+            "on-completion": "noop",
+            "application-args": [b64encode(b"create_ticket").decode()],
+        },
+        "logs": [b64encode((2_000 + index).to_bytes(8, "big")).decode()],
+        "inner-txns": [
+            {"tx-type": "acfg", "sender": "APP", "created-asset-index": 2_000 + index}
+        ],
+    }
+
+
+class StandInIndexer:
+    """Serves `count` app calls, `limit` (up to `max_limit`) per page."""
+
+    def __init__(self, count: int, max_limit: int = 1000) -> None:
+        self.txns = [_app_call(index) for index in range(count)]
+        self.max_limit = max_limit
+        self.requested_pages: list[str | None] = []
+
+    def search_transactions(
+        self, application_id, min_round, max_round, limit, next_page
+    ):
+        self.requested_pages.append(next_page)
+        start = int(next_page or 0)
+        limit = min(limit, self.max_limit)
+        response = {"transactions": self.txns[start : start + limit]}
+        if response["transactions"]:
+            response["next-token"] = str(start + limit)
+        return response
+
+
+class TestAppHistory:
+    def test_streams_calls_and_inner_transactions(self) -> None:
+        indexer = StandInIndexer(5)
+
+        txns = list(AppHistory(APP_ID, client=indexer, page_size=2))
+
+        assert [txn.type for txn in txns] == ["appl", "acfg"] * 5
+        assert [decode_log(txn.logs[0]) for txn in txns[::2]] == [
+            txn.created_asset_id for txn in txns[1::2]
+        ]
+        assert txns[1].parent_tx_id == "TX0"
+        assert txns[1].round == 0
+        assert indexer.requested_pages == [None, "2", "4", "6"]
+
+    def test_pages_past_capped_limits(self) -> None:
+        indexer = StandInIndexer(5, max_limit=2)
+
+        txns = list(AppHistory(APP_ID, client=indexer, page_size=3))
+
+        assert [txn.tx_id for txn in txns if txn.tx_id] == [
+            "TX{}".format(index) for index in range(5)
+        ]
+
+    def test_resumes_from_checkpoints(self) -> None:
+        indexer = StandInIndexer(5)
+        history = AppHistory(APP_ID, client=indexer, page_size=2)
+
+        for txn in history:
+            if txn.tx_id == "TX2":
+                break
+        checkpoint = HistoryCheckpoint(**history.checkpoint._asdict())
+
+        resumed = AppHistory(APP_ID, checkpoint=checkpoint, client=indexer, page_size=2)
+        assert [txn.tx_id for txn in resumed if txn.tx_id] == ["TX2", "TX3", "TX4"]
@@ -0,0 +1,67 @@
+from algosdk.account import generate_account
+from algosdk.error import AlgodHTTPError
+from algosdk.kmd import KMDClient
+from algosdk.transaction import PaymentTxn
+from algosdk.v2client.algod import AlgodClient
+from pytest import raises
+
+from util.instrumentation import EndpointStats, RequestProfile, profile_requests
+from util.standin import start_standin_node
+
+TOKEN = "a" * 64
+
+
+class TestProfileRequests:
+    def setup_method(self) -> None:
+        self.node = start_standin_node()
+        self.algod = AlgodClient(TOKEN, self.node.address)
+        self.kmd = KMDClient(TOKEN, self.node.address)
+
+    def teardown_method(self) -> None:
+        self.node.stop()
+
+    def test_records_requests_per_client_method(self) -> None:
+        wallet_id = self.kmd.list_wallets()[0]["id"]
+        handle = self.kmd.init_wallet_handle(wallet_id, "")
+        sender = self.kmd.list_keys(handle)[0]
+        private_key = self.kmd.export_key(handle, "", sender)
+        _, receiver = generate_account()
+
+        with profile_requests(self.algod, self.kmd) as profile:
+            sp = self.algod.suggested_params()
+            signed_txn = PaymentTxn(sender, sp, receiver, 200_000).sign(private_key)
+            self.algod.send_transaction(signed_txn)
+            self.kmd.list_wallets()
+            with raises(AlgodHTTPError):
+                self.algod.application_info(123)
+        # Not recorded outside of the block.
+        self.algod.status()
+
+        report = profile.as_dict()
+        assert set(report) == {
+            "algod suggested_params",
+            "algod send_transaction",
+            "algod application_info",
+            "kmd list_wallets",
+        }
+        assert report["algod suggested_params"]["calls"] == 1
+        assert report["algod send_transaction"]["request_bytes"] > 0
+        assert report["algod application_info"]["errors"] == 1
+        assert len(profile.format()) == 4
+
+
+def test_merges_reports() -> None:
+    profile = RequestProfile()
+    profile.record("algod status", 0.003, 0, 100, False)
+
+    worker_profile = RequestProfile()
+    worker_profile.record("algod status", 0.030, 0, 100, True)
+    worker_profile.record("kmd list_keys", 0.001, 10, 50, False)
+    profile.merge(worker_profile.as_dict())
+
+    status = profile.endpoints["algod status"]
+    assert (status.calls, status.errors, status.response_bytes) == (2, 1, 200)
+    assert status.percentile_ms(50) == 5
+    assert status.percentile_ms(95) == 50
+    assert profile.endpoints["kmd list_keys"].calls == 1
+    assert EndpointStats().percentile_ms(50) == 0.0
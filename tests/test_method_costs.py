@@ -0,0 +1,45 @@
+from benchmarks.method_costs import (
+    BASELINE_NODE,
+    DEFAULT_TOLERANCE,
+    compare_costs,
+    load_baseline,
+    measure_costs,
+)
+from benchmarks.operations import METHOD_CALLS
+
+
+def test_methods_within_baseline() -> None:
+    """
+    Fails when a contract change makes a method more expensive; rerun
+    `python -m benchmarks.method_costs --update` if the change is intended.
+    """
+
+    baseline = load_baseline()
+    # Measured on a stand-in node of their own, whatever ALGORAND_NODE is.
+    report = measure_costs(list(METHOD_CALLS))
+
+    assert baseline["node"] == BASELINE_NODE
+    assert compare_costs(report, baseline["methods"], DEFAULT_TOLERANCE) == []
+
+
+def test_compares_to_baselines() -> None:
+    baseline = {"app.method": {"opcode_cost": 100, "inner_txns": 1}}
+
+    assert (
+        compare_costs(
+            {"app.method": {"opcode_cost": 104, "inner_txns": 0}}, baseline, 0.05
+        )
+        == []
+    )
+    assert compare_costs(
+        {
+            "app.method": {"opcode_cost": 106, "inner_txns": 2},
+            "app.other": {"opcode_cost": 1},
+        },
+        baseline,
+        0.05,
+    ) == [
+        "app.method opcode_cost: 100 -> 106",
+        "app.method inner_txns: 1 -> 2",
+        "app.other: not in the baseline",
+    ]
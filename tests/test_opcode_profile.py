@@ -0,0 +1,89 @@
+from copy import copy
+
+from algosdk.atomic_transaction_composer import (
+    AtomicTransactionComposer,
+    TransactionWithSigner,
+)
+from pytest import raises
+
+from benchmarks.operations import METHOD_CALLS, MINIMUM_BID
+from util.client import algod_client
+from util.opcode_profile import (
+    OpcodeProfile,
+    TraceStep,
+    build_source_map,
+    profile_group,
+)
+
+
+def _composer(txns: list[TransactionWithSigner]) -> AtomicTransactionComposer:
+    atc = AtomicTransactionComposer()
+    for txn in txns:
+        atc.add_transaction(txn)
+    return atc
+
+
+class TestOpcodeProfile:
+    def setup_method(self) -> None:
+        self.source_map = build_source_map("5_auction.tl")
+
+    def _line(self, source: str) -> int:
+        return self.source_map.source_lines.index(source) + 1
+
+    def test_maps_costs_to_tealish_lines(self) -> None:
+        call = METHOD_CALLS["auction.place_bid"]()
+        _composer(call.txns).execute(algod_client, 5)
+
+        # Outbidding the first bid refunds it through `pay_user`.
+        txns = []
+        for txn_with_signer in call.txns:
+            txn = copy(txn_with_signer.txn)
+            txn.group = None
+            txns.append(TransactionWithSigner(txn, txn_with_signer.signer))
+        txns[0].txn.amt = MINIMUM_BID * 3
+        profile = profile_group(_composer(txns).gather_signatures(), self.source_map)
+
+        refund_line = self._line(
+            "            pay_user(auction.current_bidder, auction.current_price)"
+        )
+        assert profile.calls == 1
+        assert profile.cost == sum(profile.line_costs.values())
+        assert profile.line_costs[refund_line] > 0
+        assert profile.block_costs()["block main > block place_bid"] < profile.cost
+
+        # The function's lines are nested under the line calling it.
+        assert any(
+            line.startswith(
+                "5_auction.tl;block main;block place_bid;5_auction.tl:{} ".format(
+                    refund_line
+                )
+            )
+            and ";func pay_user;" in line
+            for line in profile.folded()
+        )
+        assert sum(int(line.rsplit(" ", 1)[1]) for line in profile.folded()) == (
+            profile.cost
+        )
+
+        heat_report = profile.heat_report()
+        assert heat_report[0] == "5_auction.tl: opcode cost {} in 1 call(s)".format(
+            profile.cost
+        )
+        # A header, then one line per source line.
+        assert heat_report[2 + refund_line].split()[0] == str(
+            profile.line_costs[refund_line]
+        )
+
+    def test_marks_estimated_costs(self) -> None:
+        # As profiled from a dryrun trace on localnet.
+        profile = OpcodeProfile(self.source_map, estimated_costs=True)
+        profile.add([TraceStep(1, "sha256", 35)])
+
+        assert profile.heat_report()[1].startswith("Costs are estimates")
+        assert profile.as_dict()["estimated_costs"]
+
+    def test_rejects_groups_not_running_the_program(self) -> None:
+        call = METHOD_CALLS["counter.increment_counter"]()
+
+        with raises(ValueError):
+            profile_group(_composer(call.txns).gather_signatures(), self.source_map)
@@ -0,0 +1,235 @@
+from base64 import b64decode
+
+from algosdk.account import generate_account
+from algosdk.atomic_transaction_composer import (
+    AccountTransactionSigner,
+    AtomicTransactionComposer,
+    TransactionWithSigner,
+)
+from algosdk.error import AlgodHTTPError
+from algosdk.kmd import KMDClient
+from algosdk.logic import get_application_address
+from algosdk.transaction import (
+    ApplicationCallTxn,
+    ApplicationCreateTxn,
+    OnComplete,
+    PaymentTxn,
+    StateSchema,
+    assign_group_id,
+    wait_for_confirmation,
+)
+from algosdk.v2client.algod import AlgodClient
+from pytest import raises
+
+from util.standin import start_standin_node
+from util.standin.avm import LogicError, Program, evaluate
+from util.state_decode import UINT, StateDecoder
+
+TOKEN = "a" * 64
+
+APPROVAL = """#pragma version 8
+txn ApplicationID
+bz create
+txna ApplicationArgs 0
+pushbytes "box"
+==
+bnz put_box
+pushbytes "counter" // key
+dup
+app_global_get
+pushint 1
++
+app_global_put
+pushint 1
+return
+put_box:
+pushbytes "b"
+txna ApplicationArgs 1
+box_put
+pushint 1
+return
+create:
+pushint 1
+return
+"""
+
+CLEAR = """#pragma version 8
+pushint 1
+"""
+
+GLOBAL_STATE = StateDecoder({"counter": UINT})
+
+HASHES = """#pragma version 8
+pushbytes "x"
+sha256
+keccak256
+len
+"""
+
+
+class BudgetContext:
+    def __init__(self, opcode_budget: int) -> None:
+        self.opcode_budget = opcode_budget
+
+
+class TestEvaluate:
+    def test_charges_opcode_costs(self) -> None:
+        context = BudgetContext(700)
+        trace: list[tuple[int, str, int]] = []
+
+        assert evaluate(Program(HASHES), context, trace)
+
+        assert [cost for _, _, cost in trace] == [1, 35, 130, 1]
+        assert context.opcode_budget == 700 - 167
+
+    def test_rejects_programs_over_budget(self) -> None:
+        with raises(LogicError, match="budget exceeded, line 4"):
+            evaluate(Program(HASHES), BudgetContext(100))
+
+
+class TestStandInNode:
+    def setup_method(self) -> None:
+        self.node = start_standin_node()
+        self.algod = AlgodClient(TOKEN, self.node.address)
+        kmd = KMDClient(TOKEN, self.node.address)
+
+        wallet_id = kmd.list_wallets()[0]["id"]
+        handle = kmd.init_wallet_handle(wallet_id, "")
+        self.address = kmd.list_keys(handle)[0]
+        self.signer = AccountTransactionSigner(kmd.export_key(handle, "", self.address))
+
+    def teardown_method(self) -> None:
+        self.node.stop()
+
+    def test_pays(self) -> None:
+        _, receiver = generate_account()
+        self._execute(
+            PaymentTxn(self.address, self.algod.suggested_params(), receiver, 200_000)
+        )
+
+        assert self.algod.account_info(receiver)["amount"] == 200_000
+        assert self.algod.status()["last-round"] == 1
+
+    def test_rejects_payments_below_min_balance(self) -> None:
+        _, receiver = generate_account()
+
+        with raises(AlgodHTTPError, match="below min"):
+            self._execute(
+                PaymentTxn(self.address, self.algod.suggested_params(), receiver, 1)
+            )
+        assert self.algod.account_info(receiver)["amount"] == 0
+
+    def test_runs_programs(self) -> None:
+        sp = self.algod.suggested_params()
+        app_id = self._execute(
+            ApplicationCreateTxn(
+                self.address,
+                sp,
+                OnComplete.NoOpOC,
+                self._compile(APPROVAL),
+                self._compile(CLEAR),
+                StateSchema(num_uints=1, num_byte_slices=0),
+                StateSchema(num_uints=0, num_byte_slices=0),
+            )
+        )["application-index"]
+
+        self._execute(
+            PaymentTxn(self.address, sp, get_application_address(app_id), 200_000),
+            ApplicationCallTxn(
+                self.address, sp, app_id, OnComplete.NoOpOC, app_args=["box", "value"]
+            ),
+        )
+        self._execute(
+            ApplicationCallTxn(
+                self.address, sp, app_id, OnComplete.NoOpOC, app_args=["x"]
+            )
+        )
+
+        global_state = GLOBAL_STATE.decode(
+            self.algod.application_info(app_id)["params"]["global-state"]
+        )
+        assert global_state.counter == 1
+        box = self.algod.application_box_by_name(app_id, b"b")
+        assert b64decode(box["value"]) == b"value"
+
+    def test_rolls_back_rejected_groups(self) -> None:
+        sp = self.algod.suggested_params()
+        app_id = self._create_app()
+        _, receiver = generate_account()
+
+        # The last payment leaves `receiver` below the minimum balance.
+        with raises(AlgodHTTPError, match="below min"):
+            self._execute(
+                ApplicationCallTxn(
+                    self.address,
+                    sp,
+                    app_id,
+                    OnComplete.NoOpOC,
+                    app_args=["box", "value"],
+                ),
+                ApplicationCallTxn(
+                    self.address, sp, app_id, OnComplete.NoOpOC, app_args=["x"]
+                ),
+                PaymentTxn(self.address, sp, receiver, 1),
+            )
+
+        app_info = self.algod.application_info(app_id)
+        assert "global-state" not in app_info["params"]
+        assert self.algod.application_boxes(app_id)["boxes"] == []
+        assert self.algod.account_info(receiver)["amount"] == 0
+
+        self._execute(
+            ApplicationCallTxn(
+                self.address, sp, app_id, OnComplete.NoOpOC, app_args=["x"]
+            ),
+            PaymentTxn(self.address, sp, receiver, 100_000),
+        )
+        global_state = GLOBAL_STATE.decode(
+            self.algod.application_info(app_id)["params"]["global-state"]
+        )
+        assert global_state.counter == 1
+
+    def test_rejects_incomplete_groups(self) -> None:
+        sp = self.algod.suggested_params()
+        _, receiver = generate_account()
+        txns = [PaymentTxn(self.address, sp, receiver, 100_000 + i) for i in range(3)]
+
+        with raises(AlgodHTTPError, match="had zero Group"):
+            self.algod.send_transactions(
+                [self.signer.sign_transactions([txn], [0])[0] for txn in txns]
+            )
+
+        assign_group_id(txns)
+        with raises(AlgodHTTPError, match="incomplete group"):
+            self.algod.send_transactions(
+                [self.signer.sign_transactions([txn], [0])[0] for txn in txns[:2]]
+            )
+        assert self.algod.account_info(receiver)["amount"] == 0
+
+    def _create_app(self) -> int:
+        sp = self.algod.suggested_params()
+        app_id = self._execute(
+            ApplicationCreateTxn(
+                self.address,
+                sp,
+                OnComplete.NoOpOC,
+                self._compile(APPROVAL),
+                self._compile(CLEAR),
+                StateSchema(num_uints=1, num_byte_slices=0),
+                StateSchema(num_uints=0, num_byte_slices=0),
+            )
+        )["application-index"]
+        self._execute(
+            PaymentTxn(self.address, sp, get_application_address(app_id), 200_000)
+        )
+        return app_id
+
+    def _compile(self, source: str) -> bytes:
+        return b64decode(self.algod.compile(source)["result"])
+
+    def _execute(self, *txns) -> dict:
+        atc = AtomicTransactionComposer()
+        for txn in txns:
+            atc.add_transaction(TransactionWithSigner(txn, self.signer))
+        tx_id = atc.execute(self.algod, 5).tx_ids[-1]
+        return wait_for_confirmation(self.algod, tx_id)
@@ -0,0 +1,67 @@
+from base64 import b64encode
+
+from algosdk.account import generate_account
+from algosdk.encoding import decode_address
+from pytest import raises
+
+from util.state_decode import ADDRESS, STR, UINT, StateDecoder, decode_state
+
+
+def _bytes_value(key: bytes, value: bytes) -> dict:
+    return {
+        "key": b64encode(key).decode(),
+        "value": {"type": 1, "bytes": b64encode(value).decode(), "uint": 0},
+    }
+
+
+def _uint_value(key: bytes, value: int) -> dict:
+    return {
+        "key": b64encode(key).decode(),
+        "value": {"type": 2, "bytes": "", "uint": value},
+    }
+
+
+class TestStateDecoder:
+    def setup_method(self) -> None:
+        _, self.address = generate_account()
+        self.state = [
+            _bytes_value(b"manager", decode_address(self.address)),
+            _uint_value(b"ticket_price", 1000),
+            _bytes_value(b"status", b"active"),
+            _bytes_value(b"\xff\x00", b"\xff"),
+        ]
+
+    def test_decodes_declared_keys(self) -> None:
+        decoder = StateDecoder(
+            {"manager": ADDRESS, "ticket_price": UINT, "status": STR, "users": UINT}
+        )
+
+        state = decoder.decode(self.state)
+
+        assert state.manager == self.address
+        assert state.ticket_price == 1000
+        assert state.status == "active"
+        assert state.users is None
+        assert not hasattr(state, "__dict__")
+
+    def test_decodes_many(self) -> None:
+        decoder = StateDecoder({"ticket_price": UINT})
+
+        states = decoder.decode_many(
+            [self.state, [], [_uint_value(b"ticket_price", 5)]]
+        )
+
+        assert [state.ticket_price for state in states] == [1000, None, 5]
+
+    def test_rejects_mismatched_types(self) -> None:
+        decoder = StateDecoder({"ticket_price": STR})
+
+        with raises(ValueError):
+            decoder.decode(self.state)
+
+    def test_decode_state_falls_back_to_hex(self) -> None:
+        assert decode_state(self.state[1:]) == {
+            "ticket_price": 1000,
+            "status": "active",
+            "ff00": "ff",
+        }
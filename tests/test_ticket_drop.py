@@ -0,0 +1,100 @@
+import asyncio
+
+from pytest import MonkeyPatch
+
+from benchmarks import ticket_drop
+from benchmarks.ticket_drop import (
+    group_resigner,
+    presign_groups,
+    rejection_reason,
+    setup_drop,
+    submit_groups,
+    summarize_load,
+    ticket_balances,
+)
+from util.client import algod_client, get_suggested_params
+
+
+class TestTicketDrop:
+    def test_sells_out(self) -> None:
+        drop = setup_drop(buyers=4, supply=3)
+        groups = presign_groups(drop, get_suggested_params())
+
+        async def run():
+            outcomes = await submit_groups(groups, rate=0, concurrency=2)
+            return outcomes, await ticket_balances(drop)
+
+        try:
+            outcomes, balances = asyncio.run(run())
+        finally:
+            drop.buyer_pool.close()
+        summary = summarize_load(outcomes)
+
+        assert summary["confirmed"] == 3
+        assert sum(summary["rejected"].values()) == 1
+        assert summary["tps"] > 0
+        assert balances == {
+            "sold": 3,
+            "unsold": 0,
+            "buyers_by_tickets_held": {"0": 1, "1": 3},
+        }
+        # Only the buyers' minimum balances are left behind.
+        for address, _ in drop.buyers:
+            account_info = algod_client.account_info(address)
+            assert account_info["amount"] == account_info["min-balance"]
+
+    def test_resigns_expiring_groups(self) -> None:
+        drop = setup_drop(buyers=2)
+        sp = get_suggested_params()
+        # As if the drop's first groups had used up most of the window.
+        sp.last = algod_client.status()["last-round"] + 10
+        groups = presign_groups(drop, sp)
+
+        try:
+            outcomes = asyncio.run(
+                submit_groups(
+                    groups, rate=0, concurrency=2, resign=group_resigner(drop)
+                )
+            )
+        finally:
+            drop.buyer_pool.close()
+        summary = summarize_load(outcomes)
+
+        assert summary["confirmed"] == 2
+        assert summary["resigned"] == 2
+
+    def test_resigns_groups_rejected_as_expired(self) -> None:
+        drop = setup_drop(buyers=2)
+        sp = get_suggested_params()
+        # Already expired, as if the waiter lagged behind the node.
+        last_round = algod_client.status()["last-round"]
+        sp.first, sp.last = last_round - 2, last_round - 1
+        groups = presign_groups(drop, sp)
+        monkeypatch = MonkeyPatch()
+        monkeypatch.setattr(ticket_drop, "RESIGN_MARGIN", -(10**6))
+
+        try:
+            outcomes = asyncio.run(
+                submit_groups(
+                    groups, rate=0, concurrency=2, resign=group_resigner(drop)
+                )
+            )
+        finally:
+            monkeypatch.undo()
+            drop.buyer_pool.close()
+        summary = summarize_load(outcomes)
+
+        assert summary["confirmed"] == 2
+        assert summary["resigned"] == 2
+
+
+def test_groups_rejection_reasons() -> None:
+    tx_id = "A" * 52
+    address = "B" * 58
+
+    assert (
+        rejection_reason(
+            "transaction {}: overspend (account {})".format(tx_id, address)
+        )
+        == "transaction <id>: overspend (account <id>)"
+    )
@@ -0,0 +1,107 @@
+from base64 import b64decode, b64encode
+
+from algosdk import encoding
+from algosdk.account import generate_account
+from algosdk.transaction import (
+    ApplicationNoOpTxn,
+    AssetOptInTxn,
+    PaymentTxn,
+    SuggestedParams,
+    assign_group_id,
+)
+from pytest import raises
+
+from util.txn_template import GroupTemplate
+
+GENESIS_HASH = b64encode(bytes(range(32))).decode()
+APP_ID = 1001
+ASSET_ID = 2002
+
+
+def _buy_ticket(
+    buyer: str, receiver: str, amount: int, app_args: list, first_valid: int
+) -> list:
+    sp = SuggestedParams(
+        1000, first_valid, first_valid + 1000, GENESIS_HASH, "standin-v1", True
+    )
+    call_sp = SuggestedParams(
+        4000, first_valid, first_valid + 1000, GENESIS_HASH, "standin-v1", True
+    )
+    return [
+        AssetOptInTxn(buyer, sp, ASSET_ID),
+        PaymentTxn(buyer, sp, receiver, amount),
+        ApplicationNoOpTxn(
+            buyer, call_sp, APP_ID, app_args=app_args, foreign_assets=[ASSET_ID]
+        ),
+    ]
+
+
+class TestGroupTemplate:
+    def setup_method(self) -> None:
+        _, example = generate_account()
+        each_txn = {"sender": "buyer", "first_valid": "first", "last_valid": "last"}
+        self.template = GroupTemplate(
+            _buy_ticket(example, example, 1, ["buy_ticket", 1], 1),
+            [
+                {**each_txn, "receiver": "buyer"},
+                {**each_txn, "receiver": "receiver", "amount": "amount"},
+                {**each_txn, "app_args": "args"},
+            ],
+        )
+
+    def test_matches_algosdk(self) -> None:
+        for amount, app_args, first_valid in (
+            (3_000, ["buy_ticket", 3], 10),
+            # Zero values are left out.
+            (0, [], 0),
+            (2**40, ["x" * 300, 2**63], 70_000),
+        ):
+            private_key, buyer = generate_account()
+            _, receiver = generate_account()
+            txns = assign_group_id(
+                _buy_ticket(buyer, receiver, amount, app_args, first_valid)
+            )
+
+            signed = self.template.sign(
+                private_key,
+                buyer=buyer,
+                receiver=receiver,
+                amount=amount,
+                args=app_args,
+                first=first_valid,
+                last=first_valid + 1000,
+            )
+
+            assert signed.encoded == b"".join(
+                b64decode(encoding.msgpack_encode(txn.sign(private_key)))
+                for txn in txns
+            )
+            assert signed.tx_ids == [txn.get_txid() for txn in txns]
+
+    def test_signs_for_rekeyed_senders(self) -> None:
+        _, buyer = generate_account()
+        auth_private_key, _ = generate_account()
+        txns = assign_group_id(_buy_ticket(buyer, buyer, 3_000, ["buy_ticket"], 10))
+
+        signed = self.template.sign(
+            auth_private_key,
+            buyer=buyer,
+            receiver=buyer,
+            amount=3_000,
+            args=["buy_ticket"],
+            first=10,
+            last=1010,
+        )
+
+        assert signed.encoded == b"".join(
+            b64decode(encoding.msgpack_encode(txn.sign(auth_private_key)))
+            for txn in txns
+        )
+
+    def test_rejects_fields_missing_from_the_type(self) -> None:
+        _, address = generate_account()
+
+        with raises(ValueError, match="amount"):
+            GroupTemplate(
+                _buy_ticket(address, address, 1, [], 1)[2:], [{"amount": "amount"}]
+            )
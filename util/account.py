@@ -1,20 +1,43 @@
+import json
+from os import O_CREAT, O_TRUNC, O_WRONLY, fchmod, getenv
+from os import open as open_fd
+from threading import Lock
+
 from algosdk.account import generate_account
 from algosdk.atomic_transaction_composer import (
     AccountTransactionSigner,
     AtomicTransactionComposer,
     TransactionWithSigner,
 )
-from algosdk.transaction import PaymentTxn
+from algosdk.transaction import PaymentTxn, wait_for_confirmation
 
-from util.client import algod_client, kmd_client
+from util.batch_signing import sign_composers
+from util.client import (
+    algod_client,
+    get_suggested_params,
+    kmd_client,
+    suggested_params_cache,
+    unique_note,
+)
 
 DEFAULT_KMD_WALLET_NAME = "unencrypted-default-wallet"
 DEFAULT_KMD_WALLET_PASSWORD = ""
+DEFAULT_INITIAL_FUNDS = 1_000_000_000
+MINIMUM_FUNDING_BALANCE = 1_000_000_000
+
+# Optional file the discovered funding account (with its private key) is
+# persisted to between runs, readable by its owner only.
+FUNDING_ACCOUNT_CACHE_PATH = getenv("FUNDING_ACCOUNT_CACHE_PATH")
+
+_funding_account: tuple[str, str] | None = None
 
 
 class AccountManager:
     def __init__(self):
-        self.funding_address, self.funding_private = self._get_funding_account()
+        (
+            self.funding_address,
+            self.funding_private,
+        ) = self._get_cached_funding_account()
 
     def create_new_funded_account(self) -> tuple[str, AccountTransactionSigner]:
         private, address = generate_account()
@@ -22,10 +45,84 @@ class AccountManager:
         self._fund_account(address)
         return address, transaction_signer
 
+    def create_new_funded_accounts(
+        self,
+        n: int,
+        amounts: int | list[int] = DEFAULT_INITIAL_FUNDS,
+    ) -> list[tuple[str, AccountTransactionSigner]]:
+        """
+        Create `n` new accounts funded with `amounts` microAlgos each (or the
+        matching entry of `amounts` if a list is given).
+
+        Payments are packed into groups of up to 16 transactions which are all
+        submitted before waiting, so funding costs roughly one block wait per
+        16 accounts instead of one per account.
+        """
+
+        if isinstance(amounts, int):
+            amounts = [amounts] * n
+        elif len(amounts) != n:
+            raise ValueError("Expected {} amounts, got {}.".format(n, len(amounts)))
+
+        accounts: list[tuple[str, AccountTransactionSigner]] = []
+        for _ in range(n):
+            private, address = generate_account()
+            accounts.append((address, AccountTransactionSigner(private)))
+
+        self._fund_accounts(
+            [address for address, _ in accounts],
+            amounts,
+        )
+
+        return accounts
+
+    def _fund_accounts(
+        self,
+        receiver_addresses: list[str],
+        amounts: list[int],
+    ) -> None:
+        """Fund each of `receiver_addresses` with the matching `amounts` entry."""
+
+        sp = get_suggested_params()
+        signer = AccountTransactionSigner(self.funding_private)
+        group_size = AtomicTransactionComposer.MAX_GROUP_SIZE
+
+        atcs: list[AtomicTransactionComposer] = []
+        for start in range(0, len(receiver_addresses), group_size):
+            atc = AtomicTransactionComposer()
+            for receiver_address, amount in zip(
+                receiver_addresses[start : start + group_size],
+                amounts[start : start + group_size],
+            ):
+                atc.add_transaction(
+                    TransactionWithSigner(
+                        txn=PaymentTxn(
+                            sender=self.funding_address,
+                            sp=sp,
+                            receiver=receiver_address,
+                            amt=amount,
+                            # Top-ups may repeat a previous payment.
+                            note=unique_note(),
+                        ),
+                        signer=signer,
+                    )
+                )
+            atcs.append(atc)
+
+        sign_composers(atcs)
+        pending_tx_ids = [atc.submit(algod_client)[0] for atc in atcs]
+
+        # Groups were submitted back-to-back, so they are confirmed in the
+        # same few rounds and most of these calls return immediately.
+        for tx_id in pending_tx_ids:
+            suggested_params_cache.observe_round(
+                wait_for_confirmation(algod_client, tx_id, 5)["confirmed-round"]
+            )
+
     def _fund_account(
         self,
         receiver_address: str,
-        initial_funds=1_000_000_000,
+        initial_funds=DEFAULT_INITIAL_FUNDS,
     ) -> None:
         """Fund provided `address` with `initial_funds` amount of microAlgos."""
 
@@ -34,7 +131,7 @@ class AccountManager:
             TransactionWithSigner(
                 txn=PaymentTxn(
                     sender=self.funding_address,
-                    sp=algod_client.suggested_params(),
+                    sp=get_suggested_params(),
                     receiver=receiver_address,
                     amt=initial_funds,
                 ),
@@ -43,6 +140,29 @@ class AccountManager:
         )
         atc.execute(algod_client, 5)
 
+    def _get_cached_funding_account(self) -> tuple[str, str]:
+        """
+        Return the funding account, only scanning KMD once per process.
+
+        An account read from `FUNDING_ACCOUNT_CACHE_PATH` is reused after a
+        single balance check and discovery runs again if it is no longer funded.
+        """
+
+        global _funding_account
+        if _funding_account is not None:
+            return _funding_account
+
+        cached = _read_funding_account_cache()
+        if cached is not None and _is_funding_account(
+            algod_client.account_info(cached[0])
+        ):
+            _funding_account = cached
+        else:
+            _funding_account = self._get_funding_account()
+            _write_funding_account_cache(_funding_account)
+
+        return _funding_account
+
     def _get_funding_account(self) -> tuple[str, str]:
         wallets = kmd_client.list_wallets()
 
@@ -62,14 +182,288 @@ class AccountManager:
         addresses = kmd_client.list_keys(wallet_handle)
 
         for address in addresses:
-            account_info = algod_client.account_info(address)
-            if (
-                account_info["status"] != "Offline"
-                and account_info["amount"] > 1_000_000_000
-            ):
+            if _is_funding_account(algod_client.account_info(address)):
                 private = kmd_client.export_key(
                     wallet_handle, DEFAULT_KMD_WALLET_PASSWORD, address
                 )
                 return address, private
 
         raise Exception("Cannot find a funding account.")
+
+
+def set_funding_account(address: str, private: str) -> None:
+    """Make every `AccountManager` in this process fund from the given account."""
+
+    global _funding_account
+    _funding_account = (address, private)
+
+
+def _is_funding_account(account_info: dict) -> bool:
+    return (
+        account_info["status"] != "Offline"
+        and account_info["amount"] > MINIMUM_FUNDING_BALANCE
+    )
+
+
+def _read_funding_account_cache() -> tuple[str, str] | None:
+    if FUNDING_ACCOUNT_CACHE_PATH is None:
+        return None
+
+    try:
+        with open(FUNDING_ACCOUNT_CACHE_PATH, "r") as cache:
+            cached = json.load(cache)
+        return cached["address"], cached["private_key"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _write_funding_account_cache(funding_account: tuple[str, str]) -> None:
+    if FUNDING_ACCOUNT_CACHE_PATH is None:
+        return
+
+    address, private = funding_account
+    # The cache holds a private key, so only its owner may read it, whatever
+    # the umask or the permissions of an existing file.
+    fd = open_fd(FUNDING_ACCOUNT_CACHE_PATH, O_WRONLY | O_CREAT | O_TRUNC, 0o600)
+    fchmod(fd, 0o600)
+    with open(fd, "w") as cache:
+        json.dump({"address": address, "private_key": private}, cache)
+
+
+class AccountPool:
+    """
+    Hands out pre-funded accounts and takes them back for reuse.
+
+    Accounts are funded in batches through `AccountManager`, topped up lazily
+    when they are handed out again and closed back to the funding account by
+    `close()`. Released accounts left opted into (or holding) apps or assets
+    are not handed out again, so every account handed out has no app or asset
+    state. Safe to share between threads (e.g. with `util.app_pool`).
+    """
+
+    def __init__(
+        self,
+        account_manager: AccountManager | None = None,
+        batch_size: int = AtomicTransactionComposer.MAX_GROUP_SIZE,
+        initial_funds: int = DEFAULT_INITIAL_FUNDS,
+        minimum_funds: int | None = None,
+    ):
+        self.account_manager = account_manager or AccountManager()
+        self.batch_size = batch_size
+        self.initial_funds = initial_funds
+        # Spendable balance (above the minimum balance) below which recycled
+        # accounts are topped up, half of `initial_funds` by default.
+        self.minimum_funds = (
+            initial_funds // 2 if minimum_funds is None else minimum_funds
+        )
+
+        self._available: dict[str, AccountTransactionSigner] = {}
+        # Released accounts whose state must be checked before reuse.
+        self._recycled: set[str] = set()
+        self._in_use: dict[str, AccountTransactionSigner] = {}
+        # Released accounts with app or asset state, only kept for `close()`.
+        self._retired: dict[str, AccountTransactionSigner] = {}
+        self._lock = Lock()
+
+    def acquire(self, n: int = 1) -> list[tuple[str, AccountTransactionSigner]]:
+        """Hand out `n` funded accounts, funding a new batch if needed."""
+
+        with self._lock:
+            return self._acquire(n)
+
+    def _acquire(self, n: int) -> list[tuple[str, AccountTransactionSigner]]:
+        accounts: list[tuple[str, AccountTransactionSigner]] = []
+        # Account infos of the recycled accounts handed out.
+        account_infos: dict[str, dict] = {}
+        while len(accounts) < n:
+            missing = n - len(accounts) - len(self._available)
+            if missing > 0:
+                self._available.update(
+                    self.account_manager.create_new_funded_accounts(
+                        max(missing, self.batch_size), self.initial_funds
+                    )
+                )
+
+            for _ in range(n - len(accounts)):
+                address, signer = self._available.popitem()
+                if address in self._recycled:
+                    self._recycled.discard(address)
+                    account_info = algod_client.account_info(address)
+                    if not _can_close(account_info):
+                        self._retired[address] = signer
+                        continue
+                    account_infos[address] = account_info
+                accounts.append((address, signer))
+
+        self._top_up(list(account_infos.values()))
+
+        for address, signer in accounts:
+            self._in_use[address] = signer
+
+        return accounts
+
+    def release(self, *addresses: str) -> None:
+        """Return accounts previously handed out by `acquire()` to the pool."""
+
+        with self._lock:
+            for address in addresses:
+                self._available[address] = self._in_use.pop(address)
+                self._recycled.add(address)
+
+    def close(self) -> None:
+        """
+        Send every pooled account's balance back to the funding account.
+
+        Accounts that are still opted into apps or assets (or created any)
+        cannot be closed, so only their balance above the minimum is returned.
+        """
+
+        with self._lock:
+            accounts = {**self._available, **self._in_use, **self._retired}
+            self._available.clear()
+            self._in_use.clear()
+            self._retired.clear()
+            self._recycled.clear()
+
+        sp = get_suggested_params()
+        funding_address = self.account_manager.funding_address
+
+        atcs: list[AtomicTransactionComposer] = []
+        atc = AtomicTransactionComposer()
+        for address, signer in accounts.items():
+            account_info = algod_client.account_info(address)
+            if _can_close(account_info):
+                txn = PaymentTxn(
+                    sender=address,
+                    sp=sp,
+                    receiver=funding_address,
+                    amt=0,
+                    close_remainder_to=funding_address,
+                )
+            else:
+                excess = account_info["amount"] - account_info["min-balance"]
+                if excess <= sp.min_fee:
+                    continue
+                txn = PaymentTxn(
+                    sender=address,
+                    sp=sp,
+                    receiver=funding_address,
+                    amt=excess - sp.min_fee,
+                )
+
+            atc.add_transaction(TransactionWithSigner(txn=txn, signer=signer))
+            if atc.get_tx_count() == AtomicTransactionComposer.MAX_GROUP_SIZE:
+                atcs.append(atc)
+                atc = AtomicTransactionComposer()
+
+        if atc.get_tx_count() > 0:
+            atcs.append(atc)
+
+        sign_composers(atcs)
+        pending_tx_ids = [atc.submit(algod_client)[0] for atc in atcs]
+
+        for tx_id in pending_tx_ids:
+            suggested_params_cache.observe_round(
+                wait_for_confirmation(algod_client, tx_id, 5)["confirmed-round"]
+            )
+
+    def _top_up(self, account_infos: list[dict]) -> None:
+        """
+        Bring recycled accounts whose spendable balance is below
+        `minimum_funds` back to `initial_funds`.
+        """
+
+        receivers: list[str] = []
+        amounts: list[int] = []
+        for account_info in account_infos:
+            amount = self.initial_funds - account_info["amount"]
+            # Accounts with a high minimum balance may hold `initial_funds`
+            # already.
+            if (
+                account_info["amount"] - account_info["min-balance"]
+                < self.minimum_funds
+                and amount > 0
+            ):
+                receivers.append(account_info["address"])
+                amounts.append(amount)
+
+        if receivers:
+            self.account_manager._fund_accounts(receivers, amounts)
+
+
+class WorkerFunders:
+    """
+    Funding accounts split off the funding account, one per pytest-xdist
+    worker id (e.g. `gw0`), so that workers never compete for the same sender.
+    """
+
+    def __init__(self, funds: int):
+        self.funds = funds
+        self._account_pool: AccountPool | None = None
+        # Worker id -> address and private key of its funding account.
+        self._funders: dict[str, tuple[str, str]] = {}
+
+    def split(self, worker_ids: list[str]) -> None:
+        """Fund the accounts of `worker_ids` in one batch."""
+
+        for worker_id, (address, signer) in zip(
+            worker_ids, self._get_account_pool().acquire(len(worker_ids))
+        ):
+            self._funders[worker_id] = (address, signer.private_key)
+
+    def funder(self, worker_id: str) -> tuple[str, str]:
+        """
+        The address and private key `worker_id` funds from. Workers that were
+        not split off (e.g. replacing a crashed worker) are funded now.
+        """
+
+        if worker_id not in self._funders:
+            self.split([worker_id])
+        return self._funders[worker_id]
+
+    def close(self) -> None:
+        """Send the workers' leftover funds back to the funding account."""
+
+        if self._account_pool is not None:
+            self._account_pool.close()
+            self._account_pool = None
+        self._funders.clear()
+
+    def _get_account_pool(self) -> AccountPool:
+        if self._account_pool is None:
+            # Only the accounts asked for are funded.
+            self._account_pool = AccountPool(batch_size=1, initial_funds=self.funds)
+        return self._account_pool
+
+
+def _can_close(account_info: dict) -> bool:
+    return all(
+        account_info.get(field, 0) == 0
+        for field in (
+            "total-apps-opted-in",
+            "total-assets-opted-in",
+            "total-created-apps",
+            "total-created-assets",
+        )
+    )
+
+
+_account_pool: AccountPool | None = None
+
+
+def get_account_pool() -> AccountPool:
+    """Return the process-wide `AccountPool`, creating it on first use."""
+
+    global _account_pool
+    if _account_pool is None:
+        _account_pool = AccountPool()
+    return _account_pool
+
+
+def close_account_pool() -> None:
+    """Close the process-wide `AccountPool` if one was created."""
+
+    global _account_pool
+    if _account_pool is not None:
+        _account_pool.close()
+        _account_pool = None
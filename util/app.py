@@ -1,5 +1,4 @@
-from base64 import b64decode
-from os import path
+from typing import NamedTuple
 
 from algosdk.account import address_from_private_key
 from algosdk.atomic_transaction_composer import (
@@ -11,13 +10,30 @@ from algosdk.logic import get_application_address
 from algosdk.transaction import (
     ApplicationCreateTxn,
     OnComplete,
+    PaymentTxn,
     StateSchema,
     SuggestedParams,
+    wait_for_confirmation,
 )
 
-from util.client import algod_client, AlgodClient
+from util.batch_signing import sign_composers
+from util.client import (
+    algod_client,
+    AlgodClient,
+    suggested_params_cache,
+    unique_note,
+)
+from util.compile_cache import compile_cache
+from util.contract_build import BUILD_PATH_PREFIX, contract_builder
+
 
-BUILD_PATH_PREFIX = path.join(path.dirname(__file__), "../contracts/build/")
+class AppDeployment(NamedTuple):
+    approval_name: str
+    clear_name: str
+    global_schema: StateSchema
+    local_schema: StateSchema
+    # microAlgos paid to the app address after its creation to cover its MBR.
+    funding: int = 0
 
 
 def deploy_app(
@@ -28,33 +44,182 @@ def deploy_app(
     global_schema: StateSchema,
     local_schema: StateSchema,
     client: AlgodClient = algod_client,
+    funding: int = 0,
 ) -> tuple[int, str]:
-    with open(BUILD_PATH_PREFIX + approval_name, "r") as approval:
-        with open(BUILD_PATH_PREFIX + clear_name, "r") as clear:
-            address = address_from_private_key(txn_signer.private_key)
-
-            atc = AtomicTransactionComposer()
-            atc.add_transaction(
-                TransactionWithSigner(
-                    txn=ApplicationCreateTxn(
-                        sender=address,
-                        sp=sp,
-                        on_complete=OnComplete.NoOpOC.real,
-                        approval_program=_compile_program(approval.read()),
-                        clear_program=_compile_program(clear.read()),
-                        global_schema=global_schema,
-                        local_schema=local_schema,
-                    ),
-                    signer=txn_signer,
+    """
+    Deploy an app and return its id and address.
+
+    The app's contracts are compiled first if their build is missing or stale
+    (see `util.contract_build`). If `funding` is set, the app is then funded
+    with that many microAlgos (see `deploy_apps`).
+    """
+
+    if funding > 0:
+        return deploy_apps(
+            txn_signer,
+            [
+                AppDeployment(
+                    approval_name, clear_name, global_schema, local_schema, funding
                 )
+            ],
+            sp,
+            client,
+        )[0]
+
+    address = address_from_private_key(txn_signer.private_key)
+    contract_builder.ensure_built([approval_name, clear_name])
+
+    atc = AtomicTransactionComposer()
+    atc.add_transaction(
+        TransactionWithSigner(
+            txn=_create_txn(
+                address,
+                sp,
+                approval_name,
+                clear_name,
+                global_schema,
+                local_schema,
+                client,
+            ),
+            signer=txn_signer,
+        )
+    )
+    tx_id = atc.execute(client, 5).tx_ids[0]
+    app_id = client.pending_transaction_info(tx_id)["application-index"]
+    app_address = get_application_address(app_id)
+
+    return app_id, app_address
+
+
+def deploy_apps(
+    txn_signer: AccountTransactionSigner | list[AccountTransactionSigner],
+    deployments: list[AppDeployment],
+    sp: SuggestedParams,
+    client: AlgodClient = algod_client,
+) -> list[tuple[int, str]]:
+    """
+    Deploy many apps in as few atomic groups as possible and return their ids
+    and addresses in order.
+
+    The apps are created (and funded) by `txn_signer`, or by the matching entry
+    of `txn_signer` if a list is given. The payments covering the apps' MBR
+    are batched the same way once the apps are created: their addresses cannot
+    be known before, as other transactions (e.g. of other test workers) may be
+    confirmed first.
+    """
+
+    if isinstance(txn_signer, AccountTransactionSigner):
+        txn_signers = [txn_signer] * len(deployments)
+    elif len(txn_signer) != len(deployments):
+        raise ValueError(
+            "Expected {} signers, got {}.".format(len(deployments), len(txn_signer))
+        )
+    else:
+        txn_signers = txn_signer
+    addresses = [address_from_private_key(signer.private_key) for signer in txn_signers]
+
+    # Compiles the stale contracts in parallel.
+    contract_builder.ensure_built(
+        [deployment.approval_name for deployment in deployments]
+        + [deployment.clear_name for deployment in deployments]
+    )
+
+    tx_ids = _execute_in_groups(
+        [
+            TransactionWithSigner(
+                txn=_create_txn(
+                    address,
+                    sp,
+                    deployment.approval_name,
+                    deployment.clear_name,
+                    deployment.global_schema,
+                    deployment.local_schema,
+                    client,
+                ),
+                signer=signer,
             )
-            tx_id = atc.execute(client, 5).tx_ids[0]
-            app_id = client.pending_transaction_info(tx_id)["application-index"]
-            app_address = get_application_address(app_id)
+            for deployment, address, signer in zip(deployments, addresses, txn_signers)
+        ],
+        client,
+    )
+    apps: list[tuple[int, str]] = []
+    for tx_id in tx_ids:
+        app_id = client.pending_transaction_info(tx_id)["application-index"]
+        apps.append((app_id, get_application_address(app_id)))
 
-            return app_id, app_address
+    payments = [
+        TransactionWithSigner(
+            txn=PaymentTxn(
+                sender=address,
+                sp=sp,
+                receiver=app_address,
+                amt=deployment.funding,
+            ),
+            signer=signer,
+        )
+        for deployment, address, signer, (_, app_address) in zip(
+            deployments, addresses, txn_signers, apps
+        )
+        if deployment.funding > 0
+    ]
+    if payments:
+        _execute_in_groups(payments, client)
+
+    return apps
+
+
+def _execute_in_groups(
+    txns: list[TransactionWithSigner], client: AlgodClient
+) -> list[str]:
+    """
+    Sign and submit `txns` in groups of up to 16, wait until they are all
+    confirmed and return their tx ids.
+    """
+
+    group_size = AtomicTransactionComposer.MAX_GROUP_SIZE
+    atcs: list[AtomicTransactionComposer] = []
+    for start in range(0, len(txns), group_size):
+        atc = AtomicTransactionComposer()
+        for txn in txns[start : start + group_size]:
+            atc.add_transaction(txn)
+        atcs.append(atc)
+
+    # Submit every group before waiting so they confirm in the same rounds.
+    sign_composers(atcs)
+    group_tx_ids = [atc.submit(client) for atc in atcs]
+    for tx_ids in group_tx_ids:
+        confirmed_round = wait_for_confirmation(client, tx_ids[0], 5)["confirmed-round"]
+        if client is suggested_params_cache.client:
+            suggested_params_cache.observe_round(confirmed_round)
+
+    return [tx_id for tx_ids in group_tx_ids for tx_id in tx_ids]
+
+
+def _create_txn(
+    sender: str,
+    sp: SuggestedParams,
+    approval_name: str,
+    clear_name: str,
+    global_schema: StateSchema,
+    local_schema: StateSchema,
+    client: AlgodClient,
+) -> ApplicationCreateTxn:
+    """Create the app from its built contracts, which must be up to date."""
+
+    with open(BUILD_PATH_PREFIX + approval_name, "r") as approval:
+        with open(BUILD_PATH_PREFIX + clear_name, "r") as clear:
+            return ApplicationCreateTxn(
+                sender=sender,
+                sp=sp,
+                on_complete=OnComplete.NoOpOC.real,
+                approval_program=_compile_program(approval.read(), client),
+                clear_program=_compile_program(clear.read(), client),
+                global_schema=global_schema,
+                local_schema=local_schema,
+                # The same creator may deploy the same app more than once.
+                note=unique_note(),
+            )
 
 
 def _compile_program(source_code: str, client: AlgodClient = algod_client) -> bytes:
-    compile_response = client.compile(source_code)
-    return b64decode(compile_response["result"])
+    return compile_cache.compile(source_code, client)
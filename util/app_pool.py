@@ -0,0 +1,210 @@
+"""
+Warm pools of deployed and funded app instances.
+
+    COUNTER = AppDeployment(
+        "2_counter.teal", "clear.teal", StateSchema(1, 0), StateSchema(0, 0)
+    )
+    app_id, app_address, manager_address, manager_signer = (
+        get_app_pool(COUNTER).acquire()
+    )
+
+An `AppPool` deploys instances of one `AppDeployment` on a background thread,
+each created by its own account from the `AccountPool`, and hands out each
+instance once. Whenever an instance is handed out another one is deployed in
+its place, while the caller goes on with its test, so that the next `acquire()`
+does not wait for a deployment.
+
+Instances are deployed, and funded by their creators, in batches (see
+`deploy_apps`).
+"""
+
+from threading import Condition, Thread
+from typing import NamedTuple
+
+from algosdk.atomic_transaction_composer import (
+    AccountTransactionSigner,
+    AtomicTransactionComposer,
+)
+
+from util.account import AccountPool, get_account_pool
+from util.app import AppDeployment, deploy_apps
+from util.client import get_suggested_params
+
+# Instances an `AppPool` keeps deployed ahead of `acquire()`.
+DEFAULT_APP_POOL_SIZE = 4
+
+
+class AppInstance(NamedTuple):
+    app_id: int
+    app_address: str
+    # Account handed out with the app, e.g. as its manager.
+    creator_address: str
+    creator_signer: AccountTransactionSigner
+
+
+class AppPool:
+    """
+    Deploys instances of `deployment` ahead of time and hands each out once.
+
+    The creators of the instances handed out belong to the caller, who returns
+    them with `AccountPool.release()`. `close()` stops deploying and releases the
+    creators of the instances never handed out.
+    """
+
+    def __init__(
+        self,
+        deployment: AppDeployment,
+        account_pool: AccountPool | None = None,
+        size: int = DEFAULT_APP_POOL_SIZE,
+    ):
+        self.deployment = deployment
+        self.account_pool = account_pool or get_account_pool()
+        self.size = size
+
+        self._condition = Condition()
+        self._ready: list[AppInstance] = []
+        self._deploying = 0
+        # Callers blocked in `acquire()`.
+        self._waiting = 0
+        # Acquisitions still expected, if known (see `expect()`).
+        self._expected: int | None = None
+        self._error: Exception | None = None
+        self._closed = False
+        self._thread: Thread | None = None
+
+    def expect(self, n: int) -> None:
+        """
+        Start deploying for `n` more acquisitions, keeping at most `size`
+        instances ahead of them instead of `size` after every acquisition.
+        """
+
+        with self._condition:
+            self._expected = (self._expected or 0) + n
+            self._start()
+            self._condition.notify_all()
+
+    def acquire(self) -> AppInstance:
+        """Hand out an instance never handed out before, waiting if none is ready."""
+
+        with self._condition:
+            self._start()
+            self._waiting += 1
+            self._condition.notify_all()
+            try:
+                while not self._ready:
+                    if self._error is not None:
+                        raise Exception(
+                            "Could not deploy {}: {}".format(
+                                self.deployment.approval_name, self._error
+                            )
+                        ) from self._error
+                    if self._closed:
+                        raise Exception("The app pool was closed.")
+                    self._condition.wait()
+            finally:
+                self._waiting -= 1
+
+            if self._expected:
+                self._expected -= 1
+            self._condition.notify_all()
+            return self._ready.pop(0)
+
+    def close(self) -> None:
+        """Stop deploying and release the creators of the unused instances."""
+
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+
+        with self._condition:
+            unused = self._ready
+            self._ready = []
+        if unused:
+            self.account_pool.release(
+                *(instance.creator_address for instance in unused)
+            )
+
+    def _start(self) -> None:
+        if self._thread is None and not self._closed:
+            self._thread = Thread(
+                target=self._refill,
+                name="AppPool {}".format(self.deployment.approval_name),
+                daemon=True,
+            )
+            self._thread.start()
+
+    def _missing(self) -> int:
+        """Instances to deploy on top of those ready or being deployed."""
+
+        target = self.size
+        if self._expected is not None:
+            target = min(target, self._expected)
+        return max(target, self._waiting) - len(self._ready) - self._deploying
+
+    def _refill(self) -> None:
+        while True:
+            with self._condition:
+                while not self._closed and self._missing() <= 0:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                n = min(self._missing(), AtomicTransactionComposer.MAX_GROUP_SIZE)
+                self._deploying += n
+
+            try:
+                instances = self._deploy(n)
+            except Exception as e:
+                with self._condition:
+                    self._deploying -= n
+                    self._error = e
+                    self._condition.notify_all()
+                return
+
+            with self._condition:
+                self._deploying -= n
+                self._ready += instances
+                self._condition.notify_all()
+
+    def _deploy(self, n: int) -> list[AppInstance]:
+        creators = self.account_pool.acquire(n)
+        try:
+            apps = deploy_apps(
+                [signer for _, signer in creators],
+                [self.deployment] * n,
+                get_suggested_params(),
+            )
+        except Exception:
+            self.account_pool.release(*(address for address, _ in creators))
+            raise
+
+        return [
+            AppInstance(app_id, app_address, creator_address, creator_signer)
+            for (app_id, app_address), (creator_address, creator_signer) in zip(
+                apps, creators
+            )
+        ]
+
+
+_app_pools: list[AppPool] = []
+
+
+def get_app_pool(deployment: AppDeployment) -> AppPool:
+    """Return the process-wide `AppPool` of `deployment`, creating it on first use."""
+
+    # Deployments cannot be hashed, their schemas define equality only.
+    for app_pool in _app_pools:
+        if app_pool.deployment == deployment:
+            return app_pool
+    app_pool = AppPool(deployment)
+    _app_pools.append(app_pool)
+    return app_pool
+
+
+def close_app_pools() -> None:
+    """Close every process-wide `AppPool`."""
+
+    while _app_pools:
+        _app_pools.pop().close()
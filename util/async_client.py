@@ -0,0 +1,460 @@
+import asyncio
+import json
+from socket import SHUT_RDWR
+from base64 import b64decode, b64encode
+from typing import Any
+from urllib.parse import urlencode, urlsplit
+
+from algosdk import encoding
+from algosdk.error import AlgodHTTPError, IndexerHTTPError, KMDHTTPError
+from algosdk.transaction import SuggestedParams
+
+from util.client import (
+    ALGOD_ADDRESS,
+    ALGOD_TOKEN,
+    INDEXER_ADDRESS,
+    INDEXER_TOKEN,
+    KMD_ADDRESS,
+    KMD_TOKEN,
+)
+
+DEFAULT_MAX_CONNECTIONS = 32
+
+
+class _ConnectionPool:
+    """
+    Keep-alive HTTP/1.1 connections to a single endpoint.
+
+    At most `max_connections` requests are in flight at once; finished
+    connections are kept open and reused by the next request.
+    """
+
+    def __init__(self, address: str, max_connections: int):
+        url = urlsplit(address)
+        if url.scheme not in ("http", "https"):
+            raise ValueError("Unsupported address {}.".format(address))
+
+        self.host = url.hostname
+        self.port = url.port or (443 if url.scheme == "https" else 80)
+        self.ssl = url.scheme == "https"
+        self.path_prefix = url.path.rstrip("/")
+        self.max_connections = max_connections
+
+        # Number of connections opened so far, useful to check reuse.
+        self.connections_opened = 0
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._idle: list[tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        headers: dict[str, str],
+        body: bytes | None = None,
+    ) -> tuple[int, bytes]:
+        self._bind_to_running_loop()
+
+        async with self._semaphore:
+            while True:
+                reader, writer, reused = await self._connect()
+                try:
+                    status, response_body, keep_alive = await self._exchange(
+                        reader, writer, method, path, headers, body
+                    )
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    writer.close()
+                    # A pooled connection may have been closed by the server
+                    # while idle, so the request is retried on another one.
+                    if reused:
+                        continue
+                    raise
+                except BaseException:
+                    # e.g. a timeout or a cancellation, which may leave the
+                    # response half read.
+                    writer.close()
+                    raise
+
+                if keep_alive:
+                    self._idle.append((reader, writer))
+                else:
+                    writer.close()
+                return status, response_body
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for _, writer in idle:
+            writer.close()
+        for _, writer in idle:
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    def _bind_to_running_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Connections cannot be shared between event loops.
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_connections)
+            idle, self._idle = self._idle, []
+            for _, writer in idle:
+                try:
+                    writer.close()
+                except RuntimeError:
+                    # Their loop is closed, so the socket is only shut down.
+                    try:
+                        writer.get_extra_info("socket").shutdown(SHUT_RDWR)
+                    except OSError:
+                        pass
+
+    async def _connect(
+        self,
+    ) -> tuple[asyncio.StreamReader, asyncio.StreamWriter, bool]:
+        while self._idle:
+            reader, writer = self._idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return reader, writer, True
+            writer.close()
+
+        self.connections_opened += 1
+        reader, writer = await asyncio.open_connection(
+            self.host, self.port, ssl=self.ssl
+        )
+        return reader, writer, False
+
+    async def _exchange(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        method: str,
+        path: str,
+        headers: dict[str, str],
+        body: bytes | None,
+    ) -> tuple[int, bytes, bool]:
+        lines = [
+            "{} {}{} HTTP/1.1".format(method, self.path_prefix, path),
+            "Host: {}:{}".format(self.host, self.port),
+            "Connection: keep-alive",
+            "Content-Length: {}".format(len(body) if body else 0),
+        ]
+        lines.extend("{}: {}".format(name, value) for name, value in headers.items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        if body:
+            writer.write(body)
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionError("Connection closed by server.")
+        version, status = status_line.decode("latin-1").split(" ", 2)[:2]
+
+        response_headers: dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+
+        connection = response_headers.get("connection", "").lower()
+        keep_alive = connection != "close" and (
+            version == "HTTP/1.1" or connection == "keep-alive"
+        )
+        if response_headers.get("transfer-encoding", "").lower() == "chunked":
+            response_body = await _read_chunked(reader)
+        elif "content-length" in response_headers:
+            response_body = await reader.readexactly(
+                int(response_headers["content-length"])
+            )
+        elif keep_alive:
+            # e.g. a 204: the body of a kept-alive response without a length
+            # is empty.
+            response_body = b""
+        else:
+            response_body = await reader.read()
+        return int(status), response_body, keep_alive
+
+
+async def _read_chunked(reader: asyncio.StreamReader) -> bytes:
+    chunks = []
+    while True:
+        size = int((await reader.readline()).split(b";")[0], 16)
+        if size == 0:
+            # Skip trailers.
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            return b"".join(chunks)
+        chunks.append(await reader.readexactly(size))
+        await reader.readexactly(2)
+
+
+class _AsyncClient:
+    auth_header = ""
+    api_prefix = ""
+    error = Exception
+
+    def __init__(
+        self,
+        token: str,
+        address: str,
+        headers: dict[str, str] | None = None,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+    ):
+        self.token = token
+        self.address = address
+        self.headers = {self.auth_header: token, **(headers or {})}
+        self.pool = _ConnectionPool(address, max_connections)
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        params: dict[str, Any] | None = None,
+        data: bytes | dict | None = None,
+        content_type: str = "application/json",
+        response_format: str = "json",
+    ) -> Any:
+        path = self.api_prefix + path
+        if params:
+            path += "?" + urlencode(params)
+
+        headers = dict(self.headers)
+        body = None
+        if data is not None:
+            body = data if isinstance(data, bytes) else json.dumps(data).encode()
+            headers["Content-Type"] = content_type
+
+        status, response_body = await self.pool.request(method, path, headers, body)
+
+        if status >= 400:
+            message = response_body.decode("utf-8", errors="replace")
+            try:
+                message = json.loads(message)["message"]
+            except (ValueError, KeyError, TypeError):
+                pass
+            self._raise(message, status)
+
+        if response_format == "json":
+            return json.loads(response_body) if response_body else {}
+        return response_body
+
+    async def close(self) -> None:
+        await self.pool.close()
+
+    def _raise(self, message: str, status: int) -> None:
+        raise self.error(message)
+
+
+class AsyncAlgodClient(_AsyncClient):
+    """Asynchronous counterpart of the algod calls used in this project."""
+
+    auth_header = "X-Algo-API-Token"
+    api_prefix = "/v2"
+    error = AlgodHTTPError
+
+    def _raise(self, message: str, status: int) -> None:
+        raise AlgodHTTPError(message, status)
+
+    async def status(self) -> dict:
+        return await self.request("GET", "/status")
+
+    async def status_after_block(self, round_num: int) -> dict:
+        return await self.request(
+            "GET", "/status/wait-for-block-after/{}".format(round_num)
+        )
+
+    async def block_info(self, round_num: int, response_format: str = "json") -> Any:
+        """
+        Return the block for `round_num`, as a dict or as the raw msgpack bytes
+        if `response_format` is "msgpack".
+        """
+
+        return await self.request(
+            "GET",
+            "/blocks/{}".format(round_num),
+            params={"format": response_format},
+            response_format=response_format,
+        )
+
+    async def suggested_params(self) -> SuggestedParams:
+        res = await self.request("GET", "/transactions/params")
+
+        return SuggestedParams(
+            res["fee"],
+            res["last-round"],
+            res["last-round"] + 1000,
+            res["genesis-hash"],
+            res["genesis-id"],
+            False,
+            res["consensus-version"],
+            res["min-fee"],
+        )
+
+    async def send_raw_transaction(self, txn: bytes) -> str:
+        """Send msgpack-encoded signed transaction(s) and return the first id."""
+
+        res = await self.request(
+            "POST", "/transactions", data=txn, content_type="application/x-binary"
+        )
+        return res["txId"]
+
+    async def send_transactions(self, txns: list) -> str:
+        return await self.send_raw_transaction(
+            b"".join(b64decode(encoding.msgpack_encode(txn)) for txn in txns)
+        )
+
+    async def pending_transaction_info(self, tx_id: str) -> dict:
+        return await self.request("GET", "/transactions/pending/{}".format(tx_id))
+
+    async def application_info(self, application_id: int) -> dict:
+        return await self.request("GET", "/applications/{}".format(application_id))
+
+    async def account_info(self, address: str) -> dict:
+        return await self.request("GET", "/accounts/{}".format(address))
+
+    async def account_application_info(self, address: str, application_id: int) -> dict:
+        return await self.request(
+            "GET", "/accounts/{}/applications/{}".format(address, application_id)
+        )
+
+    async def account_asset_info(self, address: str, asset_id: int) -> dict:
+        return await self.request(
+            "GET", "/accounts/{}/assets/{}".format(address, asset_id)
+        )
+
+    async def application_boxes(
+        self, application_id: int, limit: int = 0, next_page: str | None = None
+    ) -> dict:
+        params: dict[str, Any] = {}
+        if limit:
+            params["max"] = limit
+        if next_page is not None:
+            params["next"] = next_page
+        return await self.request(
+            "GET", "/applications/{}/boxes".format(application_id), params=params
+        )
+
+    async def application_box_names(self, application_id: int) -> list[bytes]:
+        """
+        List the names of all boxes of an app, a page at a time.
+
+        algod lists up to `MaxAPIBoxPerApplication` boxes per page. Nodes
+        without paging reject listings over that limit ("Result limit exceeded").
+        """
+
+        names: list[bytes] = []
+        next_page = None
+        while True:
+            page = await self.application_boxes(application_id, next_page=next_page)
+            names += [b64decode(box["name"]) for box in page["boxes"]]
+            next_page = page.get("next-token")
+            if not next_page:
+                return names
+
+    async def application_box_by_name(
+        self, application_id: int, box_name: bytes
+    ) -> dict:
+        return await self.request(
+            "GET",
+            "/applications/{}/box".format(application_id),
+            params={"name": "b64:" + b64encode(box_name).decode()},
+        )
+
+    async def compile(self, source: str, source_map: bool = False) -> dict:
+        return await self.request(
+            "POST",
+            "/teal/compile",
+            params={"sourcemap": source_map},
+            data=source.encode("utf-8"),
+            content_type="application/x-binary",
+        )
+
+
+class AsyncIndexerClient(_AsyncClient):
+    auth_header = "X-Indexer-API-Token"
+    api_prefix = "/v2"
+    error = IndexerHTTPError
+
+    async def search_transactions(self, **params: Any) -> dict:
+        """
+        Search transactions by indexer query parameters, written with
+        underscores instead of dashes (e.g. `application_id=`, `min_round=`,
+        `next_page=`).
+        """
+
+        return await self.request(
+            "GET", "/transactions", params=_indexer_params(params)
+        )
+
+    async def application_boxes(self, application_id: int, **params: Any) -> dict:
+        return await self.request(
+            "GET",
+            "/applications/{}/boxes".format(application_id),
+            params=_indexer_params(params),
+        )
+
+
+def _indexer_params(params: dict[str, Any]) -> dict[str, Any]:
+    return {
+        ("next" if name == "next_page" else name.replace("_", "-")): value
+        for name, value in params.items()
+        if value is not None
+    }
+
+
+class AsyncKMDClient(_AsyncClient):
+    auth_header = "X-KMD-API-Token"
+    api_prefix = "/v1"
+    error = KMDHTTPError
+
+    async def list_wallets(self) -> list[dict]:
+        return (await self.request("GET", "/wallets")).get("wallets", [])
+
+    async def init_wallet_handle(self, id: str, password: str) -> str:
+        res = await self.request(
+            "POST", "/wallet/init", data={"wallet_id": id, "wallet_password": password}
+        )
+        return res["wallet_handle_token"]
+
+    async def release_wallet_handle(self, handle: str) -> bool:
+        res = await self.request(
+            "POST", "/wallet/release", data={"wallet_handle_token": handle}
+        )
+        return res == {}
+
+    async def list_keys(self, handle: str) -> list[str]:
+        res = await self.request(
+            "POST", "/key/list", data={"wallet_handle_token": handle}
+        )
+        return res.get("addresses", [])
+
+    async def export_key(self, handle: str, password: str, address: str) -> str:
+        res = await self.request(
+            "POST",
+            "/key/export",
+            data={
+                "wallet_handle_token": handle,
+                "wallet_password": password,
+                "address": address,
+            },
+        )
+        return res["private_key"]
+
+    async def generate_key(self, handle: str) -> str:
+        res = await self.request("POST", "/key", data={"wallet_handle_token": handle})
+        return res["address"]
+
+    async def import_key(self, handle: str, private_key: str) -> str:
+        res = await self.request(
+            "POST",
+            "/key/import",
+            data={"wallet_handle_token": handle, "private_key": private_key},
+        )
+        return res["address"]
+
+
+async_algod_client = AsyncAlgodClient(ALGOD_TOKEN, ALGOD_ADDRESS)
+async_indexer_client = AsyncIndexerClient(INDEXER_TOKEN, INDEXER_ADDRESS)
+async_kmd_client = AsyncKMDClient(KMD_TOKEN, KMD_ADDRESS)
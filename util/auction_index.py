@@ -0,0 +1,280 @@
+import asyncio
+import json
+from base64 import b64decode
+from bisect import bisect_left, insort
+from typing import Callable, NamedTuple
+
+import msgpack
+from algosdk.encoding import decode_address, encode_address
+from algosdk.error import AlgodHTTPError
+
+from util.async_client import AsyncAlgodClient, async_algod_client
+from util.box_codec import load_codecs
+from util.confirmation import FOLLOW_ATTEMPTS, FOLLOW_RETRY_DELAY
+
+AUCTION_CODECS = load_codecs("5_auction.tl")
+AUCTION_KEY = AUCTION_CODECS["AuctionKey"]
+AUCTION_VALUE = AUCTION_CODECS["AuctionValue"]
+
+# Methods of `5_auction` that create, change or delete auction boxes.
+AUCTION_METHODS = {b"create_auction", b"place_bid", b"settle"}
+
+ZERO_ADDRESS = bytes(32)
+
+
+class Auction(NamedTuple):
+    seller: str
+    asset_id: int
+    end_timestamp: int
+    buyout_price: int
+    current_price: int
+    # `None` until someone bids.
+    current_bidder: str | None
+    seller_paid: int
+    nft_sent: int
+
+
+class AuctionIndex:
+    """
+    In-memory index of the live auctions of a `5_auction` app.
+
+    `start()` loads every auction box once, then follows new blocks and only
+    re-reads the boxes named by the `create_auction`, `place_bid` and `settle`
+    calls in them. Queries are answered from sorted lists without any request.
+
+    `listeners` are called with the key of every auction changed (or removed)
+    by `refresh()`.
+
+    `save()` writes the index and its round to a file that `load()` restores
+    it from, catching up on the blocks since then instead of reloading every
+    box.
+
+    Failed requests while following blocks are retried with backoff. Once
+    `attempts` attempts in a row failed, the index stops following and its
+    queries raise the last error (also kept in `error`) instead of answering
+    from stale auctions.
+    """
+
+    def __init__(
+        self,
+        app_id: int,
+        client: AsyncAlgodClient = async_algod_client,
+        attempts: int = FOLLOW_ATTEMPTS,
+        retry_delay: float = FOLLOW_RETRY_DELAY,
+    ):
+        self.app_id = app_id
+        self.client = client
+        self.attempts = attempts
+        self.retry_delay = retry_delay
+        self.last_round: int | None = None
+        self.error: Exception | None = None
+
+        # Box name -> auction.
+        self.auctions: dict[bytes, Auction] = {}
+        self._by_end_timestamp: list[tuple[int, bytes]] = []
+        self._by_current_price: list[tuple[int, bytes]] = []
+        self._by_seller: dict[str, set[bytes]] = {}
+        self.listeners: list[Callable[[bytes], None]] = []
+
+        self._task: asyncio.Task | None = None
+
+    # Queries
+
+    def ending_before(self, timestamp: int) -> list[Auction]:
+        """Auctions ending before `timestamp`, soonest first."""
+
+        self._check_following()
+        end = bisect_left(self._by_end_timestamp, (timestamp,))
+        return [self.auctions[key] for _, key in self._by_end_timestamp[:end]]
+
+    def top_by_current_price(self, n: int) -> list[Auction]:
+        """The `n` auctions with the highest current price, highest first."""
+
+        self._check_following()
+        return [
+            self.auctions[key]
+            for _, key in reversed(self._by_current_price[-n:] if n else [])
+        ]
+
+    def by_seller(self, seller: str) -> list[Auction]:
+        self._check_following()
+        return [self.auctions[key] for key in self._by_seller.get(seller, ())]
+
+    # Following the chain
+
+    async def start(self) -> None:
+        """Load every auction box (unless loaded from a file) and follow blocks."""
+
+        if self.last_round is None:
+            await self.bootstrap()
+        else:
+            status = await self.client.status()
+            for round_num in range(self.last_round + 1, status["last-round"] + 1):
+                await self.process_block(round_num)
+        if self._task is None:
+            self._task = asyncio.create_task(self._follow())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def bootstrap(self) -> None:
+        # Taken first: boxes changed while they are read are read again when
+        # the blocks after it are processed.
+        self.last_round = (await self.client.status())["last-round"]
+
+        await self.refresh(await self.client.application_box_names(self.app_id))
+
+    def _check_following(self) -> None:
+        if self.error is not None:
+            raise self.error
+
+    async def _follow(self) -> None:
+        failures = 0
+        while True:
+            try:
+                status = await self.client.status_after_block(self.last_round)
+                for round_num in range(self.last_round + 1, status["last-round"] + 1):
+                    await self.process_block(round_num)
+            except Exception as e:
+                failures += 1
+                if failures >= self.attempts:
+                    self.error = e
+                    return
+                # Resumes from the last round processed.
+                await asyncio.sleep(self.retry_delay * 2 ** (failures - 1))
+            else:
+                failures = 0
+
+    async def process_block(self, round_num: int) -> None:
+        """Re-read the auctions changed by the app calls confirmed in `round_num`."""
+
+        block = msgpack.unpackb(
+            await self.client.block_info(round_num, response_format="msgpack"),
+            raw=False,
+            strict_map_key=False,
+        )["block"]
+
+        keys = []
+        for stxn in block.get("txns", []):
+            txn = stxn["txn"]
+            if txn.get("type") != "appl" or txn.get("apid") != self.app_id:
+                continue
+            args = txn.get("apaa", [])
+            if not args or args[0] not in AUCTION_METHODS:
+                continue
+            if args[0] == b"create_auction":
+                keys.append(AUCTION_KEY.encode(txn["snd"], txn.get("apas", [0])[0]))
+            elif len(args) > 1:
+                keys.append(args[1])
+
+        await self.refresh(list(dict.fromkeys(keys)))
+        self.last_round = round_num
+
+    async def refresh(self, keys: list[bytes]) -> None:
+        """Re-read the auction boxes named `keys` now."""
+
+        values = await asyncio.gather(*(self._read_box(key) for key in keys))
+        for key, value in zip(keys, values):
+            previous = self._remove(key)
+            if value is not None:
+                self._add(key, value)
+            if self.auctions.get(key) != previous:
+                for listener in self.listeners:
+                    listener(key)
+
+    async def _read_box(self, key: bytes) -> bytes | None:
+        if len(key) != AUCTION_KEY.size:
+            return None
+        try:
+            box = await self.client.application_box_by_name(self.app_id, key)
+        except AlgodHTTPError as e:
+            if e.code == 404:
+                return None
+            raise
+        return b64decode(box["value"])
+
+    # Sorted structures
+
+    def _add(self, key: bytes, value: bytes) -> None:
+        seller, asset_id = AUCTION_KEY.decode(key)
+        value_record = AUCTION_VALUE.decode(value)
+        auction = Auction(
+            seller=encode_address(seller),
+            asset_id=asset_id,
+            end_timestamp=value_record.end_timestamp,
+            buyout_price=value_record.buyout_price,
+            current_price=value_record.current_price,
+            current_bidder=encode_address(value_record.current_bidder)
+            if value_record.current_bidder != ZERO_ADDRESS
+            else None,
+            seller_paid=value_record.seller_paid,
+            nft_sent=value_record.nft_sent,
+        )
+
+        self.auctions[key] = auction
+        insort(self._by_end_timestamp, (auction.end_timestamp, key))
+        insort(self._by_current_price, (auction.current_price, key))
+        self._by_seller.setdefault(auction.seller, set()).add(key)
+
+    def _remove(self, key: bytes) -> Auction | None:
+        auction = self.auctions.pop(key, None)
+        if auction is None:
+            return None
+
+        for entries, sort_key in (
+            (self._by_end_timestamp, auction.end_timestamp),
+            (self._by_current_price, auction.current_price),
+        ):
+            del entries[bisect_left(entries, (sort_key, key))]
+
+        seller_keys = self._by_seller[auction.seller]
+        seller_keys.discard(key)
+        if not seller_keys:
+            del self._by_seller[auction.seller]
+        return auction
+
+    # Checkpoints
+
+    def save(self, path: str) -> None:
+        with open(path, "w") as checkpoint:
+            json.dump(
+                {
+                    "app_id": self.app_id,
+                    "round": self.last_round,
+                    "auctions": {
+                        key.hex(): AUCTION_VALUE.encode(
+                            auction.end_timestamp,
+                            auction.buyout_price,
+                            auction.current_price,
+                            decode_address(auction.current_bidder)
+                            if auction.current_bidder
+                            else ZERO_ADDRESS,
+                            auction.seller_paid,
+                            auction.nft_sent,
+                        ).hex()
+                        for key, auction in self.auctions.items()
+                    },
+                },
+                checkpoint,
+            )
+
+    @classmethod
+    def load(
+        cls, path: str, client: AsyncAlgodClient = async_algod_client
+    ) -> "AuctionIndex":
+        """Restore an index saved with `save()`; `start()` catches it up."""
+
+        with open(path, "r") as checkpoint:
+            saved = json.load(checkpoint)
+
+        index = cls(saved["app_id"], client)
+        index.last_round = saved["round"]
+        for key, value in saved["auctions"].items():
+            index._add(bytes.fromhex(key), bytes.fromhex(value))
+        return index
@@ -0,0 +1,166 @@
+"""
+Signing of large transaction sets across a process pool.
+
+    blobs = sign_batch([(txn, private_key), ...])
+    algod_client.send_raw_transaction(b64encode(b"".join(blobs[:16])))
+
+Batches of at least `POOL_THRESHOLD` transactions are split into chunks signed
+by `SIGNING_PROCESSES` worker processes (one per core by default); smaller ones
+are signed in this process, where the pool's overhead would not pay off.
+`sign_composers()` does the same for the groups of atomic transaction
+composers, which then submit without signing again. Keys other than a
+transaction's sender's sign for a sender rekeyed to them, like with algosdk.
+
+Workers are spawned, so scripts signing large batches need the usual
+`if __name__ == "__main__":` guard, and this module (which they import) must
+not import `util.client`.
+"""
+
+import atexit
+from base64 import b64decode, b64encode
+from concurrent.futures import Executor, ProcessPoolExecutor
+from multiprocessing import get_context
+from os import cpu_count, getenv
+from threading import Lock
+
+import msgpack
+from algosdk import encoding
+from algosdk.atomic_transaction_composer import (
+    AccountTransactionSigner,
+    AtomicTransactionComposer,
+    AtomicTransactionComposerStatus,
+)
+from algosdk.transaction import SignedTransaction, Transaction
+
+from util.txn_template import authorizing_address, encode_signed, sign_encoded
+
+# Worker processes signing batches; 1 signs everything in this process.
+SIGNING_PROCESSES = int(getenv("SIGNING_PROCESSES", "0")) or cpu_count() or 1
+
+# Batches smaller than this are signed in this process.
+POOL_THRESHOLD = 512
+
+# Transactions sent to a worker at a time.
+MIN_CHUNK_SIZE = 64
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = Lock()
+
+
+def get_signing_pool() -> ProcessPoolExecutor:
+    """Return the shared signing pool, starting it on first use."""
+
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Forking a process with running threads (e.g. the stand-in node)
+            # is unsafe, so workers are spawned.
+            _pool = ProcessPoolExecutor(
+                SIGNING_PROCESSES, mp_context=get_context("spawn")
+            )
+            atexit.register(_pool.shutdown)
+        return _pool
+
+
+def sign_batch(
+    items: list[tuple[Transaction | bytes, str]], pool: Executor | None = None
+) -> list[bytes]:
+    """
+    Sign each transaction (an algosdk `Transaction` or its canonical encoding)
+    with the private key next to it.
+
+    Returns the encoded signed transactions in order, ready to be concatenated
+    per group and passed to `send_raw_transaction`.
+    """
+
+    return [
+        encode_signed(encoded, signature, authorizing)
+        for encoded, signature, authorizing in _sign(items, pool)
+    ]
+
+
+def sign_composers(
+    atcs: list[AtomicTransactionComposer], pool: Executor | None = None
+) -> None:
+    """
+    Sign the groups of `atcs` as one batch, so that their `submit()` and
+    `execute()` send them without signing again.
+
+    Groups with transactions of other signers than `AccountTransactionSigner`
+    (e.g. logic signatures) are left to be signed as usual.
+
+    The composers' `signed_txns` and `status` are set directly, which relies on
+    `gather_signatures()` of py-algorand-sdk 2.0.0 (pinned in requirements.txt)
+    returning `signed_txns` as is once `status` is `SIGNED`.
+    """
+
+    batched = [
+        atc
+        for atc in atcs
+        if atc.status < AtomicTransactionComposerStatus.SIGNED
+        and all(
+            type(txn_with_signer.signer) is AccountTransactionSigner
+            for txn_with_signer in atc.build_group()
+        )
+    ]
+    items: list[tuple[Transaction | bytes, str]] = [
+        (txn_with_signer.txn, txn_with_signer.signer.private_key)
+        for atc in batched
+        for txn_with_signer in atc.txn_list
+    ]
+
+    signed = iter(_sign(items, pool))
+    for atc in batched:
+        atc.signed_txns = []
+        for txn_with_signer in atc.txn_list:
+            _, signature, authorizing = next(signed)
+            atc.signed_txns.append(
+                SignedTransaction(
+                    txn_with_signer.txn,
+                    b64encode(signature).decode(),
+                    encoding.encode_address(authorizing) if authorizing else None,
+                )
+            )
+        atc.status = AtomicTransactionComposerStatus.SIGNED
+
+
+def _sign(
+    items: list[tuple[Transaction | bytes, str]], pool: Executor | None
+) -> list[tuple[bytes, bytes, bytes | None]]:
+    if pool is None:
+        if len(items) < POOL_THRESHOLD or SIGNING_PROCESSES == 1:
+            return _sign_chunk(items)
+        pool = get_signing_pool()
+
+    # A few chunks per worker, so that workers finishing early get more work.
+    chunk_size = max(MIN_CHUNK_SIZE, -(-len(items) // (SIGNING_PROCESSES * 4)))
+    chunks = [
+        items[start : start + chunk_size] for start in range(0, len(items), chunk_size)
+    ]
+    return [signed for chunk in pool.map(_sign_chunk, chunks) for signed in chunk]
+
+
+def _sign_chunk(
+    items: list[tuple[Transaction | bytes, str]]
+) -> list[tuple[bytes, bytes, bytes | None]]:
+    """
+    Return the canonical encoding, the signature and the authorizing address
+    (`None` unless the signer is not the sender) of each transaction.
+    """
+
+    signed = []
+    for txn, private_key in items:
+        if isinstance(txn, bytes):
+            encoded = txn
+            sender = msgpack.unpackb(encoded)["snd"]
+        else:
+            encoded = b64decode(encoding.msgpack_encode(txn))
+            sender = encoding.decode_address(txn.sender)
+        signed.append(
+            (
+                encoded,
+                sign_encoded(encoded, private_key),
+                authorizing_address(sender, private_key),
+            )
+        )
+    return signed
@@ -0,0 +1,461 @@
+import asyncio
+from base64 import b64decode
+from copy import copy
+from random import Random
+from typing import Callable, NamedTuple
+
+from algosdk import encoding
+from algosdk.atomic_transaction_composer import AccountTransactionSigner
+from algosdk.error import AlgodHTTPError
+from algosdk.logic import get_application_address
+from algosdk.transaction import (
+    ApplicationNoOpTxn,
+    PaymentTxn,
+    SuggestedParams,
+    assign_group_id,
+)
+
+from util.async_client import AsyncAlgodClient, async_algod_client
+from util.auction_index import Auction, AuctionIndex
+from util.client import get_suggested_params, suggested_params_cache
+from util.confirmation import (
+    EXPIRED_REJECTION,
+    ConfirmationWaiter,
+    TransactionExpiredError,
+)
+
+# Smallest raise over the current price `place_bid` accepts.
+MINIMUM_BID = 10_000
+
+# Bidder of the competing bids in a `SimulatedMarket`.
+COMPETITOR = "COMPETITOR"
+
+
+class BiddingStats:
+    def __init__(self) -> None:
+        self.submitted = 0
+        self.succeeded = 0
+        self.failed = 0
+        # Bids merged into a pending bid of the same bidder on the same auction.
+        self.coalesced = 0
+        # Bids dropped because the price rose above their maximum.
+        self.outbid = 0
+        # Bids dropped after failing `max_attempts` times at the same price, or
+        # because their auction ended.
+        self.abandoned = 0
+
+    @property
+    def wasted_per_success(self) -> float:
+        """Failed submissions per successful bid."""
+
+        return self.failed / self.succeeded if self.succeeded else float(self.failed)
+
+    def as_dict(self) -> dict:
+        return {
+            "submitted": self.submitted,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "coalesced": self.coalesced,
+            "outbid": self.outbid,
+            "abandoned": self.abandoned,
+            "wasted_per_success": self.wasted_per_success,
+        }
+
+
+class BiddingEngine:
+    """
+    Places bids on many auctions without racing itself.
+
+    `bid()` records that a bidder is willing to pay up to `max_price` for an
+    auction; a later bid of the same bidder on the same auction replaces it.
+    Each auction with pending bids has one worker, so auctions are bid on in
+    parallel but only one bid per auction is in flight: the pending bid with the
+    highest maximum, at the current price plus `MINIMUM_BID`, until only the
+    current bidder is left. After each submission the auction is re-read and
+    the next bid priced from it, so bids are only re-priced (and re-signed)
+    when the price on chain moved.
+
+    The current bidder's bid stays pending after the worker is done: when the
+    market sees the auction change (e.g. someone else outbid them), a worker is
+    started again to bid up to their maximum.
+
+    `market` is a `ChainMarket` or a `SimulatedMarket`.
+    """
+
+    def __init__(self, market: "ChainMarket | SimulatedMarket", max_attempts: int = 3):
+        self.market = market
+        self.max_attempts = max_attempts
+        self.stats = BiddingStats()
+
+        # Auction key -> bidder -> maximum price.
+        self._pending: dict[bytes, dict[str, int]] = {}
+        self._workers: dict[bytes, asyncio.Task] = {}
+
+        market.listeners.append(self._auction_changed)
+
+    def bid(self, bidder: str, key: bytes, max_price: int) -> None:
+        pending = self._pending.setdefault(key, {})
+        if bidder in pending:
+            self.stats.coalesced += 1
+        pending[bidder] = max_price
+
+        if key not in self._workers:
+            self._workers[key] = asyncio.create_task(self._work(key))
+
+    async def drain(self) -> None:
+        """Wait until every pending bid is leading, outbid or abandoned."""
+
+        while self._workers:
+            await asyncio.gather(*self._workers.values())
+
+    def _auction_changed(self, key: bytes) -> None:
+        if key not in self._pending or key in self._workers:
+            return
+        if key not in self.market.auctions:
+            # Settled: the bid left pending was the winning one.
+            del self._pending[key]
+            return
+        self._workers[key] = asyncio.create_task(self._work(key))
+
+    async def _work(self, key: bytes) -> None:
+        # Whether the worker stopped with only the current bidder's bid left.
+        leading = False
+        try:
+            attempted_price = None
+            attempts = 0
+            while self._pending.get(key):
+                pending = self._pending[key]
+                auction = self.market.auctions.get(key)
+                if auction is None:
+                    self.stats.abandoned += len(pending)
+                    break
+
+                required = auction.current_price + MINIMUM_BID
+                for bidder, max_price in list(pending.items()):
+                    if bidder != auction.current_bidder and max_price < required:
+                        del pending[bidder]
+                        self.stats.outbid += 1
+                candidates = [
+                    bidder for bidder in pending if bidder != auction.current_bidder
+                ]
+                if not candidates:
+                    # The current bidder's bid stays pending until the auction
+                    # changes, see `_auction_changed`.
+                    leading = True
+                    break
+
+                if auction.current_price != attempted_price:
+                    attempted_price, attempts = auction.current_price, 0
+                bidder = max(candidates, key=pending.__getitem__)
+                if attempts == self.max_attempts:
+                    del pending[bidder]
+                    self.stats.abandoned += 1
+                    attempts = 0
+                    continue
+
+                attempts += 1
+                self.stats.submitted += 1
+                if await self.market.place_bid(bidder, key, required, auction):
+                    self.stats.succeeded += 1
+                else:
+                    self.stats.failed += 1
+                await self.market.refresh([key])
+        finally:
+            if not leading:
+                self._pending.pop(key, None)
+            del self._workers[key]
+
+
+class PresignedBid(NamedTuple):
+    # What the bid was signed for.
+    amount: int
+    current_bidder: str | None
+    tx_id: str
+    last_valid: int
+    encoded: bytes
+
+
+class ChainMarket:
+    """
+    Places the bids of a `BiddingEngine` on a `5_auction` app, reading the
+    auctions from `index`.
+
+    Bidders must have opted into the app. A bid's group is signed once per
+    price and current bidder and resubmitted as is otherwise, until its last
+    valid round passes. A group the node rejects as expired (the waiter can lag
+    behind the node) is signed again and resubmitted once.
+    """
+
+    def __init__(
+        self,
+        index: AuctionIndex,
+        signers: dict[str, AccountTransactionSigner],
+        client: AsyncAlgodClient = async_algod_client,
+        suggested_params: Callable[[], SuggestedParams] = get_suggested_params,
+    ):
+        self.index = index
+        self.signers = signers
+        self.client = client
+        self.suggested_params = suggested_params
+        self.groups_signed = 0
+
+        self._waiter = ConfirmationWaiter(client)
+        self._presigned: dict[tuple[str, bytes], PresignedBid] = {}
+
+    @property
+    def auctions(self) -> dict[bytes, Auction]:
+        return self.index.auctions
+
+    @property
+    def listeners(self) -> list[Callable[[bytes], None]]:
+        return self.index.listeners
+
+    async def start(self) -> None:
+        await self._waiter.start()
+
+    async def stop(self) -> None:
+        await self._waiter.stop()
+
+    async def refresh(self, keys: list[bytes]) -> None:
+        await self.index.refresh(keys)
+
+    async def place_bid(
+        self, bidder: str, key: bytes, amount: int, auction: Auction
+    ) -> bool:
+        """Submit a bid of `amount` and return whether it was confirmed."""
+
+        presigned = self._presigned.get((bidder, key))
+        last_round = self._waiter.last_round
+        if (
+            presigned is None
+            or presigned.amount != amount
+            or presigned.current_bidder != auction.current_bidder
+            or (last_round is not None and presigned.last_valid <= last_round)
+        ):
+            presigned = self._presigned[(bidder, key)] = self._sign(
+                bidder, key, amount, auction
+            )
+
+        confirmation = self._waiter.register(presigned.tx_id, presigned.last_valid)
+        try:
+            try:
+                await self.client.send_raw_transaction(presigned.encoded)
+            except AlgodHTTPError as e:
+                if EXPIRED_REJECTION not in str(e):
+                    raise
+                confirmation.cancel()
+                # The cached params may be from the same, expired window.
+                suggested_params_cache.invalidate()
+                presigned = self._presigned[(bidder, key)] = self._sign(
+                    bidder, key, amount, auction
+                )
+                confirmation = self._waiter.register(
+                    presigned.tx_id, presigned.last_valid
+                )
+                await self.client.send_raw_transaction(presigned.encoded)
+        except AlgodHTTPError:
+            confirmation.cancel()
+            return False
+        try:
+            await confirmation
+        except TransactionExpiredError:
+            return False
+        return True
+
+    def _sign(
+        self, bidder: str, key: bytes, amount: int, auction: Auction
+    ) -> PresignedBid:
+        app_id = self.index.app_id
+        sp = self.suggested_params()
+        sp.flat_fee = True
+        sp.fee = sp.min_fee
+
+        # Refunding the current bidder, and paying the seller, sending the NFT
+        # and refunding the box MBR when the buyout price is met.
+        inner_txns = (auction.current_bidder is not None) + 3 * (
+            0 < auction.buyout_price <= amount
+        )
+        call_sp = copy(sp)
+        call_sp.fee = sp.min_fee * (1 + inner_txns)
+
+        txns = assign_group_id(
+            [
+                PaymentTxn(bidder, sp, get_application_address(app_id), amount),
+                ApplicationNoOpTxn(
+                    bidder,
+                    call_sp,
+                    app_id,
+                    app_args=["place_bid", key],
+                    accounts=list(
+                        dict.fromkeys(
+                            address
+                            for address in (auction.current_bidder, auction.seller)
+                            if address is not None
+                        )
+                    ),
+                    foreign_assets=[auction.asset_id],
+                    boxes=[(app_id, key)],
+                ),
+            ]
+        )
+        stxns = self.signers[bidder].sign_transactions(txns, [0, 1])
+        self.groups_signed += 1
+        return PresignedBid(
+            amount=amount,
+            current_bidder=auction.current_bidder,
+            tx_id=txns[0].get_txid(),
+            last_valid=sp.last,
+            encoded=b"".join(
+                b64decode(encoding.msgpack_encode(stxn)) for stxn in stxns
+            ),
+        )
+
+
+class SimulatedMarket:
+    """
+    In-memory auctions for simulating bidding strategies under contention.
+
+    Bids placed in the same event loop iteration land in the same round and
+    are applied in random order, so bids racing on one auction fail like they
+    would on chain. Before each round, a competing bid lands on each auction
+    bid on with probability `contention`. `auctions` is what bidders see: an
+    auction is only re-read from the live state by `refresh()`, which calls
+    `listeners` with the key of every auction that changed.
+    """
+
+    def __init__(
+        self, auctions: dict[bytes, Auction], contention: float, seed: int | None = None
+    ):
+        self.auctions = dict(auctions)
+        self.contention = contention
+        self.rounds = 0
+        self.listeners: list[Callable[[bytes], None]] = []
+
+        self._live = dict(auctions)
+        self._random = Random(seed)
+        self._round: list[tuple[str, bytes, int, asyncio.Future]] = []
+
+    async def refresh(self, keys: list[bytes]) -> None:
+        for key in keys:
+            if self.auctions.get(key) != self._live[key]:
+                self.auctions[key] = self._live[key]
+                for listener in self.listeners:
+                    listener(key)
+
+    async def place_bid(
+        self, bidder: str, key: bytes, amount: int, auction: Auction
+    ) -> bool:
+        loop = asyncio.get_running_loop()
+        if not self._round:
+            loop.call_soon(self._close_round)
+        future = loop.create_future()
+        self._round.append((bidder, key, amount, future))
+        return await future
+
+    def _close_round(self) -> None:
+        bids, self._round = self._round, []
+        self.rounds += 1
+
+        for key in dict.fromkeys(key for _, key, _, _ in bids):
+            if self._random.random() < self.contention:
+                self._apply(
+                    COMPETITOR, key, self._live[key].current_price + MINIMUM_BID
+                )
+
+        self._random.shuffle(bids)
+        for bidder, key, amount, future in bids:
+            future.set_result(self._apply(bidder, key, amount))
+
+    def _apply(self, bidder: str, key: bytes, amount: int) -> bool:
+        auction = self._live[key]
+        if amount < auction.current_price + MINIMUM_BID:
+            return False
+        self._live[key] = auction._replace(current_price=amount, current_bidder=bidder)
+        return True
+
+
+async def bid_naively(
+    market: "ChainMarket | SimulatedMarket",
+    bids: list[tuple[str, bytes, int]],
+    max_attempts: int = 3,
+) -> BiddingStats:
+    """
+    Place `bids` (bidder, auction key, maximum price) the way a naive client
+    would: all at once, each retrying on its own after re-reading the price.
+    """
+
+    stats = BiddingStats()
+
+    async def place(bidder: str, key: bytes, max_price: int) -> None:
+        for _ in range(max_attempts):
+            auction = market.auctions.get(key)
+            if auction is None or auction.current_bidder == bidder:
+                return
+            required = auction.current_price + MINIMUM_BID
+            if required > max_price:
+                stats.outbid += 1
+                return
+
+            stats.submitted += 1
+            if await market.place_bid(bidder, key, required, auction):
+                stats.succeeded += 1
+                return
+            stats.failed += 1
+            await market.refresh([key])
+        stats.abandoned += 1
+
+    await asyncio.gather(*(place(*bid) for bid in bids))
+    return stats
+
+
+def simulate(
+    auctions: int = 10,
+    bidders: int = 50,
+    bids_per_bidder: int = 5,
+    contention: float = 0.3,
+    seed: int = 0,
+) -> dict:
+    """
+    Compare the wasted submissions per successful bid of a `BiddingEngine` and
+    of naive clients placing the same random bids on `SimulatedMarket`s.
+    """
+
+    random = Random(seed)
+    keys = [index.to_bytes(8, "big") for index in range(auctions)]
+    bids = [
+        (
+            "BIDDER{}".format(bidder),
+            random.choice(keys),
+            MINIMUM_BID * random.randint(1, 50),
+        )
+        for bidder in range(bidders)
+        for _ in range(bids_per_bidder)
+    ]
+
+    def market() -> SimulatedMarket:
+        return SimulatedMarket(
+            {
+                key: Auction("SELLER", index, 0, 0, 0, None, 0, 0)
+                for index, key in enumerate(keys)
+            },
+            contention,
+            seed,
+        )
+
+    async def run_engine() -> tuple[BiddingStats, int]:
+        engine_market = market()
+        engine = BiddingEngine(engine_market)
+        for bid in bids:
+            engine.bid(*bid)
+        await engine.drain()
+        return engine.stats, engine_market.rounds
+
+    async def run_naive() -> tuple[BiddingStats, int]:
+        naive_market = market()
+        return await bid_naively(naive_market, bids), naive_market.rounds
+
+    report = {}
+    for name, run in (("engine", run_engine), ("naive", run_naive)):
+        stats, rounds = asyncio.run(run())
+        report[name] = {**stats.as_dict(), "rounds": rounds}
+    return report
@@ -0,0 +1,125 @@
+"""
+Box codecs generated from the `struct` definitions in the Tealish contracts.
+
+    user_info = load_codecs("3_user_profile.tl")["UserInfo"]
+    info = user_info.decode(b64decode(box["value"]))
+    info.number_of_pets
+
+Layouts are read from the contract sources themselves, so they cannot drift
+out of sync with the contracts.
+"""
+
+import re
+import struct
+from collections import namedtuple
+from functools import lru_cache
+from os import path
+from typing import Any, Iterator
+
+CONTRACTS_PATH_PREFIX = path.join(path.dirname(__file__), "../contracts/")
+
+_STRUCT_PATTERN = re.compile(r"^struct\s+(\w+)\s*:\s*$(.*?)^end\b", re.M | re.S)
+_FIELD_PATTERN = re.compile(r"^\s*(\w+)\s*:\s*(int|bytes\[(\d+)\])\s*$")
+
+
+class StructCodec:
+    """
+    Packs and unpacks one Tealish struct.
+
+    Fields are big-endian uint64s (`int`) and fixed size byte strings
+    (`bytes[N]`), laid out back to back like the AVM does.
+    """
+
+    def __init__(self, name: str, fields: list[tuple[str, int | None]]):
+        """`fields` are (name, size) pairs, size being `None` for `int`s."""
+
+        self.name = name
+        self.fields = fields
+        self.record_type = namedtuple(name, [field for field, _ in fields])
+        self.struct = struct.Struct(
+            ">"
+            + "".join("Q" if size is None else "{}s".format(size) for _, size in fields)
+        )
+        self.size = self.struct.size
+
+    @property
+    def dtype(self) -> Any:
+        """The NumPy structured dtype of the struct, with `V<N>` byte fields."""
+
+        import numpy
+
+        return numpy.dtype(
+            [
+                (field, ">u8" if size is None else "V{}".format(size))
+                for field, size in self.fields
+            ]
+        )
+
+    def decode(self, buffer: bytes | bytearray | memoryview, offset: int = 0) -> tuple:
+        """Unpack the struct at `offset` of `buffer` without copying the buffer."""
+
+        return self.record_type._make(self.struct.unpack_from(buffer, offset))
+
+    def iter_decode(self, buffer: bytes | bytearray | memoryview) -> Iterator[tuple]:
+        """Unpack back to back structs filling `buffer`."""
+
+        return map(self.record_type._make, self.struct.iter_unpack(buffer))
+
+    def as_array(self, buffer: bytes | bytearray | memoryview) -> Any:
+        """View back to back structs filling `buffer` as a NumPy array."""
+
+        import numpy
+
+        return numpy.frombuffer(buffer, self.dtype)
+
+    def encode(self, *values: int | bytes, **fields: int | bytes) -> bytes:
+        """
+        Pack the given field values, e.g. for a box key or an app argument.
+
+        Byte fields shorter than their size are zero padded. Raises
+        `ValueError` for longer ones, which `struct` would silently truncate.
+        """
+
+        if fields:
+            values = self.record_type(*values, **fields)
+        for (field, size), value in zip(self.fields, values):
+            if size is not None and len(value) > size:
+                raise ValueError(
+                    "{}.{} is {} bytes, longer than its {} bytes.".format(
+                        self.name, field, len(value), size
+                    )
+                )
+        return self.struct.pack(*values)
+
+    def __repr__(self) -> str:
+        return "StructCodec({!r}, {!r})".format(self.name, self.fields)
+
+
+def parse_structs(source: str) -> dict[str, StructCodec]:
+    """Create a codec for every `struct` block of a Tealish program."""
+
+    codecs = {}
+    for match in _STRUCT_PATTERN.finditer(source):
+        name, body = match.groups()
+        fields: list[tuple[str, int | None]] = []
+        for line in body.splitlines():
+            line = line.split("#", 1)[0]
+            if not line.strip():
+                continue
+            field = _FIELD_PATTERN.match(line)
+            if field is None:
+                raise ValueError(
+                    "Unsupported field in struct {}: {}".format(name, line.strip())
+                )
+            field_name, _, size = field.groups()
+            fields.append((field_name, None if size is None else int(size)))
+        codecs[name] = StructCodec(name, fields)
+    return codecs
+
+
+@lru_cache
+def load_codecs(contract_name: str) -> dict[str, StructCodec]:
+    """Create the codecs for the structs of a Tealish contract in `contracts/`."""
+
+    with open(CONTRACTS_PATH_PREFIX + contract_name, "r") as contract:
+        return parse_structs(contract.read())
@@ -0,0 +1,102 @@
+import asyncio
+from base64 import b64decode
+from typing import Any
+
+import numpy
+from numpy.lib.format import open_memmap
+
+from util.async_client import AsyncAlgodClient, async_algod_client
+from util.box_codec import StructCodec
+
+# Boxes fetched at once by `export_boxes`.
+DEFAULT_MAX_CONCURRENCY = 32
+
+
+def export_boxes(
+    app_id: int,
+    value_codec: StructCodec,
+    key_codec: StructCodec | None = None,
+    out_path: str | None = None,
+    client: AsyncAlgodClient = async_algod_client,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+) -> numpy.ndarray:
+    """
+    Read all boxes of an app into a NumPy structured array, one row per box.
+
+    The columns are the fields of `value_codec`, preceded by the fields of
+    `key_codec` if the box names are structs too, or by a `name` column of
+    zero padded raw box names otherwise.
+
+    With `out_path`, the array is a memory-mapped `.npy` file written as the
+    boxes arrive, so exports larger than memory can be scanned later with
+    `numpy.load(out_path, mmap_mode="r")`.
+    """
+
+    return asyncio.run(
+        export_boxes_async(
+            app_id, value_codec, key_codec, out_path, client, max_concurrency
+        )
+    )
+
+
+async def export_boxes_async(
+    app_id: int,
+    value_codec: StructCodec,
+    key_codec: StructCodec | None = None,
+    out_path: str | None = None,
+    client: AsyncAlgodClient = async_algod_client,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+) -> numpy.ndarray:
+    """Like `export_boxes`, fetching the boxes on the running event loop."""
+
+    names = await client.application_box_names(app_id)
+
+    if key_codec is None:
+        key_dtype = numpy.dtype(
+            [("name", "V{}".format(max((len(name) for name in names), default=1)))]
+        )
+    else:
+        key_dtype = key_codec.dtype
+    dtype = numpy.dtype(key_dtype.descr + value_codec.dtype.descr)
+
+    if out_path is None:
+        rows = numpy.zeros(len(names), dtype)
+    else:
+        rows = open_memmap(out_path, mode="w+", dtype=dtype, shape=(len(names),))
+
+    # Rows as raw bytes, to copy names and values into without decoding them.
+    raw_rows = rows.view(numpy.uint8).reshape(len(names), dtype.itemsize)
+
+    async def fetch(index: int) -> None:
+        name = names[index]
+        if key_codec is not None and len(name) != key_codec.size:
+            raise ValueError(
+                "Box name {} is not a {}.".format(name.hex(), key_codec.name)
+            )
+        value = b64decode((await client.application_box_by_name(app_id, name))["value"])
+        if len(value) != value_codec.size:
+            raise ValueError(
+                "Box {} holds {} bytes, not a {}.".format(
+                    name.hex(), len(value), value_codec.name
+                )
+            )
+        raw_rows[index, : len(name)] = numpy.frombuffer(name, numpy.uint8)
+        raw_rows[index, key_dtype.itemsize :] = numpy.frombuffer(value, numpy.uint8)
+
+    await _run_bounded(fetch, len(names), max_concurrency)
+
+    if out_path is not None:
+        rows.flush()
+    return rows
+
+
+async def _run_bounded(fetch: Any, count: int, max_concurrency: int) -> None:
+    """Call `fetch(index)` for every index with at most `max_concurrency` at once."""
+
+    indexes = iter(range(count))
+
+    async def worker() -> None:
+        for index in indexes:
+            await fetch(index)
+
+    await asyncio.gather(*(worker() for _ in range(min(max_concurrency, count))))
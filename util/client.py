@@ -1,7 +1,17 @@
+from copy import copy
+from os import getenv
+from secrets import token_bytes
+from threading import Lock
+from time import monotonic
+
+from algosdk.error import AlgodHTTPError
 from algosdk.kmd import KMDClient
+from algosdk.transaction import SuggestedParams
 from algosdk.v2client.algod import AlgodClient
 from algosdk.v2client.indexer import IndexerClient
 
+from util.instrumentation import instrument, start_process_profile
+
 ALGOD_ADDRESS = "http://localhost:4001"
 ALGOD_TOKEN = "aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa"
 
@@ -11,6 +21,145 @@ INDEXER_TOKEN = "aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa
 KMD_ADDRESS = "http://localhost:4002"
 KMD_TOKEN = "aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa"
 
-algod_client = AlgodClient(ALGOD_TOKEN, ALGOD_ADDRESS)
+# Set to "standin" to run against an in-process stand-in node (see
+# `util.standin`) instead of the localnet algod and KMD.
+ALGORAND_NODE = getenv("ALGORAND_NODE", "localnet")
+
+if ALGORAND_NODE == "standin":
+    from util.standin import start_standin_node
+
+    standin_node = start_standin_node()
+    ALGOD_ADDRESS = KMD_ADDRESS = standin_node.address
+
+# Number of rounds cached suggested params are reused for.
+SUGGESTED_PARAMS_ROUND_WINDOW = 100
+# Used to estimate the current round when no newer round has been observed.
+AVERAGE_ROUND_TIME = 3.3
+# Parts of the messages algod rejects transactions paying too low a fee with.
+FEE_REJECTION_MESSAGES = ("in fees, which is less than the minimum", "below threshold")
+
+
+class FeeAwareAlgodClient(AlgodClient):
+    """
+    An `AlgodClient` that invalidates `params_cache` (if set) whenever it
+    rejects a submission for its fee. The rejection is still raised.
+    """
+
+    params_cache: "SuggestedParamsCache | None" = None
+
+    def send_raw_transaction(self, txn, **kwargs):
+        # `send_transactions` goes through this method too.
+        try:
+            return super().send_raw_transaction(txn, **kwargs)
+        except AlgodHTTPError as e:
+            if self.params_cache is not None and is_fee_rejection(str(e)):
+                self.params_cache.invalidate()
+            raise
+
+
+algod_client = FeeAwareAlgodClient(ALGOD_TOKEN, ALGOD_ADDRESS)
 indexer_client = IndexerClient(INDEXER_TOKEN, INDEXER_ADDRESS)
 kmd_client = KMDClient(KMD_TOKEN, KMD_ADDRESS)
+
+# Set to record per-endpoint request statistics of the algod and KMD clients
+# for the whole process (see `util.instrumentation`).
+INSTRUMENT_CLIENTS = getenv("INSTRUMENT_CLIENTS", "0") != "0"
+
+if INSTRUMENT_CLIENTS:
+    instrument(algod_client)
+    instrument(kmd_client)
+    start_process_profile()
+
+
+class SuggestedParamsCache:
+    """
+    Caches `suggested_params()` and only refreshes them once the last round
+    has moved `round_window` rounds past the cached first round, or once
+    invalidated (e.g. by a `FeeAwareAlgodClient` rejecting a transaction for
+    its fee).
+
+    The last round is taken from `observe_round()`, which confirmations report
+    to the shared cache (e.g. in `util.app`, `util.account` and
+    `util.confirmation`), or estimated from the time passed since the params
+    were fetched. As dev mode localnets make a round per transaction rather
+    than per `AVERAGE_ROUND_TIME`, the confirmations are what keeps the cache
+    fresh under load.
+
+    Every copy handed out has the same validity window, so identical
+    transactions built from them have the same tx id: set a `note` (or a
+    `lease`) on transactions that may be sent more than once.
+    """
+
+    def __init__(
+        self,
+        client: AlgodClient = algod_client,
+        round_window: int = SUGGESTED_PARAMS_ROUND_WINDOW,
+    ):
+        self.client = client
+        self.round_window = round_window
+
+        self._lock = Lock()
+        self._params: SuggestedParams | None = None
+        self._fetched_at = 0.0
+        self._last_round = 0
+
+    def get(self) -> SuggestedParams:
+        """Return a copy of the cached params that callers are free to modify."""
+
+        with self._lock:
+            if self._params is None or self._is_stale():
+                self._refresh()
+            return copy(self._params)
+
+    def observe_round(self, round: int) -> None:
+        """Record that the chain has reached at least `round`."""
+
+        with self._lock:
+            self._last_round = max(self._last_round, round)
+
+    def invalidate(self) -> None:
+        """
+        Force a refresh on the next `get()`, e.g. after a transaction was
+        rejected because the network fee changed.
+        """
+
+        with self._lock:
+            self._params = None
+
+    def _is_stale(self) -> bool:
+        estimated_round = self._params.first + int(
+            (monotonic() - self._fetched_at) / AVERAGE_ROUND_TIME
+        )
+        last_round = max(self._last_round, estimated_round)
+        return last_round - self._params.first >= self.round_window
+
+    def _refresh(self) -> None:
+        self._params = self.client.suggested_params()
+        self._fetched_at = monotonic()
+        self._last_round = max(self._last_round, self._params.first)
+
+
+def is_fee_rejection(message: str) -> bool:
+    """Whether algod rejected a transaction with `message` for its fee."""
+
+    return any(pattern in message for pattern in FEE_REJECTION_MESSAGES)
+
+
+def unique_note() -> bytes:
+    """
+    A random transaction note, to keep otherwise identical transactions (e.g.
+    repeated calls built from the same cached params) distinct.
+    """
+
+    return token_bytes(8)
+
+
+suggested_params_cache = SuggestedParamsCache(algod_client)
+# The shared client refreshes the shared params when the network fee changes.
+algod_client.params_cache = suggested_params_cache
+
+
+def get_suggested_params() -> SuggestedParams:
+    """Return a copy of the shared, round-aware cached suggested params."""
+
+    return suggested_params_cache.get()
@@ -0,0 +1,156 @@
+from base64 import b64decode
+from hashlib import sha256
+from os import chmod, getenv, listdir, makedirs, path, remove, replace, utime
+from tempfile import NamedTemporaryFile
+from threading import Lock
+
+from util.client import AlgodClient
+
+DEFAULT_CACHE_DIR = getenv(
+    "COMPILE_CACHE_DIR", path.join(path.dirname(__file__), "../.compile_cache/")
+)
+DEFAULT_MAX_DISK_BYTES = 64 * 1024 * 1024
+
+
+class CompileCache:
+    """
+    Content-addressed cache of compiled TEAL programs.
+
+    Programs are keyed by the hash of their source and the version of the
+    node that compiled them. Lookups go through an in-memory layer first and
+    then an on-disk layer whose total size is kept under `max_disk_bytes` by
+    evicting the least recently used entries.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str | None = DEFAULT_CACHE_DIR,
+        max_disk_bytes: int = DEFAULT_MAX_DISK_BYTES,
+    ):
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._lock = Lock()
+        self._programs: dict[str, bytes] = {}
+        self._node_versions: dict[str, str] = {}
+
+    def compile(self, source_code: str, client: AlgodClient) -> bytes:
+        """Return the compiled `source_code`, only calling `client.compile` on a miss."""
+
+        key = self._key(source_code, client)
+
+        with self._lock:
+            program = self._programs.get(key)
+            if program is not None:
+                self.memory_hits += 1
+                return program
+
+            program = self._read(key)
+            if program is not None:
+                self.disk_hits += 1
+                self._programs[key] = program
+                return program
+
+            self.misses += 1
+
+        program = b64decode(client.compile(source_code)["result"])
+
+        with self._lock:
+            self._programs[key] = program
+            self._write(key, program)
+
+        return program
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+        }
+
+    def clear(self) -> None:
+        """Empty the in-memory layer and reset the hit/miss counters."""
+
+        with self._lock:
+            self._programs.clear()
+            self.memory_hits = self.disk_hits = self.misses = 0
+
+    def _key(self, source_code: str, client: AlgodClient) -> str:
+        node_version = self._node_versions.get(client.algod_address)
+        if node_version is None:
+            build = client.versions()["build"]
+            node_version = "{}.{}.{}-{}".format(
+                build["major"],
+                build["minor"],
+                build["build_number"],
+                build["commit_hash"],
+            )
+            self._node_versions[client.algod_address] = node_version
+
+        digest = sha256(node_version.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(source_code.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _read(self, key: str) -> bytes | None:
+        if self.cache_dir is None:
+            return None
+
+        entry_path = path.join(self.cache_dir, key)
+        try:
+            with open(entry_path, "rb") as entry:
+                program = entry.read()
+            # Mark the entry as recently used for eviction.
+            utime(entry_path)
+        except OSError:
+            return None
+
+        return program
+
+    def _write(self, key: str, program: bytes) -> None:
+        if self.cache_dir is None:
+            return
+
+        # Written to a temporary file first so that other processes sharing the
+        # cache directory never read a partial entry.
+        makedirs(self.cache_dir, exist_ok=True)
+        with NamedTemporaryFile(
+            "wb", dir=self.cache_dir, prefix=".", suffix=".tmp", delete=False
+        ) as entry:
+            entry.write(program)
+        # Temporary files are only readable by their owner.
+        chmod(entry.name, 0o644)
+        replace(entry.name, path.join(self.cache_dir, key))
+
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        total_size = 0
+        for name in listdir(self.cache_dir):
+            # Entries being written by other processes.
+            if name.startswith("."):
+                continue
+            entry_path = path.join(self.cache_dir, name)
+            try:
+                size = path.getsize(entry_path)
+                entries.append((path.getmtime(entry_path), size, entry_path))
+            except OSError:
+                continue
+            total_size += size
+
+        for _, size, entry_path in sorted(entries):
+            if total_size <= self.max_disk_bytes:
+                break
+            try:
+                remove(entry_path)
+            except OSError:
+                continue
+            total_size -= size
+
+
+compile_cache = CompileCache()
@@ -0,0 +1,177 @@
+import asyncio
+from base64 import b32encode
+from typing import Callable
+
+import msgpack
+from algosdk.encoding import checksum
+
+from util.async_client import AsyncAlgodClient, async_algod_client
+from util.client import suggested_params_cache
+
+# Consecutive failures to follow the next round (e.g. dropped connections)
+# after which the waiter gives up, and the delay before the first retry,
+# doubled after each failure.
+FOLLOW_ATTEMPTS = 5
+FOLLOW_RETRY_DELAY = 0.1
+
+# Rejection of a transaction submitted past its last valid round.
+EXPIRED_REJECTION = "txn dead"
+
+
+class TransactionExpiredError(Exception):
+    """Raised for a transaction whose last valid round passed unconfirmed."""
+
+
+class ConfirmationWaiter:
+    """
+    Confirms many in-flight transactions by following blocks.
+
+    Every new round is fetched once with `status_after_block` and `block_info`
+    and its transaction ids are matched against the registered ones, so the
+    number of requests per round does not depend on the number of outstanding
+    transactions. Transactions still unconfirmed after their `last_valid`
+    round fail with `TransactionExpiredError`.
+
+    Register transactions before submitting them, otherwise they may be
+    confirmed in a round the waiter has already processed.
+
+    Failed requests are retried with backoff. Once `attempts` attempts in a
+    row failed, the waiter stops and fails every pending and future
+    registration with the last error (also kept in `error`).
+
+    Following the shared client, the rounds processed are reported to the
+    shared suggested params cache (see `util.client.SuggestedParamsCache`).
+    """
+
+    def __init__(
+        self,
+        client: AsyncAlgodClient = async_algod_client,
+        attempts: int = FOLLOW_ATTEMPTS,
+        retry_delay: float = FOLLOW_RETRY_DELAY,
+    ):
+        self.client = client
+        self.attempts = attempts
+        self.retry_delay = retry_delay
+        self.last_round: int | None = None
+        self.error: Exception | None = None
+
+        self._pending: dict[str, tuple[asyncio.Future, int]] = {}
+        self._task: asyncio.Task | None = None
+        self._params_cache = (
+            suggested_params_cache if client is async_algod_client else None
+        )
+
+    def register(
+        self,
+        tx_id: str,
+        last_valid: int,
+        callback: Callable[[asyncio.Future], None] | None = None,
+    ) -> asyncio.Future:
+        """
+        Return a future resolved with the round `tx_id` is confirmed in.
+
+        `callback` is called with the future once it is done.
+        """
+
+        future = asyncio.get_running_loop().create_future()
+        if callback is not None:
+            future.add_done_callback(callback)
+        if self.error is not None:
+            future.set_exception(self.error)
+        else:
+            self._pending[tx_id] = (future, last_valid)
+        return future
+
+    def wait(self, tx_ids: list[str], last_valid: int) -> asyncio.Future:
+        """Register `tx_ids` and return a future of the rounds they confirm in."""
+
+        return asyncio.gather(*(self.register(tx_id, last_valid) for tx_id in tx_ids))
+
+    async def start(self) -> None:
+        """Start following blocks from the current round in the background."""
+
+        if self._task is None:
+            self.last_round = (await self.client.status())["last-round"]
+            self._task = asyncio.create_task(self._follow())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _follow(self) -> None:
+        failures = 0
+        while True:
+            try:
+                status = await self.client.status_after_block(self.last_round)
+                for round_num in range(self.last_round + 1, status["last-round"] + 1):
+                    await self.process_block(round_num)
+            except Exception as e:
+                failures += 1
+                if failures >= self.attempts:
+                    self._fail(e)
+                    return
+                # Resumes from the last round processed.
+                await asyncio.sleep(self.retry_delay * 2 ** (failures - 1))
+            else:
+                failures = 0
+
+    def _fail(self, error: Exception) -> None:
+        self.error = error
+        for future, _ in self._pending.values():
+            if not future.done():
+                future.set_exception(error)
+        self._pending.clear()
+
+    async def process_block(self, round_num: int) -> None:
+        """Resolve the transactions confirmed in `round_num` and expire others."""
+
+        block = msgpack.unpackb(
+            await self.client.block_info(round_num, response_format="msgpack"),
+            raw=False,
+            strict_map_key=False,
+        )["block"]
+
+        for tx_id in block_tx_ids(block):
+            future, _ = self._pending.pop(tx_id, (None, 0))
+            if future is not None and not future.done():
+                future.set_result(round_num)
+
+        for tx_id, (future, last_valid) in list(self._pending.items()):
+            if last_valid <= round_num:
+                del self._pending[tx_id]
+                if not future.done():
+                    future.set_exception(
+                        TransactionExpiredError(
+                            "Transaction {} was not confirmed by round {}.".format(
+                                tx_id, last_valid
+                            )
+                        )
+                    )
+
+        self.last_round = round_num
+        if self._params_cache is not None:
+            self._params_cache.observe_round(round_num)
+
+
+def block_tx_ids(block: dict) -> list[str]:
+    """
+    Compute the ids of the top-level transactions in a msgpack-decoded block.
+
+    Blocks store transactions without their genesis id and hash, so these are
+    restored from the block header before hashing.
+    """
+
+    tx_ids = []
+    for stxn in block.get("txns", []):
+        txn = dict(stxn["txn"])
+        if stxn.get("hgi"):
+            txn["gen"] = block["gen"]
+        txn["gh"] = block["gh"]
+        encoded = msgpack.packb(dict(sorted(txn.items())), use_bin_type=True)
+        tx_ids.append(b32encode(checksum(b"TX" + encoded)).decode().strip("="))
+    return tx_ids
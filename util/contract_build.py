@@ -0,0 +1,200 @@
+"""
+Incremental builds of the Tealish contracts.
+
+    contract_builder.ensure_built(["4_ticketing.teal", "clear.teal"])
+
+Compiles the `.tl` sources of the given contracts (all of them by default) from
+`CONTRACTS_SOURCE_DIR` into `CONTRACTS_BUILD_DIR` (`contracts/build/` by
+default), skipping the contracts whose build is up to date: compiled from a
+source with the same hash by the same Tealish version, as recorded in the build
+directory's manifest. Stale contracts are compiled across `BUILD_PROCESSES`
+worker processes.
+
+`deploy_app` calls this before reading a build, so changed contracts no longer
+need to be compiled by hand. Contracts found up to date are not hashed again by
+the same process until their source or build is modified.
+
+Workers are spawned, so this module (which they import) must not import
+`util.client`.
+"""
+
+import json
+from concurrent.futures import ProcessPoolExecutor
+from hashlib import sha256
+from importlib.metadata import version
+from multiprocessing import get_context
+from os import chmod, cpu_count, getenv, listdir, makedirs, path, replace, stat
+from tempfile import NamedTemporaryFile
+from threading import Lock
+
+from tealish import compile_program
+
+# Directory of the `.tl` sources, e.g. `contracts/answers/` to build the answers.
+CONTRACTS_SOURCE_DIR = getenv(
+    "CONTRACTS_SOURCE_DIR", path.join(path.dirname(__file__), "../contracts/")
+)
+# Directory of the builds, e.g. to keep those of another source directory apart.
+BUILD_PATH_PREFIX = path.join(
+    getenv(
+        "CONTRACTS_BUILD_DIR", path.join(path.dirname(__file__), "../contracts/build/")
+    ),
+    "",
+)
+
+# Worker processes compiling stale contracts; 1 compiles them in this process.
+BUILD_PROCESSES = int(getenv("BUILD_PROCESSES", "0")) or cpu_count() or 1
+
+MANIFEST_NAME = "manifest.json"
+
+TEALISH_VERSION = version("tealish")
+
+
+class ContractBuilder:
+    """
+    Compiles the contracts in `source_dir` into `build_dir` when their build is
+    missing or stale.
+    """
+
+    def __init__(
+        self,
+        source_dir: str = CONTRACTS_SOURCE_DIR,
+        build_dir: str = BUILD_PATH_PREFIX,
+        processes: int = BUILD_PROCESSES,
+    ):
+        self.source_dir = source_dir
+        self.build_dir = build_dir
+        self.processes = processes
+        # Names of the contracts compiled so far.
+        self.compiled: list[str] = []
+
+        self._lock = Lock()
+        # Contract name -> modification times of its source and build when it
+        # was last found up to date.
+        self._fresh: dict[str, tuple[int, int]] = {}
+
+    def ensure_built(self, teal_names: list[str] | None = None) -> list[str]:
+        """
+        Compile the stale contracts among `teal_names` (e.g. `"clear.teal"`),
+        or among all the sources, and return the names of those compiled.
+
+        Builds without a source (e.g. prebuilt TEAL) are left as they are.
+        """
+
+        if teal_names is None:
+            names = sorted(
+                name[: -len(".tl")]
+                for name in listdir(self.source_dir)
+                if name.endswith(".tl")
+            )
+        else:
+            names = list(
+                dict.fromkeys(path.splitext(teal_name)[0] for teal_name in teal_names)
+            )
+
+        with self._lock:
+            manifest: dict | None = None
+            # Name -> (source, digest) of the stale contracts.
+            stale: dict[str, tuple[str, str]] = {}
+            for name in names:
+                times = self._times(name)
+                if times is None or self._fresh.get(name) == times:
+                    continue
+
+                with open(self._source_path(name), "r") as source_file:
+                    source = source_file.read()
+                digest = _digest(source)
+                if manifest is None:
+                    manifest = self._read_manifest()
+                if times[1] >= 0 and manifest.get(name) == digest:
+                    self._fresh[name] = times
+                else:
+                    stale[name] = (source, digest)
+
+            if not stale:
+                return []
+
+            for name, teal in zip(stale, self._compile(stale)):
+                self._write(name + ".teal", teal)
+
+            # Merged with the entries written by other processes meanwhile.
+            manifest = self._read_manifest()
+            manifest.update({name: digest for name, (_, digest) in stale.items()})
+            self._write(MANIFEST_NAME, json.dumps(manifest, indent=2, sort_keys=True))
+
+            for name in stale:
+                times = self._times(name)
+                if times is not None:
+                    self._fresh[name] = times
+            self.compiled += stale
+            return list(stale)
+
+    def _compile(self, stale: dict[str, tuple[str, str]]) -> list[str]:
+        processes = min(self.processes, len(stale))
+        if processes <= 1:
+            return [
+                _compile_source(name, source) for name, (source, _) in stale.items()
+            ]
+
+        # Forking a process with running threads (e.g. the stand-in node) is
+        # unsafe, so workers are spawned.
+        with ProcessPoolExecutor(processes, mp_context=get_context("spawn")) as pool:
+            return list(
+                pool.map(
+                    _compile_source,
+                    stale,
+                    (source for source, _ in stale.values()),
+                )
+            )
+
+    def _source_path(self, name: str) -> str:
+        return path.join(self.source_dir, name + ".tl")
+
+    def _times(self, name: str) -> tuple[int, int] | None:
+        """Modification times of the source and build, -1 for a missing build."""
+
+        try:
+            source_time = stat(self._source_path(name)).st_mtime_ns
+        except OSError:
+            return None
+        try:
+            build_time = stat(path.join(self.build_dir, name + ".teal")).st_mtime_ns
+        except OSError:
+            build_time = -1
+        return source_time, build_time
+
+    def _read_manifest(self) -> dict:
+        try:
+            with open(path.join(self.build_dir, MANIFEST_NAME), "r") as manifest:
+                return json.load(manifest)
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, name: str, content: str) -> None:
+        # Written to a temporary file first so that other processes never read
+        # a partial build.
+        makedirs(self.build_dir, exist_ok=True)
+        with NamedTemporaryFile(
+            "w", dir=self.build_dir, prefix=".", suffix=".tmp", delete=False
+        ) as output:
+            output.write(content)
+        # Temporary files are only readable by their owner.
+        chmod(output.name, 0o644)
+        replace(output.name, path.join(self.build_dir, name))
+
+
+def _compile_source(name: str, source: str) -> str:
+    try:
+        teal, _ = compile_program(source)
+    except Exception as e:
+        raise ValueError("Could not compile {}.tl: {}".format(name, e)) from None
+    return "\n".join(teal + [""])
+
+
+def _digest(source: str) -> str:
+    digest = sha256(TEALISH_VERSION.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(source.encode("utf-8"))
+    return digest.hexdigest()
+
+
+contract_builder = ContractBuilder()
@@ -0,0 +1,143 @@
+from base64 import b64decode
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Iterator, NamedTuple
+
+from algosdk.v2client.indexer import IndexerClient
+
+from util.client import indexer_client
+
+# Transactions per indexer page.
+DEFAULT_PAGE_SIZE = 1000
+
+
+class AppTransaction(NamedTuple):
+    """A transaction calling an app, or an inner transaction of one."""
+
+    # `None` for inner transactions, see `parent_tx_id`.
+    tx_id: str | None
+    parent_tx_id: str | None
+    round: int
+    timestamp: int
+    type: str
+    sender: str
+    app_id: int
+    on_completion: str | None
+    args: list[bytes]
+    logs: list[bytes]
+    created_asset_id: int | None
+    created_app_id: int | None
+    # The transaction as returned by the indexer, without its inner transactions.
+    raw: dict
+
+
+class HistoryCheckpoint(NamedTuple):
+    """
+    Where to resume an `AppHistory`: the page being processed and the number
+    of its root transactions already processed. Plain JSON values, to store
+    with e.g. `json.dump(checkpoint._asdict(), file)`.
+    """
+
+    next_page: str | None = None
+    skip: int = 0
+
+
+class AppHistory:
+    """
+    Streams the transactions calling an app from the indexer, oldest first.
+
+    Iterating yields an `AppTransaction` for every root transaction followed by
+    its inner transactions (depth first). The next page is fetched in the
+    background while the current one is processed, and only two pages are held
+    in memory at any time.
+
+    `checkpoint` can be stored at any point and passed back to a new
+    `AppHistory` with the same app id and rounds to resume after the last root
+    transaction fully processed.
+    """
+
+    def __init__(
+        self,
+        app_id: int,
+        min_round: int | None = None,
+        max_round: int | None = None,
+        checkpoint: HistoryCheckpoint | None = None,
+        client: IndexerClient = indexer_client,
+        page_size: int = DEFAULT_PAGE_SIZE,
+    ):
+        self.app_id = app_id
+        self.min_round = min_round
+        self.max_round = max_round
+        self.checkpoint = checkpoint or HistoryCheckpoint()
+        self.client = client
+        self.page_size = page_size
+
+    def __iter__(self) -> Iterator[AppTransaction]:
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            page_token = self.checkpoint.next_page
+            skip = self.checkpoint.skip
+            page: Future = executor.submit(self._fetch, page_token)
+
+            while True:
+                response = page.result()
+                txns = response.get("transactions", [])
+                next_token = response.get("next-token")
+
+                # The indexer may cap `limit` below `page_size`, so short pages
+                # are not the last one: only an empty page or no token is.
+                has_next_page = next_token is not None and bool(txns)
+                if has_next_page:
+                    page = executor.submit(self._fetch, next_token)
+
+                for index in range(skip, len(txns)):
+                    yield from _flatten(txns[index], None)
+                    self.checkpoint = HistoryCheckpoint(page_token, index + 1)
+
+                if not has_next_page:
+                    return
+                page_token, skip = next_token, 0
+                self.checkpoint = HistoryCheckpoint(page_token, 0)
+
+    def _fetch(self, next_page: str | None) -> dict:
+        return self.client.search_transactions(
+            application_id=self.app_id,
+            min_round=self.min_round,
+            max_round=self.max_round,
+            limit=self.page_size,
+            next_page=next_page,
+        )
+
+
+def decode_log(log: bytes) -> int | bytes:
+    """Decode a logged value, taking 8 byte values to be `itob` encoded ints."""
+
+    if len(log) == 8:
+        return int.from_bytes(log, "big")
+    return log
+
+
+def _flatten(txn: dict[str, Any], parent_tx_id: str | None) -> Iterator[AppTransaction]:
+    app_call = txn.get("application-transaction", {})
+    tx_id = txn.get("id")
+
+    yield AppTransaction(
+        tx_id=tx_id,
+        parent_tx_id=parent_tx_id,
+        round=txn["confirmed-round"],
+        timestamp=txn.get("round-time", 0),
+        type=txn["tx-type"],
+        sender=txn["sender"],
+        app_id=app_call.get("application-id", 0)
+        or txn.get("created-application-index", 0),
+        on_completion=app_call.get("on-completion"),
+        args=[b64decode(arg) for arg in app_call.get("application-args", [])],
+        logs=[b64decode(log) for log in txn.get("logs", [])],
+        created_asset_id=txn.get("created-asset-index"),
+        created_app_id=txn.get("created-application-index"),
+        raw={key: value for key, value in txn.items() if key != "inner-txns"},
+    )
+
+    for inner_txn in txn.get("inner-txns", []):
+        inner_txn = {"confirmed-round": txn["confirmed-round"], **inner_txn}
+        if "round-time" in txn:
+            inner_txn.setdefault("round-time", txn["round-time"])
+        yield from _flatten(inner_txn, tx_id if tx_id is not None else parent_tx_id)
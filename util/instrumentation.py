@@ -0,0 +1,260 @@
+"""
+Opt-in per-endpoint instrumentation of the algod and KMD clients.
+
+    with profile_requests() as profile:
+        ...
+    print(profile.format())
+
+Set `INSTRUMENT_CLIENTS=1` to instrument the clients of `util.client` for the
+whole process; the test session then reports their requests (see
+`tests/conftest.py`).
+"""
+
+import json
+import sys
+from bisect import bisect_left
+from contextlib import contextmanager
+from threading import Lock
+from time import perf_counter
+from typing import Any, Iterator
+
+# Upper bounds (in milliseconds) of the latency histogram buckets; the last
+# bucket holds everything slower.
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+# Name of the request method wrapped on each kind of client.
+_REQUEST_METHODS = {"AlgodClient": "algod_request", "KMDClient": "kmd_request"}
+
+
+class EndpointStats:
+    __slots__ = (
+        "calls",
+        "errors",
+        "request_bytes",
+        "response_bytes",
+        "seconds",
+        "histogram",
+    )
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.request_bytes = 0
+        # JSON responses are counted re-encoded, so this is approximate.
+        self.response_bytes = 0
+        self.seconds = 0.0
+        self.histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def record(
+        self, seconds: float, request_bytes: int, response_bytes: int, failed: bool
+    ) -> None:
+        self.calls += 1
+        self.errors += failed
+        self.request_bytes += request_bytes
+        self.response_bytes += response_bytes
+        self.seconds += seconds
+        self.histogram[bisect_left(LATENCY_BUCKETS_MS, seconds * 1000)] += 1
+
+    def merge(self, other: "EndpointStats") -> None:
+        self.calls += other.calls
+        self.errors += other.errors
+        self.request_bytes += other.request_bytes
+        self.response_bytes += other.response_bytes
+        self.seconds += other.seconds
+        self.histogram = [a + b for a, b in zip(self.histogram, other.histogram)]
+
+    def percentile_ms(self, q: float) -> float:
+        """Upper bound of the histogram bucket holding the `q`th percentile."""
+
+        rank = self.calls * q / 100
+        seen = 0
+        for index, count in enumerate(self.histogram):
+            seen += count
+            if count and seen >= rank:
+                return (
+                    LATENCY_BUCKETS_MS[index]
+                    if index < len(LATENCY_BUCKETS_MS)
+                    else float("inf")
+                )
+        return 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "request_bytes": self.request_bytes,
+            "response_bytes": self.response_bytes,
+            "total_ms": self.seconds * 1000,
+            "mean_ms": self.seconds * 1000 / self.calls if self.calls else 0.0,
+            "histogram": self.histogram,
+        }
+
+    @classmethod
+    def from_dict(cls, values: dict) -> "EndpointStats":
+        stats = cls()
+        stats.calls = values["calls"]
+        stats.errors = values["errors"]
+        stats.request_bytes = values["request_bytes"]
+        stats.response_bytes = values["response_bytes"]
+        stats.seconds = values["total_ms"] / 1000
+        stats.histogram = list(values["histogram"])
+        return stats
+
+
+class RequestProfile:
+    """Request statistics per endpoint, keyed by "<client> <method>"."""
+
+    def __init__(self) -> None:
+        self.endpoints: dict[str, EndpointStats] = {}
+        self._lock = Lock()
+
+    def record(
+        self,
+        endpoint: str,
+        seconds: float,
+        request_bytes: int,
+        response_bytes: int,
+        failed: bool,
+    ) -> None:
+        with self._lock:
+            stats = self.endpoints.get(endpoint)
+            if stats is None:
+                stats = self.endpoints[endpoint] = EndpointStats()
+            stats.record(seconds, request_bytes, response_bytes, failed)
+
+    def merge(self, report: dict) -> None:
+        """Add the statistics of a report made by `as_dict()`, e.g. a worker's."""
+
+        with self._lock:
+            for endpoint, values in report.items():
+                stats = self.endpoints.setdefault(endpoint, EndpointStats())
+                stats.merge(EndpointStats.from_dict(values))
+
+    def clear(self) -> None:
+        with self._lock:
+            self.endpoints.clear()
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                endpoint: stats.as_dict()
+                for endpoint, stats in sorted(self.endpoints.items())
+            }
+
+    def format(self) -> list[str]:
+        """One line per endpoint, most called first."""
+
+        with self._lock:
+            endpoints = sorted(
+                self.endpoints.items(), key=lambda item: (-item[1].calls, item[0])
+            )
+        return [
+            "{}: {} calls, {} errors, {:.1f}ms total, p50 <={}ms, p95 <={}ms, "
+            "{} bytes sent, ~{} bytes received".format(
+                endpoint,
+                stats.calls,
+                stats.errors,
+                stats.seconds * 1000,
+                stats.percentile_ms(50),
+                stats.percentile_ms(95),
+                stats.request_bytes,
+                stats.response_bytes,
+            )
+            for endpoint, stats in endpoints
+        ]
+
+
+# Profiles currently recording, the process-wide one included.
+_active_profiles: list[RequestProfile] = []
+process_profile = RequestProfile()
+
+
+def instrument(client: Any) -> None:
+    """
+    Record the requests made by an algod or KMD client in every active profile.
+
+    Requests are attributed to the outermost client method making them, e.g.
+    `send_transactions` rather than `send_raw_transaction`.
+    """
+
+    kind = type(client).__name__
+    method_name = _REQUEST_METHODS.get(kind)
+    if method_name is None:
+        raise ValueError("Cannot instrument {} clients.".format(kind))
+    if method_name in vars(client):
+        # Already instrumented.
+        return
+
+    request = getattr(client, method_name)
+    service = "algod" if kind == "AlgodClient" else "kmd"
+
+    def instrumented_request(method, requrl, params=None, data=None, *args, **kwargs):
+        if not _active_profiles:
+            return request(method, requrl, params, data, *args, **kwargs)
+
+        frame = sys._getframe(1)
+        endpoint = requrl
+        while frame is not None and frame.f_locals.get("self") is client:
+            endpoint = frame.f_code.co_name
+            frame = frame.f_back
+
+        started_at = perf_counter()
+        failed = True
+        response = None
+        try:
+            response = request(method, requrl, params, data, *args, **kwargs)
+            failed = False
+            return response
+        finally:
+            seconds = perf_counter() - started_at
+            request_bytes = _size(data)
+            response_bytes = _size(response)
+            for profile in list(_active_profiles):
+                profile.record(
+                    "{} {}".format(service, endpoint),
+                    seconds,
+                    request_bytes,
+                    response_bytes,
+                    failed,
+                )
+
+    setattr(client, method_name, instrumented_request)
+
+
+def start_process_profile() -> None:
+    """Record every instrumented request until the process ends."""
+
+    if process_profile not in _active_profiles:
+        _active_profiles.append(process_profile)
+
+
+@contextmanager
+def profile_requests(*clients: Any) -> Iterator[RequestProfile]:
+    """
+    Record the requests made inside the block by `clients` (by default the
+    algod and KMD clients of `util.client`).
+    """
+
+    if not clients:
+        from util.client import algod_client, kmd_client
+
+        clients = (algod_client, kmd_client)
+    for client in clients:
+        instrument(client)
+
+    profile = RequestProfile()
+    _active_profiles.append(profile)
+    try:
+        yield profile
+    finally:
+        _active_profiles.remove(profile)
+
+
+def _size(value: Any) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode())
+    return len(json.dumps(value))
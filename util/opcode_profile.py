@@ -0,0 +1,358 @@
+"""
+Opcode cost profiles of app calls, mapped back to their Tealish source.
+
+    profile = profile_group(signed_txns, build_source_map("5_auction.tl"))
+    print("\n".join(profile.heat_report()))
+    with open("place_bid.folded", "w") as output:
+        output.write("\n".join(profile.folded()) + "\n")
+
+The group is evaluated without being committed: by the stand-in node's own
+simulate endpoint, or by algod's dryrun endpoint on localnet (which needs the
+developer API, as enabled on the sandbox and AlgoKit localnets). The stand-in
+charges `util.teal.OPCODE_COSTS`, which covers every opcode it implements.
+Dryrun traces carry no costs, so on localnet they are estimated from the same
+table and profiles say so (`estimated_costs`). The TEAL lines
+executed by the calls to the profiled program are mapped to `.tl` lines with
+the Tealish compiler's source map, and to the blocks and functions around them.
+
+`folded()` is in the folded stack format read by `flamegraph.pl` and
+speedscope, with the lines of a function nested under the line calling it.
+"""
+
+from base64 import b64decode
+from collections import Counter
+from functools import lru_cache
+from os import path
+from typing import NamedTuple
+
+from algosdk import encoding
+from algosdk.source_map import SourceMap
+from algosdk.transaction import SignedTransaction, create_dryrun
+from tealish import TealishCompiler
+from tealish.nodes import Block, Func
+
+from util.box_codec import CONTRACTS_PATH_PREFIX
+from util.client import AlgodClient, algod_client
+from util.contract_build import BUILD_PATH_PREFIX, contract_builder
+from util.teal import OPCODE_COSTS, normalize_teal, tokenize
+
+# Width of the bars of the heat report.
+HEAT_BAR_WIDTH = 20
+
+
+class TraceStep(NamedTuple):
+    # Line of the program's TEAL, from 1.
+    teal_line: int
+    op: str
+    cost: int
+
+
+class TealishSourceMap:
+    """
+    A Tealish program compiled to TEAL, with the `.tl` line each TEAL line was
+    compiled from and the blocks and functions around each `.tl` line.
+    """
+
+    def __init__(self, source: str, name: str = "program"):
+        self.name = name
+        self.source_lines = source.split("\n")
+
+        compiler = TealishCompiler(self.source_lines)
+        self.teal_lines = compiler.compile()
+        self.teal = "\n".join(self.teal_lines + [""])
+        # TEAL line -> .tl line, both from 1.
+        self.tealish_lines: dict[int, int] = dict(compiler.source_map)
+
+        # .tl line -> names of the enclosing blocks and functions, outermost
+        # first.
+        self.frames: dict[int, tuple[str, ...]] = {}
+        for node in compiler.nodes:
+            self._add_frames(node, ())
+
+    @classmethod
+    def load(cls, tealish_path: str) -> "TealishSourceMap":
+        with open(tealish_path, "r") as source:
+            return cls(source.read(), path.basename(tealish_path))
+
+    def source_line(self, line: int) -> str:
+        if 0 < line <= len(self.source_lines):
+            return self.source_lines[line - 1].strip()
+        return ""
+
+    def _add_frames(self, node, frames: tuple[str, ...]) -> None:
+        if isinstance(node, Block):
+            frames += ("block " + node.name,)
+        elif isinstance(node, Func):
+            frames += ("func " + node.name,)
+
+        line = getattr(node, "line_no", None)
+        # Nested nodes share the line of their parent statement.
+        if line and len(frames) >= len(self.frames.get(line, ())):
+            self.frames[line] = frames
+        for child in getattr(node, "nodes", []):
+            self._add_frames(child, frames)
+
+
+class OpcodeProfile:
+    """
+    Opcode cost of calls to a Tealish program per `.tl` line and per stack.
+
+    `estimated_costs` is set when the costs come from `OPCODE_COSTS` rather
+    than from the node's trace.
+    """
+
+    def __init__(self, source_map: TealishSourceMap, estimated_costs: bool = False):
+        self.source_map = source_map
+        self.estimated_costs = estimated_costs
+        self.calls = 0
+        self.cost = 0
+        # Inner transactions submitted by the calls.
+        self.inner_txns = 0
+        # .tl line -> cost.
+        self.line_costs: Counter[int] = Counter()
+        # Folded stack (program, blocks, lines) -> cost.
+        self.stack_costs: Counter[tuple[str, ...]] = Counter()
+
+    def add(self, trace: list[TraceStep]) -> None:
+        """Add the trace of one call."""
+
+        self.calls += 1
+        # Frames of the lines with a pending `callsub`.
+        callers: list[tuple[str, ...]] = []
+        for step in trace:
+            line = self.source_map.tealish_lines.get(step.teal_line, 0)
+            frames = self._line_frames(line)
+            self.cost += step.cost
+            self.line_costs[line] += step.cost
+            self.stack_costs[
+                (self.source_map.name,)
+                + tuple(frame for caller in callers for frame in caller)
+                + frames
+            ] += step.cost
+
+            if step.op == "callsub":
+                callers.append(frames)
+            elif step.op == "retsub" and callers:
+                callers.pop()
+            elif step.op in ("itxn_begin", "itxn_next"):
+                self.inner_txns += 1
+
+    def block_costs(self) -> dict[str, int]:
+        """Cost per block and function, including the blocks nested in them."""
+
+        costs: Counter[str] = Counter()
+        for line, cost in self.line_costs.items():
+            for depth in range(1, len(self.source_map.frames.get(line, ())) + 1):
+                costs[" > ".join(self.source_map.frames[line][:depth])] += cost
+        return dict(costs.most_common())
+
+    def heat_report(self) -> list[str]:
+        """The `.tl` source with the cost of each line, then the block totals."""
+
+        source_map = self.source_map
+        hottest = max(self.line_costs.values(), default=0)
+        lines = [
+            "{}: opcode cost {} in {} call(s)".format(
+                source_map.name, self.cost, self.calls
+            )
+        ]
+        if self.estimated_costs:
+            lines.append(
+                "Costs are estimates: opcodes missing from OPCODE_COSTS, "
+                "including dynamically priced ones, count as 1."
+            )
+        lines += [
+            "",
+            "{:>6} {:>6}  {:<{}} {:>4}  {}".format(
+                "cost", "%", "", HEAT_BAR_WIDTH, "line", "source"
+            ),
+        ]
+        for line, source in enumerate(source_map.source_lines, 1):
+            cost = self.line_costs.get(line, 0)
+            if cost:
+                bar = "#" * max(1, round(HEAT_BAR_WIDTH * cost / hottest))
+                lines.append(
+                    "{:>6} {:>5.1f}%  {:<{}} {:>4}  {}".format(
+                        cost, 100 * cost / self.cost, bar, HEAT_BAR_WIDTH, line, source
+                    )
+                )
+            else:
+                lines.append(
+                    "{:>6} {:>6}  {:<{}} {:>4}  {}".format(
+                        "", "", "", HEAT_BAR_WIDTH, line, source
+                    )
+                )
+
+        lines += ["", "{:>6} {:>6}  {}".format("cost", "%", "block")]
+        for block, cost in self.block_costs().items():
+            lines.append(
+                "{:>6} {:>5.1f}%  {}".format(cost, 100 * cost / self.cost, block)
+            )
+        return lines
+
+    def folded(self) -> list[str]:
+        """One `frame;frame;... cost` line per stack, for flame graph tools."""
+
+        return [
+            "{} {}".format(";".join(stack), cost)
+            for stack, cost in sorted(self.stack_costs.items())
+        ]
+
+    def as_dict(self) -> dict:
+        return {
+            "program": self.source_map.name,
+            "calls": self.calls,
+            "cost": self.cost,
+            "estimated_costs": self.estimated_costs,
+            "inner_txns": self.inner_txns,
+            "lines": {
+                str(line): cost for line, cost in sorted(self.line_costs.items())
+            },
+            "blocks": self.block_costs(),
+        }
+
+    def _line_frames(self, line: int) -> tuple[str, ...]:
+        source = self.source_map.source_line(line)
+        # ";" separates frames in the folded format.
+        return self.source_map.frames.get(line, ()) + (
+            "{}:{} {}".format(self.source_map.name, line, source.replace(";", ",")),
+        )
+
+
+def build_source_map(contract_name: str) -> TealishSourceMap:
+    """
+    The source map of the build of a contract (e.g. `"5_auction.tl"`), built
+    first if it is stale (see `util.contract_build`).
+    """
+
+    teal_name = path.splitext(contract_name)[0] + ".teal"
+    contract_builder.ensure_built([teal_name])
+    with open(BUILD_PATH_PREFIX + teal_name, "r") as build:
+        return _build_source_map(contract_name, build.read())
+
+
+@lru_cache
+def _build_source_map(contract_name: str, teal: str) -> TealishSourceMap:
+    # Builds compiled by hand may come from the answers.
+    for source_dir in dict.fromkeys(
+        (contract_builder.source_dir, CONTRACTS_PATH_PREFIX + "answers/")
+    ):
+        tealish_path = path.join(source_dir, contract_name)
+        if path.exists(tealish_path):
+            source_map = TealishSourceMap.load(tealish_path)
+            if source_map.teal == teal:
+                return source_map
+
+    raise ValueError(
+        "The build of {} was not compiled from its source.".format(contract_name)
+    )
+
+
+def profile_group(
+    signed_txns: list[SignedTransaction],
+    source_map: TealishSourceMap,
+    client: AlgodClient = algod_client,
+) -> OpcodeProfile:
+    """
+    Evaluate a signed group without committing it and profile its calls to
+    apps whose approval program is `source_map`'s.
+
+    Raises `ValueError` if no call in the group runs that program (e.g. if the
+    app was deployed from an older build of it).
+    """
+
+    compiled = client.compile(source_map.teal, source_map=True)
+    program = b64decode(compiled["result"])
+
+    standin = _is_standin(client)
+    if standin:
+        traces = _simulate_traces(signed_txns, source_map, client)
+    else:
+        traces = _dryrun_traces(
+            signed_txns, source_map, SourceMap(compiled["sourcemap"]), client
+        )
+
+    profile = OpcodeProfile(source_map, estimated_costs=not standin)
+    for signed_txn, trace in zip(signed_txns, traces):
+        if trace is None:
+            continue
+        app_info = client.application_info(signed_txn.transaction.index)
+        if b64decode(app_info["params"]["approval-program"]) == program:
+            profile.add(trace)
+
+    if not profile.calls:
+        raise ValueError(
+            "No app call of the group runs {}; redeploy it from a fresh build.".format(
+                source_map.name
+            )
+        )
+    return profile
+
+
+def _is_standin(client: AlgodClient) -> bool:
+    return client.versions()["build"]["channel"] == "standin"
+
+
+def _simulate_traces(
+    signed_txns: list[SignedTransaction],
+    source_map: TealishSourceMap,
+    client: AlgodClient,
+) -> list[list[TraceStep] | None]:
+    # The stand-in evaluates the TEAL without comments and blank lines (see
+    # `normalize_teal`), so its trace has the lines of that program.
+    teal_lines = [
+        line
+        for line, teal in enumerate(source_map.teal_lines, 1)
+        if normalize_teal(teal)
+    ]
+
+    results = client.algod_request(
+        "POST",
+        "/standin/simulate",
+        data=b"".join(
+            b64decode(encoding.msgpack_encode(signed_txn)) for signed_txn in signed_txns
+        ),
+        headers={"Content-Type": "application/x-binary"},
+    )["txn-results"]
+    return [
+        [
+            TraceStep(teal_lines[step["line"] - 1], step["op"], step["cost"])
+            for step in result["opcode-trace"]
+        ]
+        if "opcode-trace" in result
+        else None
+        for result in results
+    ]
+
+
+def _dryrun_traces(
+    signed_txns: list[SignedTransaction],
+    source_map: TealishSourceMap,
+    teal_source_map: SourceMap,
+    client: AlgodClient,
+) -> list[list[TraceStep] | None]:
+    response = client.dryrun(create_dryrun(client, signed_txns))
+    if response.get("error"):
+        raise ValueError(response["error"])
+
+    traces: list[list[TraceStep] | None] = []
+    for result in response["txns"]:
+        if "app-call-trace" not in result:
+            traces.append(None)
+            continue
+
+        trace = []
+        for step in result["app-call-trace"]:
+            # Source map lines are counted from 0.
+            line = teal_source_map.pc_to_line[step["pc"]] + 1
+            op = _opcode(source_map.teal_lines[line - 1])
+            trace.append(TraceStep(line, op, OPCODE_COSTS.get(op, 1)))
+        traces.append(trace)
+    return traces
+
+
+def _opcode(teal: str) -> str:
+    tokens = tokenize(teal)
+    while tokens and tokens[0].endswith(":") and not tokens[0].startswith('"'):
+        tokens = tokens[1:]
+    return tokens[0] if tokens else ""
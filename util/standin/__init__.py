@@ -0,0 +1,17 @@
+"""
+In-process stand-in for the localnet algod and KMD.
+
+Set `ALGORAND_NODE=standin` to make `util.client` start one and point its
+clients at it, so tests run without a node. Programs are "compiled" to their
+TEAL source and run by a TEAL interpreter (`util.standin.avm`) against an
+in-memory ledger (`util.standin.ledger`) that seals every group into its own
+block immediately.
+"""
+
+from util.standin.node import StandInNode
+
+
+def start_standin_node(port: int = 0) -> StandInNode:
+    """Start a stand-in node on `port` (any free port by default)."""
+
+    return StandInNode(port=port).start()
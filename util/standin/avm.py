@@ -0,0 +1,846 @@
+"""
+A TEAL interpreter covering the opcodes used by the contracts in `contracts/`.
+
+Programs are kept as TEAL source (see `util.teal.normalize_teal`), parsed once into a
+list of `Instruction`s and evaluated against a context object that gives
+access to the transaction group and ledger state (see
+`util.standin.ledger.AppCallContext`).
+"""
+
+from base64 import b32decode, b64decode
+from hashlib import sha256
+from math import isqrt
+from typing import Any, Callable, NamedTuple
+
+from algosdk.encoding import checksum, decode_address
+from Cryptodome.Hash import keccak
+
+from util.teal import OPCODE_COSTS, tokenize
+
+MAX_UINT64 = 2**64 - 1
+MAX_STACK_DEPTH = 1000
+MAX_BYTES_LENGTH = 4096
+APP_CALL_BUDGET = 700
+
+NAMED_INTS = {
+    "unknown": 0,
+    "pay": 1,
+    "keyreg": 2,
+    "acfg": 3,
+    "axfer": 4,
+    "afrz": 5,
+    "appl": 6,
+    "NoOp": 0,
+    "OptIn": 1,
+    "CloseOut": 2,
+    "ClearState": 3,
+    "UpdateApplication": 4,
+    "DeleteApplication": 5,
+}
+
+TYPE_ENUMS = {
+    "pay": 1,
+    "keyreg": 2,
+    "acfg": 3,
+    "axfer": 4,
+    "afrz": 5,
+    "appl": 6,
+}
+TYPE_NAMES = {value: name for name, value in TYPE_ENUMS.items()}
+
+
+class LogicError(Exception):
+    """Raised when a program fails during evaluation."""
+
+
+class Instruction(NamedTuple):
+    op: str
+    args: tuple
+    line: int
+
+
+class Program:
+    """Parsed TEAL program with resolved labels."""
+
+    def __init__(self, source: str):
+        self.instructions: list[Instruction] = []
+        self.labels: dict[str, int] = {}
+        self.version = 1
+
+        for line_number, line in enumerate(source.splitlines(), 1):
+            tokens = tokenize(line)
+            if not tokens:
+                continue
+            if tokens[0] == "#pragma":
+                if tokens[1:2] == ["version"]:
+                    self.version = int(tokens[2])
+                continue
+            while tokens and tokens[0].endswith(":") and not tokens[0].startswith('"'):
+                self.labels[tokens[0][:-1]] = len(self.instructions)
+                tokens = tokens[1:]
+            if tokens:
+                self.instructions.append(
+                    Instruction(tokens[0], parse_immediates(tokens), line_number)
+                )
+
+    def label(self, name: str) -> int:
+        try:
+            return self.labels[name]
+        except KeyError:
+            raise LogicError("unknown label {}".format(name))
+
+
+def parse_bytes(tokens: list[str]) -> bytes:
+    token = tokens[0]
+    if token.startswith('"'):
+        return parse_string_literal(token)
+    if token.startswith("0x"):
+        return bytes.fromhex(token[2:])
+    if token in ("base64", "b64"):
+        return b64decode(tokens[1])
+    if token in ("base32", "b32"):
+        return _b32decode(tokens[1])
+    for prefix, decode in (
+        ("base64(", b64decode),
+        ("b64(", b64decode),
+        ("base32(", _b32decode),
+        ("b32(", _b32decode),
+    ):
+        if token.startswith(prefix):
+            return decode(token[len(prefix) : -1])
+    raise LogicError("cannot parse byte constant {}".format(token))
+
+
+def _b32decode(value: str) -> bytes:
+    return b32decode(value + "=" * (-len(value) % 8))
+
+
+def parse_string_literal(token: str) -> bytes:
+    escapes = {"n": b"\n", "r": b"\r", "t": b"\t", '"': b'"', "\\": b"\\"}
+    body = token[1:-1]
+    result = bytearray()
+    i = 0
+    while i < len(body):
+        if body[i] == "\\":
+            if body[i + 1] == "x":
+                result += bytes.fromhex(body[i + 2 : i + 4])
+                i += 4
+            else:
+                result += escapes[body[i + 1]]
+                i += 2
+        else:
+            result += body[i].encode("utf-8")
+            i += 1
+    return bytes(result)
+
+
+def parse_int(token: str) -> int:
+    if token in NAMED_INTS:
+        return NAMED_INTS[token]
+    return int(token, 0)
+
+
+def parse_immediates(tokens: list[str]) -> tuple:
+    op, rest = tokens[0], tokens[1:]
+    if op in ("int", "pushint"):
+        return (parse_int(rest[0]),)
+    if op in ("byte", "pushbytes"):
+        return (parse_bytes(rest),)
+    if op == "pushints" or op == "intcblock":
+        return tuple(parse_int(token) for token in rest)
+    if op == "pushbytess" or op == "bytecblock":
+        return tuple(parse_bytes([token]) for token in rest)
+    if op == "addr":
+        return (decode_address(rest[0]),)
+    if op == "method":
+        return (checksum(parse_string_literal(rest[0]))[:4],)
+    if op in (
+        "txn",
+        "txna",
+        "txnas",
+        "global",
+        "itxn",
+        "itxna",
+        "itxn_field",
+        "gtxns",
+        "gtxnsa",
+    ):
+        return tuple(rest[:1]) + tuple(int(token) for token in rest[1:])
+    if op in ("gtxn", "gtxna"):
+        return (int(rest[0]), rest[1]) + tuple(int(token) for token in rest[2:])
+    if op in (
+        "asset_holding_get",
+        "asset_params_get",
+        "app_params_get",
+        "acct_params_get",
+    ):
+        return tuple(rest)
+    if op in ("b", "bz", "bnz", "callsub"):
+        return (rest[0],)
+    if op in ("switch", "match"):
+        return tuple(rest)
+    return tuple(parse_int(token) for token in rest)
+
+
+class Frame(NamedTuple):
+    return_pc: int
+    height: int
+    args: int
+    returns: int
+
+
+def evaluate(
+    program: Program,
+    context: Any,
+    trace: list[tuple[int, str, int]] | None = None,
+) -> bool:
+    """
+    Run `program` and return whether it approved.
+
+    If `trace` is given, a `(line, opcode, cost)` entry is appended to it for
+    every instruction executed.
+    """
+
+    return _Evaluator(program, context, trace).run()
+
+
+def _int(value: Any) -> int:
+    if not isinstance(value, int):
+        raise LogicError("expected uint64 but got bytes")
+    return value
+
+
+def _bytes(value: Any) -> bytes:
+    if not isinstance(value, bytes):
+        raise LogicError("expected bytes but got uint64")
+    return value
+
+
+def _check(value: int) -> int:
+    if value < 0:
+        raise LogicError("- would result negative")
+    if value > MAX_UINT64:
+        raise LogicError("overflow")
+    return value
+
+
+def _check_bytes(value: bytes) -> bytes:
+    if len(value) > MAX_BYTES_LENGTH:
+        raise LogicError("bytes too long")
+    return value
+
+
+class _Evaluator:
+    def __init__(self, program: Program, context: Any, trace: list | None):
+        self.program = program
+        self.context = context
+        self.trace = trace
+        self.stack: list[int | bytes] = []
+        self.scratch: list[int | bytes] = [0] * 256
+        self.frames: list[Frame] = []
+        self.intc: tuple = ()
+        self.bytec: tuple = ()
+        self.pc = 0
+
+    def push(self, value: int | bytes) -> None:
+        if len(self.stack) >= MAX_STACK_DEPTH:
+            raise LogicError("stack overflow")
+        self.stack.append(value)
+
+    def pop(self) -> int | bytes:
+        if not self.stack:
+            raise LogicError("stack underflow")
+        return self.stack.pop()
+
+    def pop_int(self) -> int:
+        return _int(self.pop())
+
+    def pop_bytes(self) -> bytes:
+        return _bytes(self.pop())
+
+    def run(self) -> bool:
+        instructions = self.program.instructions
+        while self.pc < len(instructions):
+            instruction = instructions[self.pc]
+            cost = OPCODE_COSTS.get(instruction.op, 1)
+            self.context.opcode_budget -= cost
+            if self.context.opcode_budget < 0:
+                raise LogicError(
+                    "dynamic cost budget exceeded, line {}".format(instruction.line)
+                )
+            if self.trace is not None:
+                self.trace.append((instruction.line, instruction.op, cost))
+
+            self.pc += 1
+            handler = _HANDLERS.get(instruction.op)
+            if handler is None:
+                raise LogicError(
+                    "unsupported opcode {} at line {}".format(
+                        instruction.op, instruction.line
+                    )
+                )
+            try:
+                result = handler(self, *instruction.args)
+            except LogicError as e:
+                if " at line " in str(e):
+                    raise
+                raise LogicError("{} at line {}".format(e, instruction.line)) from e
+            if result is not None:
+                return result
+
+        if len(self.stack) != 1:
+            raise LogicError(
+                "stack len is {} instead of 1 at end of program".format(len(self.stack))
+            )
+        value = self.pop()
+        if not isinstance(value, int):
+            raise LogicError("stack finished with bytes not int")
+        return value != 0
+
+    # Flow control
+
+    def op_err(self) -> None:
+        raise LogicError("err opcode executed")
+
+    def op_return(self) -> bool:
+        return self.pop_int() != 0
+
+    def op_assert(self) -> None:
+        if self.pop_int() == 0:
+            raise LogicError("assert failed pc={}".format(self.pc - 1))
+
+    def op_b(self, label: str) -> None:
+        self.pc = self.program.label(label)
+
+    def op_bz(self, label: str) -> None:
+        if self.pop_int() == 0:
+            self.pc = self.program.label(label)
+
+    def op_bnz(self, label: str) -> None:
+        if self.pop_int() != 0:
+            self.pc = self.program.label(label)
+
+    def op_switch(self, *labels: str) -> None:
+        index = self.pop_int()
+        if index < len(labels):
+            self.pc = self.program.label(labels[index])
+
+    def op_match(self, *labels: str) -> None:
+        target = self.pop()
+        candidates = [self.pop() for _ in labels][::-1]
+        for label, candidate in zip(labels, candidates):
+            if candidate == target:
+                self.pc = self.program.label(label)
+                return
+
+    def op_callsub(self, label: str) -> None:
+        self.frames.append(Frame(self.pc, len(self.stack), 0, 0))
+        self.pc = self.program.label(label)
+
+    def op_proto(self, args: int, returns: int) -> None:
+        frame = self.frames[-1]
+        self.frames[-1] = Frame(frame.return_pc, len(self.stack) - args, args, returns)
+
+    def op_retsub(self) -> None:
+        if not self.frames:
+            raise LogicError("retsub with empty callstack")
+        frame = self.frames.pop()
+        if frame.args or frame.returns:
+            results = self.stack[len(self.stack) - frame.returns :]
+            del self.stack[frame.height :]
+            self.stack.extend(results)
+        self.pc = frame.return_pc
+
+    def op_frame_dig(self, offset: int) -> None:
+        self.push(self.stack[self.frames[-1].height + offset])
+
+    def op_frame_bury(self, offset: int) -> None:
+        self.stack[self.frames[-1].height + offset] = self.pop()
+
+    # Constants
+
+    def op_int(self, value: int) -> None:
+        self.push(value)
+
+    op_pushint = op_int
+
+    def op_pushints(self, *values: int) -> None:
+        for value in values:
+            self.push(value)
+
+    def op_byte(self, value: bytes) -> None:
+        self.push(value)
+
+    op_pushbytes = op_byte
+    op_addr = op_byte
+    op_method = op_byte
+
+    def op_pushbytess(self, *values: bytes) -> None:
+        for value in values:
+            self.push(value)
+
+    def op_intcblock(self, *values: int) -> None:
+        self.intc = values
+
+    def op_bytecblock(self, *values: bytes) -> None:
+        self.bytec = values
+
+    def op_intc(self, index: int) -> None:
+        self.push(self.intc[index])
+
+    def op_bytec(self, index: int) -> None:
+        self.push(self.bytec[index])
+
+    # Stack manipulation
+
+    def op_pop(self) -> None:
+        self.pop()
+
+    def op_popn(self, n: int) -> None:
+        for _ in range(n):
+            self.pop()
+
+    def op_dup(self) -> None:
+        value = self.pop()
+        self.push(value)
+        self.push(value)
+
+    def op_dup2(self) -> None:
+        b, a = self.pop(), self.pop()
+        for value in (a, b, a, b):
+            self.push(value)
+
+    def op_dupn(self, n: int) -> None:
+        value = self.pop()
+        for _ in range(n + 1):
+            self.push(value)
+
+    def op_swap(self) -> None:
+        b, a = self.pop(), self.pop()
+        self.push(b)
+        self.push(a)
+
+    def op_dig(self, depth: int) -> None:
+        self.push(self.stack[-1 - depth])
+
+    def op_bury(self, depth: int) -> None:
+        value = self.pop()
+        self.stack[-depth] = value
+
+    def op_cover(self, depth: int) -> None:
+        value = self.pop()
+        self.stack.insert(len(self.stack) - depth, value)
+
+    def op_uncover(self, depth: int) -> None:
+        self.push(self.stack.pop(-1 - depth))
+
+    def op_select(self) -> None:
+        condition, b, a = self.pop_int(), self.pop(), self.pop()
+        self.push(b if condition else a)
+
+    # Scratch space
+
+    def op_load(self, index: int) -> None:
+        self.push(self.scratch[index])
+
+    def op_store(self, index: int) -> None:
+        self.scratch[index] = self.pop()
+
+    def op_loads(self) -> None:
+        self.push(self.scratch[self.pop_int()])
+
+    def op_stores(self) -> None:
+        value = self.pop()
+        self.scratch[self.pop_int()] = value
+
+    # Arithmetic and logic
+
+    def _binary_int(self, operation: Callable[[int, int], int]) -> None:
+        b, a = self.pop_int(), self.pop_int()
+        self.push(_check(operation(a, b)))
+
+    def op_add(self) -> None:
+        self._binary_int(lambda a, b: a + b)
+
+    def op_sub(self) -> None:
+        self._binary_int(lambda a, b: a - b)
+
+    def op_mul(self) -> None:
+        self._binary_int(lambda a, b: a * b)
+
+    def op_div(self) -> None:
+        b, a = self.pop_int(), self.pop_int()
+        if b == 0:
+            raise LogicError("/ 0")
+        self.push(a // b)
+
+    def op_mod(self) -> None:
+        b, a = self.pop_int(), self.pop_int()
+        if b == 0:
+            raise LogicError("% 0")
+        self.push(a % b)
+
+    def op_lt(self) -> None:
+        self._binary_int(lambda a, b: int(a < b))
+
+    def op_gt(self) -> None:
+        self._binary_int(lambda a, b: int(a > b))
+
+    def op_le(self) -> None:
+        self._binary_int(lambda a, b: int(a <= b))
+
+    def op_ge(self) -> None:
+        self._binary_int(lambda a, b: int(a >= b))
+
+    def op_and(self) -> None:
+        self._binary_int(lambda a, b: int(bool(a) and bool(b)))
+
+    def op_or(self) -> None:
+        self._binary_int(lambda a, b: int(bool(a) or bool(b)))
+
+    def op_bit_and(self) -> None:
+        self._binary_int(lambda a, b: a & b)
+
+    def op_bit_or(self) -> None:
+        self._binary_int(lambda a, b: a | b)
+
+    def op_bit_xor(self) -> None:
+        self._binary_int(lambda a, b: a ^ b)
+
+    def op_bit_not(self) -> None:
+        self.push(MAX_UINT64 ^ self.pop_int())
+
+    def op_not(self) -> None:
+        self.push(int(self.pop_int() == 0))
+
+    def op_eq(self) -> None:
+        b, a = self.pop(), self.pop()
+        if type(a) is not type(b):
+            raise LogicError("cannot compare uint64 to bytes")
+        self.push(int(a == b))
+
+    def op_ne(self) -> None:
+        self.op_eq()
+        self.push(1 - self.pop_int())
+
+    def op_sqrt(self) -> None:
+        self.push(isqrt(self.pop_int()))
+
+    def op_exp(self) -> None:
+        self._binary_int(lambda a, b: a**b)
+
+    def op_shl(self) -> None:
+        self._binary_int(lambda a, b: (a << b) & MAX_UINT64)
+
+    def op_shr(self) -> None:
+        self._binary_int(lambda a, b: a >> b)
+
+    def op_min(self) -> None:
+        self._binary_int(min)
+
+    # Byte manipulation
+
+    def op_itob(self) -> None:
+        self.push(self.pop_int().to_bytes(8, "big"))
+
+    def op_btoi(self) -> None:
+        value = self.pop_bytes()
+        if len(value) > 8:
+            raise LogicError("btoi arg too long, got {} bytes".format(len(value)))
+        self.push(int.from_bytes(value, "big"))
+
+    def op_len(self) -> None:
+        self.push(len(self.pop_bytes()))
+
+    def op_concat(self) -> None:
+        b, a = self.pop_bytes(), self.pop_bytes()
+        self.push(_check_bytes(a + b))
+
+    def op_bzero(self) -> None:
+        self.push(_check_bytes(bytes(self.pop_int())))
+
+    def _extract(self, value: bytes, start: int, length: int) -> bytes:
+        if start > len(value) or start + length > len(value):
+            raise LogicError(
+                "extraction end {} is beyond length: {}".format(
+                    start + length, len(value)
+                )
+            )
+        return value[start : start + length]
+
+    def op_substring(self, start: int, end: int) -> None:
+        value = self.pop_bytes()
+        if end < start:
+            raise LogicError("substring end before start")
+        self.push(self._extract(value, start, end - start))
+
+    def op_substring3(self) -> None:
+        end, start, value = self.pop_int(), self.pop_int(), self.pop_bytes()
+        if end < start:
+            raise LogicError("substring end before start")
+        self.push(self._extract(value, start, end - start))
+
+    def op_extract(self, start: int | None = None, length: int | None = None) -> None:
+        if start is None:
+            return self.op_extract3()
+        value = self.pop_bytes()
+        if length == 0:
+            length = len(value) - start
+            if length < 0:
+                raise LogicError("extraction start {} is beyond length".format(start))
+        self.push(self._extract(value, start, length))
+
+    def op_extract3(self) -> None:
+        length, start, value = self.pop_int(), self.pop_int(), self.pop_bytes()
+        self.push(self._extract(value, start, length))
+
+    def _extract_uint(self, size: int) -> None:
+        start, value = self.pop_int(), self.pop_bytes()
+        self.push(int.from_bytes(self._extract(value, start, size), "big"))
+
+    def op_extract_uint16(self) -> None:
+        self._extract_uint(2)
+
+    def op_extract_uint32(self) -> None:
+        self._extract_uint(4)
+
+    def op_extract_uint64(self) -> None:
+        self._extract_uint(8)
+
+    def _replace(self, value: bytes, start: int, replacement: bytes) -> bytes:
+        if start + len(replacement) > len(value):
+            raise LogicError(
+                "replacement end {} beyond original length: {}".format(
+                    start + len(replacement), len(value)
+                )
+            )
+        return value[:start] + replacement + value[start + len(replacement) :]
+
+    def op_replace(self, start: int | None = None) -> None:
+        if start is None:
+            return self.op_replace3()
+        replacement, value = self.pop_bytes(), self.pop_bytes()
+        self.push(self._replace(value, start, replacement))
+
+    op_replace2 = op_replace
+
+    def op_replace3(self) -> None:
+        replacement, start, value = (
+            self.pop_bytes(),
+            self.pop_int(),
+            self.pop_bytes(),
+        )
+        self.push(self._replace(value, start, replacement))
+
+    def op_getbyte(self) -> None:
+        index, value = self.pop_int(), self.pop_bytes()
+        self.push(self._extract(value, index, 1)[0])
+
+    def op_setbyte(self) -> None:
+        byte, index, value = self.pop_int(), self.pop_int(), self.pop_bytes()
+        self.push(self._replace(value, index, bytes([byte])))
+
+    def op_getbit(self) -> None:
+        index, value = self.pop_int(), self.pop()
+        if isinstance(value, int):
+            self.push((value >> index) & 1)
+        else:
+            self.push((value[index // 8] >> (7 - index % 8)) & 1)
+
+    def op_sha256(self) -> None:
+        self.push(sha256(self.pop_bytes()).digest())
+
+    def op_sha512_256(self) -> None:
+        self.push(checksum(self.pop_bytes()))
+
+    def op_keccak256(self) -> None:
+        self.push(keccak.new(data=self.pop_bytes(), digest_bits=256).digest())
+
+    def op_bitlen(self) -> None:
+        value = self.pop()
+        if isinstance(value, bytes):
+            value = int.from_bytes(value, "big")
+        self.push(value.bit_length())
+
+    def op_log(self) -> None:
+        self.context.log(self.pop_bytes())
+
+    # Transaction and global fields
+
+    def op_txn(self, field: str, index: int | None = None) -> None:
+        txn = self.context.group[self.context.group_index]
+        self.push(self.context.txn_field(txn, field, index))
+
+    op_txna = op_txn
+
+    def op_txnas(self, field: str) -> None:
+        self.op_txn(field, self.pop_int())
+
+    def op_gtxn(self, group_index: int, field: str, index: int | None = None) -> None:
+        self.push(self.context.txn_field(self.context.group[group_index], field, index))
+
+    op_gtxna = op_gtxn
+
+    def op_gtxns(self, field: str, index: int | None = None) -> None:
+        group_index = self.pop_int()
+        if group_index >= len(self.context.group):
+            raise LogicError("gtxns lookup {} beyond group".format(group_index))
+        self.push(self.context.txn_field(self.context.group[group_index], field, index))
+
+    op_gtxnsa = op_gtxns
+
+    def op_global(self, field: str) -> None:
+        self.push(self.context.global_field(field))
+
+    # State access
+
+    def op_app_global_get(self) -> None:
+        self.push(self.context.global_get(self.context.app_id, self.pop_bytes()))
+
+    def op_app_global_get_ex(self) -> None:
+        key, app = self.pop_bytes(), self.pop_int()
+        value, exists = self.context.global_get_ex(app, key)
+        self.push(value)
+        self.push(exists)
+
+    def op_app_global_put(self) -> None:
+        value, key = self.pop(), self.pop_bytes()
+        self.context.global_put(key, value)
+
+    def op_app_global_del(self) -> None:
+        self.context.global_del(self.pop_bytes())
+
+    def op_app_local_get(self) -> None:
+        key, account = self.pop_bytes(), self.pop()
+        self.push(self.context.local_get(account, self.context.app_id, key))
+
+    def op_app_local_get_ex(self) -> None:
+        key, app, account = self.pop_bytes(), self.pop_int(), self.pop()
+        value, exists = self.context.local_get_ex(account, app, key)
+        self.push(value)
+        self.push(exists)
+
+    def op_app_local_put(self) -> None:
+        value, key, account = self.pop(), self.pop_bytes(), self.pop()
+        self.context.local_put(account, key, value)
+
+    def op_app_local_del(self) -> None:
+        key, account = self.pop_bytes(), self.pop()
+        self.context.local_del(account, key)
+
+    def op_app_opted_in(self) -> None:
+        app, account = self.pop_int(), self.pop()
+        self.push(self.context.opted_in(account, app))
+
+    def op_balance(self) -> None:
+        self.push(self.context.balance(self.pop()))
+
+    def op_min_balance(self) -> None:
+        self.push(self.context.min_balance(self.pop()))
+
+    def op_asset_holding_get(self, field: str) -> None:
+        asset, account = self.pop_int(), self.pop()
+        value, exists = self.context.asset_holding_get(account, asset, field)
+        self.push(value)
+        self.push(exists)
+
+    def op_asset_params_get(self, field: str) -> None:
+        value, exists = self.context.asset_params_get(self.pop_int(), field)
+        self.push(value)
+        self.push(exists)
+
+    def op_app_params_get(self, field: str) -> None:
+        value, exists = self.context.app_params_get(self.pop_int(), field)
+        self.push(value)
+        self.push(exists)
+
+    def op_acct_params_get(self, field: str) -> None:
+        value, exists = self.context.acct_params_get(self.pop(), field)
+        self.push(value)
+        self.push(exists)
+
+    # Boxes
+
+    def op_box_create(self) -> None:
+        size, name = self.pop_int(), self.pop_bytes()
+        self.push(self.context.box_create(name, size))
+
+    def op_box_extract(self) -> None:
+        length, start, name = self.pop_int(), self.pop_int(), self.pop_bytes()
+        self.push(self._extract(self.context.box_get(name), start, length))
+
+    def op_box_replace(self) -> None:
+        value, start, name = self.pop_bytes(), self.pop_int(), self.pop_bytes()
+        self.context.box_put(
+            name, self._replace(self.context.box_get(name), start, value)
+        )
+
+    def op_box_del(self) -> None:
+        self.push(self.context.box_del(self.pop_bytes()))
+
+    def op_box_len(self) -> None:
+        value = self.context.box_get_ex(self.pop_bytes())
+        self.push(len(value) if value is not None else 0)
+        self.push(int(value is not None))
+
+    def op_box_get(self) -> None:
+        value = self.context.box_get_ex(self.pop_bytes())
+        self.push(value if value is not None else b"")
+        self.push(int(value is not None))
+
+    def op_box_put(self) -> None:
+        value, name = self.pop_bytes(), self.pop_bytes()
+        existing = self.context.box_get_ex(name)
+        if existing is None:
+            self.context.box_create(name, len(value))
+        elif len(existing) != len(value):
+            raise LogicError("box_put wrong size")
+        self.context.box_put(name, value)
+
+    # Inner transactions
+
+    def op_itxn_begin(self) -> None:
+        self.context.itxn_begin()
+
+    def op_itxn_next(self) -> None:
+        self.context.itxn_next()
+
+    def op_itxn_field(self, field: str) -> None:
+        self.context.itxn_field(field, self.pop())
+
+    def op_itxn_submit(self) -> None:
+        self.context.itxn_submit()
+
+    def op_itxn(self, field: str, index: int | None = None) -> None:
+        self.push(self.context.itxn_field_get(field, index))
+
+    op_itxna = op_itxn
+
+
+_SYMBOLS = {
+    "+": "add",
+    "-": "sub",
+    "*": "mul",
+    "/": "div",
+    "%": "mod",
+    "<": "lt",
+    ">": "gt",
+    "<=": "le",
+    ">=": "ge",
+    "&&": "and",
+    "||": "or",
+    "==": "eq",
+    "!=": "ne",
+    "!": "not",
+    "&": "bit_and",
+    "|": "bit_or",
+    "^": "bit_xor",
+    "~": "bit_not",
+}
+
+_HANDLERS: dict[str, Callable] = {
+    name[3:]: handler
+    for name, handler in vars(_Evaluator).items()
+    if name.startswith("op_")
+}
+_HANDLERS.update({symbol: _HANDLERS[name] for symbol, name in _SYMBOLS.items()})
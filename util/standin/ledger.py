@@ -0,0 +1,1252 @@
+"""
+In-memory ledger for the stand-in node.
+
+Transactions are handled in their msgpack form (short field names, raw bytes)
+exactly as they arrive at `POST /v2/transactions`. Every accepted group is
+applied atomically and immediately sealed into its own block.
+"""
+
+from base64 import b32encode, b64encode
+from copy import copy
+from hashlib import sha256
+from threading import Condition
+from time import time
+from typing import Any
+
+import msgpack
+from algosdk.encoding import checksum, decode_address, encode_address
+from algosdk.logic import get_application_address
+from nacl.exceptions import BadSignatureError
+from nacl.signing import VerifyKey
+
+from util.standin.avm import (
+    APP_CALL_BUDGET,
+    TYPE_ENUMS,
+    TYPE_NAMES,
+    LogicError,
+    Program,
+    evaluate,
+)
+
+MIN_FEE = 1000
+MIN_BALANCE = 100_000
+ASSET_MIN_BALANCE = 100_000
+APP_MIN_BALANCE = 100_000
+APP_PAGE_MIN_BALANCE = 100_000
+SCHEMA_UINT_MIN_BALANCE = 28_500
+SCHEMA_BYTES_MIN_BALANCE = 50_000
+BOX_FLAT_MIN_BALANCE = 2_500
+BOX_BYTE_MIN_BALANCE = 400
+MAX_TXN_LIFE = 1000
+MAX_INNER_TXNS = 256
+MAX_BOX_SIZE = 32768
+
+ZERO_ADDRESS = bytes(32)
+# Original value of a key that did not exist, in the undo log.
+MISSING = object()
+
+# Fields holding addresses, rendered as base32 addresses in JSON responses.
+ADDRESS_FIELDS = {
+    "snd",
+    "rcv",
+    "close",
+    "asnd",
+    "arcv",
+    "aclose",
+    "rekey",
+    "m",
+    "r",
+    "f",
+    "c",
+}
+
+# AVM transaction field name -> (msgpack field, default).
+TXN_FIELDS: dict[str, tuple[str, Any]] = {
+    "Sender": ("snd", ZERO_ADDRESS),
+    "Fee": ("fee", 0),
+    "FirstValid": ("fv", 0),
+    "LastValid": ("lv", 0),
+    "Note": ("note", b""),
+    "Lease": ("lx", bytes(32)),
+    "Receiver": ("rcv", ZERO_ADDRESS),
+    "Amount": ("amt", 0),
+    "CloseRemainderTo": ("close", ZERO_ADDRESS),
+    "XferAsset": ("xaid", 0),
+    "AssetAmount": ("aamt", 0),
+    "AssetSender": ("asnd", ZERO_ADDRESS),
+    "AssetReceiver": ("arcv", ZERO_ADDRESS),
+    "AssetCloseTo": ("aclose", ZERO_ADDRESS),
+    "ApplicationID": ("apid", 0),
+    "OnCompletion": ("apan", 0),
+    "RekeyTo": ("rekey", ZERO_ADDRESS),
+    "ConfigAsset": ("caid", 0),
+    "ApprovalProgram": ("apap", b""),
+    "ClearStateProgram": ("apsu", b""),
+    "ExtraProgramPages": ("apep", 0),
+}
+
+# AVM asset params field name -> (msgpack field, default).
+ASSET_PARAMS_FIELDS: dict[str, tuple[str, Any]] = {
+    "ConfigAssetTotal": ("t", 0),
+    "ConfigAssetDecimals": ("dc", 0),
+    "ConfigAssetDefaultFrozen": ("df", 0),
+    "ConfigAssetUnitName": ("un", b""),
+    "ConfigAssetName": ("an", b""),
+    "ConfigAssetURL": ("au", b""),
+    "ConfigAssetMetadataHash": ("am", b""),
+    "ConfigAssetManager": ("m", ZERO_ADDRESS),
+    "ConfigAssetReserve": ("r", ZERO_ADDRESS),
+    "ConfigAssetFreeze": ("f", ZERO_ADDRESS),
+    "ConfigAssetClawback": ("c", ZERO_ADDRESS),
+}
+
+# AVM array field name -> msgpack field.
+TXN_ARRAY_FIELDS = {
+    "ApplicationArgs": "apaa",
+    "Accounts": "apat",
+    "Assets": "apas",
+    "Applications": "apfa",
+}
+
+
+class LedgerError(Exception):
+    """Raised when a transaction group is rejected."""
+
+
+class Account:
+    def __init__(self) -> None:
+        self.amount = 0
+        self.auth_addr: bytes | None = None
+        # Asset id -> amount held.
+        self.assets: dict[int, int] = {}
+        self.created_assets: set[int] = set()
+        self.created_apps: set[int] = set()
+        # App id -> local state.
+        self.local_states: dict[int, dict[bytes, int | bytes]] = {}
+
+    def copy(self) -> "Account":
+        account = copy(self)
+        account.assets = dict(self.assets)
+        account.created_assets = set(self.created_assets)
+        account.created_apps = set(self.created_apps)
+        account.local_states = {
+            app_id: dict(local_state)
+            for app_id, local_state in self.local_states.items()
+        }
+        return account
+
+
+class App:
+    def __init__(
+        self,
+        id: int,
+        creator: bytes,
+        approval: bytes,
+        clear: bytes,
+        global_schema: tuple[int, int],
+        local_schema: tuple[int, int],
+        extra_pages: int,
+    ) -> None:
+        self.id = id
+        self.address = decode_address(get_application_address(id))
+        self.creator = creator
+        self.approval = approval
+        self.clear = clear
+        self.global_schema = global_schema
+        self.local_schema = local_schema
+        self.extra_pages = extra_pages
+        self.global_state: dict[bytes, int | bytes] = {}
+        self.boxes: dict[bytes, bytes] = {}
+
+    def copy(self) -> "App":
+        # Boxes can be large and are saved one by one as they are written
+        # (see `LedgerState.save`), so the copy shares them.
+        app = copy(self)
+        app.global_state = dict(self.global_state)
+        return app
+
+
+class Asset:
+    def __init__(self, id: int, creator: bytes, params: dict) -> None:
+        self.id = id
+        self.creator = creator
+        self.params = params
+
+    def copy(self) -> "Asset":
+        asset = copy(self)
+        asset.params = dict(self.params)
+        return asset
+
+
+class LedgerState:
+    """
+    Everything a transaction group can change.
+
+    Between `begin()` and `commit()` or `rollback()`, the original value of
+    every account, app, asset and box the group touches is saved to an undo
+    log the first time it is looked up (or written, for boxes), so a rejected
+    group only costs copies of what it touched.
+    """
+
+    def __init__(self) -> None:
+        self.accounts: _Journaled[bytes, Account] = _Journaled(self)
+        self.apps: _Journaled[int, App] = _Journaled(self)
+        self.assets: _Journaled[int, Asset] = _Journaled(self)
+        # App address -> app id, to charge box MBR to the right app.
+        self.app_addresses: _Journaled[bytes, int] = _Journaled(self)
+        self.txn_counter = 1000
+
+        # (mapping, key, original value), or None outside of a group.
+        self._undo_log: list[tuple[dict, Any, Any]] | None = None
+        self._saved: set[tuple[int, Any]] = set()
+        self._saved_txn_counter = 0
+
+    def begin(self) -> None:
+        self._undo_log = []
+        self._saved_txn_counter = self.txn_counter
+
+    def save(self, mapping: dict, key: Any) -> None:
+        """Save the original value of `mapping[key]` if the group is new to it."""
+
+        if self._undo_log is None or (id(mapping), key) in self._saved:
+            return
+        self._saved.add((id(mapping), key))
+        value = dict.get(mapping, key, MISSING)
+        if isinstance(value, (Account, App, Asset)):
+            value = value.copy()
+        self._undo_log.append((mapping, key, value))
+
+    def commit(self) -> None:
+        self._undo_log = None
+        self._saved.clear()
+
+    def rollback(self) -> None:
+        for mapping, key, value in reversed(self._undo_log or []):
+            if value is MISSING:
+                dict.pop(mapping, key, None)
+            else:
+                dict.__setitem__(mapping, key, value)
+        self.txn_counter = self._saved_txn_counter
+        self.commit()
+
+
+class _Journaled(dict):
+    """A dict saving the original value of every key looked up in a group."""
+
+    def __init__(self, state: LedgerState) -> None:
+        super().__init__()
+        self._state = state
+
+    def __getitem__(self, key: Any) -> Any:
+        self._state.save(self, key)
+        return super().__getitem__(key)
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        self._state.save(self, key)
+        return super().get(key, default)
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        self._state.save(self, key)
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key: Any) -> None:
+        self._state.save(self, key)
+        super().__delitem__(key)
+
+    def pop(self, key: Any, *default: Any) -> Any:
+        self._state.save(self, key)
+        return super().pop(key, *default)
+
+
+class Ledger:
+    def __init__(self, genesis_id: str = "standin-v1") -> None:
+        self.genesis_id = genesis_id
+        self.genesis_hash = sha256(genesis_id.encode()).digest()
+
+        self.state = LedgerState()
+        self.round = 0
+        self.timestamp = int(time())
+        self.timestamp_offset = 0
+        self.blocks: dict[int, dict] = {0: self._block_header(0, [])}
+        # Tx id -> pending transaction info (JSON form).
+        self.confirmed: dict[str, dict] = {}
+
+        self.condition = Condition()
+        self._programs: dict[bytes, Program] = {}
+
+    def fund(self, address: bytes, amount: int) -> None:
+        """Credit `address` outside of any transaction (genesis allocation)."""
+
+        with self.condition:
+            self._account(address).amount += amount
+
+    def submit(self, signed_txns: list[dict], simulate: bool = False) -> list:
+        """
+        Apply `signed_txns` as one atomic group and seal them into a new block.
+
+        With `simulate`, the group is evaluated and then rolled back, and its
+        pending transaction infos (with `opcode-trace`s for app calls) are
+        returned instead of tx ids.
+        """
+
+        with self.condition:
+            tx_ids = [_tx_id(stxn["txn"]) for stxn in signed_txns]
+            group = GroupContext(self, [stxn["txn"] for stxn in signed_txns], simulate)
+            self.state.begin()
+
+            try:
+                for stxn, tx_id in zip(signed_txns, tx_ids):
+                    if not simulate:
+                        self._check_signed(stxn, tx_id)
+                self._check_group(group.txns)
+                self._check_fees(group.txns)
+                for index, tx_id in enumerate(tx_ids):
+                    try:
+                        group.apply_top_level(index)
+                    except (LedgerError, LogicError) as e:
+                        raise LedgerError("transaction {}: {}".format(tx_id, e))
+                self._check_min_balances(group.touched)
+            except LedgerError:
+                self.state.rollback()
+                raise
+
+            infos = [
+                group.pending_info(index, stxn, self.round + 1)
+                for index, stxn in enumerate(signed_txns)
+            ]
+
+            if simulate:
+                self.state.rollback()
+                return infos
+
+            self.state.commit()
+            self.round += 1
+            self.timestamp = max(self.timestamp, int(time()) + self.timestamp_offset)
+            self.blocks[self.round] = self._block_header(self.round, signed_txns)
+            for tx_id, info in zip(tx_ids, infos):
+                self.confirmed[tx_id] = info
+            self.condition.notify_all()
+
+            return tx_ids
+
+    def wait_for_block_after(self, round_num: int, timeout: float) -> None:
+        with self.condition:
+            self.condition.wait_for(lambda: self.round > round_num, timeout)
+
+    def program(self, program: bytes) -> Program:
+        parsed = self._programs.get(program)
+        if parsed is None:
+            try:
+                parsed = Program(program.decode("utf-8"))
+            except UnicodeDecodeError:
+                raise LedgerError(
+                    "program was not compiled by the stand-in node's /v2/teal/compile"
+                )
+            self._programs[program] = parsed
+        return parsed
+
+    def min_balance(self, address: bytes) -> int:
+        state = self.state
+        account = state.accounts.get(address)
+        if account is None:
+            return 0
+
+        total = MIN_BALANCE + ASSET_MIN_BALANCE * len(account.assets)
+        for app_id in account.local_states:
+            num_uint, num_byte_slice = state.apps[app_id].local_schema
+            total += (
+                APP_MIN_BALANCE
+                + SCHEMA_UINT_MIN_BALANCE * num_uint
+                + SCHEMA_BYTES_MIN_BALANCE * num_byte_slice
+            )
+        for app_id in account.created_apps:
+            app = state.apps[app_id]
+            num_uint, num_byte_slice = app.global_schema
+            total += (
+                APP_MIN_BALANCE
+                + APP_PAGE_MIN_BALANCE * app.extra_pages
+                + SCHEMA_UINT_MIN_BALANCE * num_uint
+                + SCHEMA_BYTES_MIN_BALANCE * num_byte_slice
+            )
+        app_id = state.app_addresses.get(address)
+        if app_id is not None and app_id in state.apps:
+            for name, value in state.apps[app_id].boxes.items():
+                total += BOX_FLAT_MIN_BALANCE + BOX_BYTE_MIN_BALANCE * (
+                    len(name) + len(value)
+                )
+        return total
+
+    def _account(self, address: bytes) -> Account:
+        account = self.state.accounts.get(address)
+        if account is None:
+            account = self.state.accounts[address] = Account()
+        return account
+
+    def _check_signed(self, stxn: dict, tx_id: str) -> None:
+        txn = stxn["txn"]
+        if "sig" not in stxn:
+            raise LedgerError(
+                "transaction {}: only single-signature transactions are supported "
+                "by the stand-in node".format(tx_id)
+            )
+
+        sender = self.state.accounts.get(txn["snd"])
+        signer = (sender.auth_addr if sender else None) or txn["snd"]
+        if stxn.get("sgnr", signer) != signer:
+            raise LedgerError(
+                "transaction {}: should have been authorized by {}".format(
+                    tx_id, encode_address(signer)
+                )
+            )
+        try:
+            VerifyKey(signer).verify(b"TX" + _encode(txn), stxn["sig"])
+        except BadSignatureError:
+            raise LedgerError(
+                "transaction {}: At least one signature didn't pass verification".format(
+                    tx_id
+                )
+            )
+
+        if txn.get("gh") != self.genesis_hash:
+            raise LedgerError("transaction {}: genesis hash mismatch".format(tx_id))
+        next_round = self.round + 1
+        if not txn.get("fv", 0) <= next_round <= txn.get("lv", 0):
+            raise LedgerError(
+                "transaction {}: txn dead: round {} outside of {}--{}".format(
+                    tx_id, next_round, txn.get("fv", 0), txn.get("lv", 0)
+                )
+            )
+        if tx_id in self.confirmed:
+            raise LedgerError("transaction already in ledger: {}".format(tx_id))
+
+    def _check_group(self, txns: list[dict]) -> None:
+        if len(txns) == 1 and "grp" not in txns[0]:
+            return
+        for index, txn in enumerate(txns):
+            if "grp" not in txn:
+                raise LedgerError(
+                    "transactionGroup: [{}] had zero Group but was submitted in a "
+                    "group of {}".format(index, len(txns))
+                )
+        # Like algod, the ids of the members are computed without the group id.
+        group_id = checksum(
+            b"TG"
+            + _encode(
+                {
+                    "txlist": [
+                        checksum(
+                            b"TX"
+                            + _encode({k: v for k, v in txn.items() if k != "grp"})
+                        )
+                        for txn in txns
+                    ]
+                }
+            )
+        )
+        for txn in txns:
+            if txn["grp"] != group_id:
+                raise LedgerError(
+                    "transactionGroup: incomplete group: {} != {}".format(
+                        b64encode(txn["grp"]).decode(), b64encode(group_id).decode()
+                    )
+                )
+
+    def _check_fees(self, txns: list[dict]) -> None:
+        fees = sum(txn.get("fee", 0) for txn in txns)
+        if fees < MIN_FEE * len(txns):
+            raise LedgerError(
+                "txgroup had {} in fees, which is less than the minimum {} * {}".format(
+                    fees, len(txns), MIN_FEE
+                )
+            )
+
+    def _check_min_balances(self, addresses: set[bytes]) -> None:
+        for address in addresses:
+            account = self.state.accounts.get(address)
+            if account is None:
+                continue
+            if (
+                account.amount == 0
+                and not account.assets
+                and not account.local_states
+                and not account.created_apps
+                and address not in self.state.app_addresses
+            ):
+                # Closed or never funded.
+                del self.state.accounts[address]
+                continue
+            min_balance = self.min_balance(address)
+            if account.amount < min_balance:
+                raise LedgerError(
+                    "account {} balance {} below min {}".format(
+                        encode_address(address), account.amount, min_balance
+                    )
+                )
+
+    def _block_header(self, round_num: int, signed_txns: list[dict]) -> dict:
+        txns = []
+        for stxn in signed_txns:
+            stxn = dict(stxn)
+            txn = dict(stxn["txn"])
+            if txn.pop("gen", None) is not None:
+                stxn["hgi"] = True
+            txn.pop("gh", None)
+            stxn["txn"] = txn
+            txns.append(stxn)
+
+        header = {
+            "gen": self.genesis_id,
+            "gh": self.genesis_hash,
+            "rnd": round_num,
+            "tc": self.state.txn_counter,
+            "ts": self.timestamp,
+        }
+        if txns:
+            header["txns"] = txns
+        return header
+
+
+class GroupContext:
+    """State shared by every transaction (and inner transaction) of a group."""
+
+    def __init__(self, ledger: Ledger, txns: list[dict], trace: bool) -> None:
+        self.ledger = ledger
+        self.txns = txns
+        self.trace = trace
+        self.apply_data: list[dict] = [{} for _ in txns]
+        self.touched: set[bytes] = set()
+        self.fee_credit = sum(txn.get("fee", 0) for txn in txns) - MIN_FEE * len(txns)
+        self.opcode_budget = APP_CALL_BUDGET * sum(
+            1 for txn in txns if txn.get("type") == "appl"
+        )
+        self.inner_count = 0
+
+    def apply_top_level(self, index: int) -> None:
+        self.apply(self.txns[index], self.apply_data[index], index)
+
+    def apply(self, txn: dict, apply_data: dict, group_index: int) -> None:
+        state = self.ledger.state
+        state.txn_counter += 1
+
+        sender = txn["snd"]
+        self._debit(sender, txn.get("fee", 0))
+
+        if "rekey" in txn:
+            self.ledger._account(sender).auth_addr = (
+                None if txn["rekey"] == sender else txn["rekey"]
+            )
+
+        match txn.get("type"):
+            case "pay":
+                self._apply_pay(txn)
+            case "axfer":
+                self._apply_axfer(txn)
+            case "acfg":
+                self._apply_acfg(txn, apply_data)
+            case "appl":
+                self._apply_appl(txn, apply_data, group_index)
+            case other:
+                raise LedgerError(
+                    "transaction type {} is not supported by the stand-in".format(other)
+                )
+
+    def pending_info(self, index: int, stxn: dict, round_num: int) -> dict:
+        info = {
+            "confirmed-round": round_num,
+            "pool-error": "",
+            "txn": _jsonify(stxn),
+        }
+        info.update(_jsonify_apply_data(self.apply_data[index]))
+        return info
+
+    def _debit(self, address: bytes, amount: int) -> None:
+        account = self.ledger.state.accounts.get(address)
+        if account is None or account.amount < amount:
+            raise LedgerError(
+                "overspend (account {}, data {} tried to spend {})".format(
+                    encode_address(address),
+                    {"amount": account.amount if account else 0},
+                    amount,
+                )
+            )
+        account.amount -= amount
+        self.touched.add(address)
+
+    def _credit(self, address: bytes, amount: int) -> None:
+        self.ledger._account(address).amount += amount
+        self.touched.add(address)
+
+    def _apply_pay(self, txn: dict) -> None:
+        sender = txn["snd"]
+        amount = txn.get("amt", 0)
+        self._debit(sender, amount)
+        self._credit(txn.get("rcv", ZERO_ADDRESS), amount)
+
+        if "close" in txn:
+            account = self.ledger.state.accounts[sender]
+            if account.assets or account.local_states or account.created_apps:
+                raise LedgerError(
+                    "cannot close account {} with assets or apps".format(
+                        encode_address(sender)
+                    )
+                )
+            remainder = account.amount
+            self._debit(sender, remainder)
+            self._credit(txn["close"], remainder)
+
+    def _apply_axfer(self, txn: dict) -> None:
+        state = self.ledger.state
+        asset_id = txn.get("xaid", 0)
+        if asset_id not in state.assets:
+            raise LedgerError(
+                "asset {} does not exist or has been deleted".format(asset_id)
+            )
+        if "asnd" in txn:
+            raise LedgerError("clawback transfers are not supported by the stand-in")
+
+        sender = txn["snd"]
+        receiver = txn.get("arcv", ZERO_ADDRESS)
+        amount = txn.get("aamt", 0)
+        sender_account = self.ledger._account(sender)
+
+        if sender == receiver and amount == 0 and asset_id not in sender_account.assets:
+            sender_account.assets[asset_id] = 0
+            self.touched.add(sender)
+            return
+
+        self._move_asset(sender, receiver, asset_id, amount)
+
+        if "aclose" in txn:
+            if asset_id not in sender_account.assets:
+                raise LedgerError(
+                    "asset {} missing from {}".format(asset_id, encode_address(sender))
+                )
+            self._move_asset(
+                sender, txn["aclose"], asset_id, sender_account.assets[asset_id]
+            )
+            del sender_account.assets[asset_id]
+
+    def _move_asset(
+        self, sender: bytes, receiver: bytes, asset_id: int, amount: int
+    ) -> None:
+        # Like algod, zero transfers don't look up either account.
+        if amount == 0:
+            return
+
+        accounts = self.ledger.state.accounts
+        if asset_id not in accounts[sender].assets:
+            raise LedgerError(
+                "asset {} missing from {}".format(asset_id, encode_address(sender))
+            )
+        receiver_account = accounts.get(receiver)
+        if receiver_account is None or asset_id not in receiver_account.assets:
+            raise LedgerError(
+                "asset {} missing from {}".format(asset_id, encode_address(receiver))
+            )
+        if accounts[sender].assets[asset_id] < amount:
+            raise LedgerError(
+                "underflow on subtracting {} from sender amount {}".format(
+                    amount, accounts[sender].assets[asset_id]
+                )
+            )
+        accounts[sender].assets[asset_id] -= amount
+        receiver_account.assets[asset_id] += amount
+        self.touched.update((sender, receiver))
+
+    def _apply_acfg(self, txn: dict, apply_data: dict) -> None:
+        state = self.ledger.state
+        sender = txn["snd"]
+        asset_id = txn.get("caid", 0)
+
+        if asset_id == 0:
+            asset_id = state.txn_counter
+            # Names and URLs arrive as msgpack strings from algosdk.
+            params = {
+                key: value.encode() if isinstance(value, str) else value
+                for key, value in txn.get("apar", {}).items()
+            }
+            state.assets[asset_id] = Asset(asset_id, sender, params)
+            account = self.ledger._account(sender)
+            account.created_assets.add(asset_id)
+            account.assets[asset_id] = params.get("t", 0)
+            apply_data["caid"] = asset_id
+            self.touched.add(sender)
+            return
+
+        asset = state.assets.get(asset_id)
+        if asset is None:
+            raise LedgerError("asset {} does not exist".format(asset_id))
+        if asset.params.get("m", ZERO_ADDRESS) != sender:
+            raise LedgerError("this transaction should be issued by the manager")
+
+        if "apar" in txn:
+            for field in ("m", "r", "f", "c"):
+                if field in txn["apar"]:
+                    asset.params[field] = txn["apar"][field]
+                else:
+                    asset.params.pop(field, None)
+            return
+
+        creator = state.accounts[asset.creator]
+        if creator.assets.get(asset_id) != asset.params.get("t", 0):
+            raise LedgerError("cannot destroy asset: creator is holding only part")
+        del creator.assets[asset_id]
+        creator.created_assets.discard(asset_id)
+        del state.assets[asset_id]
+
+    def _apply_appl(self, txn: dict, apply_data: dict, group_index: int) -> None:
+        state = self.ledger.state
+        sender = txn["snd"]
+        app_id = txn.get("apid", 0)
+        on_complete = txn.get("apan", 0)
+
+        if app_id == 0:
+            app_id = state.txn_counter
+            global_schema = txn.get("apgs", {})
+            local_schema = txn.get("apls", {})
+            app = App(
+                app_id,
+                sender,
+                txn.get("apap", b""),
+                txn.get("apsu", b""),
+                (global_schema.get("nui", 0), global_schema.get("nbs", 0)),
+                (local_schema.get("nui", 0), local_schema.get("nbs", 0)),
+                txn.get("apep", 0),
+            )
+            state.apps[app_id] = app
+            state.app_addresses[app.address] = app_id
+            self.ledger._account(sender).created_apps.add(app_id)
+            apply_data["apid"] = app_id
+            self.touched.add(sender)
+
+        app = state.apps.get(app_id)
+        if app is None:
+            raise LedgerError("application {} does not exist".format(app_id))
+
+        sender_account = self.ledger._account(sender)
+        if on_complete == 1:
+            if app_id in sender_account.local_states:
+                raise LedgerError(
+                    "account {} has already opted in to app {}".format(
+                        encode_address(sender), app_id
+                    )
+                )
+            sender_account.local_states[app_id] = {}
+        elif on_complete in (2, 3) and app_id not in sender_account.local_states:
+            raise LedgerError(
+                "account {} is not opted in to app {}".format(
+                    encode_address(sender), app_id
+                )
+            )
+
+        context = AppCallContext(self, txn, apply_data, group_index, app)
+        program = app.clear if on_complete == 3 else app.approval
+        trace = [] if self.trace else None
+        try:
+            approved = evaluate(self.ledger.program(program), context, trace)
+        except LogicError as e:
+            if on_complete != 3:
+                raise LedgerError("logic eval error: {}".format(e))
+            approved = False
+        finally:
+            if trace is not None:
+                apply_data["trace"] = trace
+
+        if not approved and on_complete != 3:
+            raise LedgerError("rejected by ApprovalProgram")
+
+        context.check_schemas()
+
+        if on_complete in (2, 3):
+            del sender_account.local_states[app_id]
+        elif on_complete == 4:
+            app.approval = txn.get("apap", b"")
+            app.clear = txn.get("apsu", b"")
+        elif on_complete == 5:
+            state.accounts[app.creator].created_apps.discard(app_id)
+            del state.apps[app_id]
+
+
+class AppCallContext:
+    """Gives an app's program access to its group and the ledger."""
+
+    def __init__(
+        self,
+        group: GroupContext,
+        txn: dict,
+        apply_data: dict,
+        group_index: int,
+        app: App,
+    ) -> None:
+        self.group_context = group
+        self.ledger = group.ledger
+        self.state = group.ledger.state
+        self.txn = txn
+        self.apply_data = apply_data
+        self.app = app
+        self.app_id = app.id
+
+        self.group = group.txns
+        self.group_apply_data = group.apply_data
+        self.group_index = group_index
+
+        self._inner: list[dict] = []
+        self._last_inner: tuple[dict, dict] | None = None
+
+    @property
+    def opcode_budget(self) -> int:
+        return self.group_context.opcode_budget
+
+    @opcode_budget.setter
+    def opcode_budget(self, value: int) -> None:
+        self.group_context.opcode_budget = value
+
+    # Fields
+
+    def txn_field(
+        self, txn: dict, field: str, index: int | None, apply_data: dict | None = None
+    ) -> int | bytes:
+        if apply_data is None:
+            apply_data = next(
+                (
+                    data
+                    for candidate, data in zip(self.group, self.group_apply_data)
+                    if candidate is txn
+                ),
+                {},
+            )
+
+        if field in TXN_FIELDS:
+            key, default = TXN_FIELDS[field]
+            return txn.get(key, default)
+        if field in ASSET_PARAMS_FIELDS:
+            key, default = ASSET_PARAMS_FIELDS[field]
+            return txn.get("apar", {}).get(key, default)
+        if field == "TypeEnum":
+            return TYPE_ENUMS.get(txn.get("type"), 0)
+        if field == "Type":
+            return txn.get("type", "").encode()
+        if field == "GroupIndex":
+            return next(i for i, candidate in enumerate(self.group) if candidate is txn)
+        if field == "TxID":
+            return _tx_id(txn).encode()
+        if field == "GroupID":
+            return txn.get("grp", bytes(32))
+        if field in ("GlobalNumUint", "GlobalNumByteSlice"):
+            return txn.get("apgs", {}).get(
+                "nui" if field.endswith("Uint") else "nbs", 0
+            )
+        if field in ("LocalNumUint", "LocalNumByteSlice"):
+            return txn.get("apls", {}).get(
+                "nui" if field.endswith("Uint") else "nbs", 0
+            )
+        if field == "CreatedAssetID":
+            return apply_data.get("caid", 0)
+        if field == "CreatedApplicationID":
+            return apply_data.get("apid", 0)
+        if field == "NumLogs":
+            return len(apply_data.get("lg", []))
+        if field == "LastLog":
+            logs = apply_data.get("lg", [])
+            return logs[-1] if logs else b""
+        if field == "Logs":
+            return apply_data.get("lg", [])[index]
+        if field.startswith("Num") and field[3:] in TXN_ARRAY_FIELDS:
+            return len(txn.get(TXN_ARRAY_FIELDS[field[3:]], []))
+        if field in TXN_ARRAY_FIELDS:
+            values = txn.get(TXN_ARRAY_FIELDS[field], [])
+            if field == "Accounts":
+                values = [txn["snd"]] + values
+            elif field == "Applications":
+                values = [txn.get("apid", 0)] + values
+            if index is None or index >= len(values):
+                raise LogicError("invalid {} index {}".format(field, index))
+            value = values[index]
+            return value
+        raise LogicError("unsupported txn field {}".format(field))
+
+    def global_field(self, field: str) -> int | bytes:
+        match field:
+            case "MinTxnFee":
+                return MIN_FEE
+            case "MinBalance":
+                return MIN_BALANCE
+            case "MaxTxnLife":
+                return MAX_TXN_LIFE
+            case "ZeroAddress":
+                return ZERO_ADDRESS
+            case "GroupSize":
+                return len(self.group)
+            case "LogicSigVersion":
+                return 8
+            case "Round":
+                return self.ledger.round + 1
+            case "LatestTimestamp":
+                return max(
+                    self.ledger.timestamp, int(time()) + self.ledger.timestamp_offset
+                )
+            case "CurrentApplicationID":
+                return self.app_id
+            case "CurrentApplicationAddress":
+                return self.app.address
+            case "CreatorAddress":
+                return self.app.creator
+            case "GroupID":
+                return self.group[0].get("grp", bytes(32))
+            case "OpcodeBudget":
+                return self.opcode_budget
+            case "CallerApplicationID":
+                return 0
+            case "CallerApplicationAddress":
+                return ZERO_ADDRESS
+        raise LogicError("unsupported global field {}".format(field))
+
+    def log(self, value: bytes) -> None:
+        logs = self.apply_data.setdefault("lg", [])
+        if len(logs) >= 32:
+            raise LogicError("too many log calls in program. up to 32 is allowed")
+        logs.append(value)
+
+    # References
+
+    def _address(self, ref: int | bytes) -> bytes:
+        if isinstance(ref, int):
+            return self.txn_field(self.txn, "Accounts", ref)
+        if len(ref) != 32:
+            raise LogicError("invalid Account reference {}".format(ref.hex()))
+        return ref
+
+    def _app(self, ref: int) -> int:
+        foreign = self.txn.get("apfa", [])
+        if ref <= len(foreign):
+            return self.txn_field(self.txn, "Applications", ref)
+        return ref
+
+    def _asset(self, ref: int) -> int:
+        foreign = self.txn.get("apas", [])
+        if ref < len(foreign):
+            return foreign[ref]
+        return ref
+
+    # Global and local state
+
+    def global_get(self, app_id: int, key: bytes) -> int | bytes:
+        return self.state.apps[app_id].global_state.get(key, 0)
+
+    def global_get_ex(self, app_ref: int, key: bytes) -> tuple[int | bytes, int]:
+        app = self.state.apps.get(self._app(app_ref))
+        if app is None or key not in app.global_state:
+            return 0, 0
+        return app.global_state[key], 1
+
+    def global_put(self, key: bytes, value: int | bytes) -> None:
+        _check_key_value(key, value)
+        self.app.global_state[key] = value
+
+    def global_del(self, key: bytes) -> None:
+        self.app.global_state.pop(key, None)
+
+    def _local_state(self, account_ref: int | bytes, app_id: int) -> dict | None:
+        account = self.state.accounts.get(self._address(account_ref))
+        if account is None:
+            return None
+        return account.local_states.get(app_id)
+
+    def local_get(
+        self, account_ref: int | bytes, app_id: int, key: bytes
+    ) -> int | bytes:
+        local_state = self._local_state(account_ref, app_id)
+        if local_state is None:
+            raise LogicError(
+                "{} is not opted into app {}".format(
+                    encode_address(self._address(account_ref)), app_id
+                )
+            )
+        return local_state.get(key, 0)
+
+    def local_get_ex(
+        self, account_ref: int | bytes, app_ref: int, key: bytes
+    ) -> tuple[int | bytes, int]:
+        local_state = self._local_state(account_ref, self._app(app_ref))
+        if local_state is None or key not in local_state:
+            return 0, 0
+        return local_state[key], 1
+
+    def local_put(
+        self, account_ref: int | bytes, key: bytes, value: int | bytes
+    ) -> None:
+        _check_key_value(key, value)
+        local_state = self._local_state(account_ref, self.app_id)
+        if local_state is None:
+            raise LogicError(
+                "{} is not opted into app {}".format(
+                    encode_address(self._address(account_ref)), self.app_id
+                )
+            )
+        local_state[key] = value
+
+    def local_del(self, account_ref: int | bytes, key: bytes) -> None:
+        local_state = self._local_state(account_ref, self.app_id)
+        if local_state is not None:
+            local_state.pop(key, None)
+
+    def opted_in(self, account_ref: int | bytes, app_ref: int) -> int:
+        return int(self._local_state(account_ref, self._app(app_ref)) is not None)
+
+    def check_schemas(self) -> None:
+        _check_schema(self.app.global_state, self.app.global_schema, "global")
+        for account in self.state.accounts.values():
+            local_state = account.local_states.get(self.app_id)
+            if local_state is not None:
+                _check_schema(local_state, self.app.local_schema, "local")
+
+    # Accounts and assets
+
+    def balance(self, account_ref: int | bytes) -> int:
+        account = self.state.accounts.get(self._address(account_ref))
+        return account.amount if account else 0
+
+    def min_balance(self, account_ref: int | bytes) -> int:
+        return self.ledger.min_balance(self._address(account_ref))
+
+    def asset_holding_get(
+        self, account_ref: int | bytes, asset_ref: int, field: str
+    ) -> tuple[int, int]:
+        account = self.state.accounts.get(self._address(account_ref))
+        asset_id = self._asset(asset_ref)
+        if account is None or asset_id not in account.assets:
+            return 0, 0
+        if field == "AssetBalance":
+            return account.assets[asset_id], 1
+        if field == "AssetFrozen":
+            return 0, 1
+        raise LogicError("unsupported asset holding field {}".format(field))
+
+    def asset_params_get(self, asset_ref: int, field: str) -> tuple[int | bytes, int]:
+        asset = self.state.assets.get(self._asset(asset_ref))
+        if asset is None:
+            return 0, 0
+        if field == "AssetCreator":
+            return asset.creator, 1
+        key, default = ASSET_PARAMS_FIELDS["ConfigAsset" + field[len("Asset") :]]
+        return asset.params.get(key, default), 1
+
+    def app_params_get(self, app_ref: int, field: str) -> tuple[int | bytes, int]:
+        app = self.state.apps.get(self._app(app_ref))
+        if app is None:
+            return 0, 0
+        values = {
+            "AppApprovalProgram": app.approval,
+            "AppClearStateProgram": app.clear,
+            "AppGlobalNumUint": app.global_schema[0],
+            "AppGlobalNumByteSlice": app.global_schema[1],
+            "AppLocalNumUint": app.local_schema[0],
+            "AppLocalNumByteSlice": app.local_schema[1],
+            "AppExtraProgramPages": app.extra_pages,
+            "AppCreator": app.creator,
+            "AppAddress": app.address,
+        }
+        return values[field], 1
+
+    def acct_params_get(
+        self, account_ref: int | bytes, field: str
+    ) -> tuple[int | bytes, int]:
+        address = self._address(account_ref)
+        account = self.state.accounts.get(address)
+        if account is None:
+            return 0, 0
+        values = {
+            "AcctBalance": account.amount,
+            "AcctMinBalance": self.ledger.min_balance(address),
+            "AcctAuthAddr": account.auth_addr or ZERO_ADDRESS,
+        }
+        return values[field], 1
+
+    # Boxes
+
+    def box_create(self, name: bytes, size: int) -> int:
+        if not 0 < len(name) <= 64:
+            raise LogicError("box names must be 1 to 64 bytes")
+        if size > MAX_BOX_SIZE:
+            raise LogicError("box size too large")
+        existing = self.app.boxes.get(name)
+        if existing is not None:
+            if len(existing) != size:
+                raise LogicError("box size mismatch {} {}".format(len(existing), size))
+            return 0
+        self.state.save(self.app.boxes, name)
+        self.app.boxes[name] = bytes(size)
+        self.group_context.touched.add(self.app.address)
+        return 1
+
+    def box_get_ex(self, name: bytes) -> bytes | None:
+        return self.app.boxes.get(name)
+
+    def box_get(self, name: bytes) -> bytes:
+        value = self.app.boxes.get(name)
+        if value is None:
+            raise LogicError("no such box")
+        return value
+
+    def box_put(self, name: bytes, value: bytes) -> None:
+        self.state.save(self.app.boxes, name)
+        self.app.boxes[name] = value
+
+    def box_del(self, name: bytes) -> int:
+        self.state.save(self.app.boxes, name)
+        self.group_context.touched.add(self.app.address)
+        return int(self.app.boxes.pop(name, None) is not None)
+
+    # Inner transactions
+
+    def itxn_begin(self) -> None:
+        if self._inner:
+            raise LogicError("itxn_begin without itxn_submit")
+        self._inner = [self._new_inner()]
+
+    def itxn_next(self) -> None:
+        if not self._inner:
+            raise LogicError("itxn_next without itxn_begin")
+        self._inner.append(self._new_inner())
+
+    def _new_inner(self) -> dict:
+        return {
+            "snd": self.app.address,
+            "fv": self.txn.get("fv", 0),
+            "lv": self.txn.get("lv", 0),
+        }
+
+    def itxn_field(self, field: str, value: int | bytes) -> None:
+        if not self._inner:
+            raise LogicError("itxn_field without itxn_begin")
+        txn = self._inner[-1]
+
+        if field == "TypeEnum":
+            if value not in TYPE_NAMES:
+                raise LogicError("{} is not a valid TypeEnum".format(value))
+            txn["type"] = TYPE_NAMES[value]
+        elif field == "Type":
+            txn["type"] = value.decode()
+        elif field in TXN_ARRAY_FIELDS:
+            txn.setdefault(TXN_ARRAY_FIELDS[field], []).append(value)
+        elif field in ASSET_PARAMS_FIELDS:
+            key, _ = ASSET_PARAMS_FIELDS[field]
+            apar = txn.setdefault("apar", {})
+            if value:
+                apar[key] = value
+        elif field in TXN_FIELDS:
+            key, default = TXN_FIELDS[field]
+            if type(value) is not type(default):
+                raise LogicError("{} must be {}".format(field, type(default).__name__))
+            if isinstance(default, bytes) and len(default) == 32 and len(value) != 32:
+                raise LogicError("{} must be a 32-byte address".format(field))
+            if value != default:
+                txn[key] = value
+            else:
+                txn.pop(key, None)
+        else:
+            raise LogicError("unsupported itxn_field {}".format(field))
+
+    def itxn_submit(self) -> None:
+        if not self._inner:
+            raise LogicError("itxn_submit without itxn_begin")
+        inner, self._inner = self._inner, []
+
+        group = self.group_context
+        for txn in inner:
+            group.inner_count += 1
+            if group.inner_count > MAX_INNER_TXNS:
+                raise LogicError("too many inner transactions")
+            if txn.get("type") == "appl":
+                raise LogicError("inner app calls are not supported by the stand-in")
+            if "fee" not in txn and group.fee_credit < MIN_FEE:
+                txn["fee"] = MIN_FEE
+            group.fee_credit += txn.get("fee", 0) - MIN_FEE
+            if group.fee_credit < 0:
+                raise LogicError("fee too small")
+
+            apply_data: dict = {}
+            try:
+                group.apply(txn, apply_data, 0)
+            except LedgerError as e:
+                raise LogicError("inner tx failed: {}".format(e))
+
+            self.apply_data.setdefault("dt", []).append((txn, apply_data))
+            self._last_inner = (txn, apply_data)
+
+    def itxn_field_get(self, field: str, index: int | None) -> int | bytes:
+        if self._last_inner is None:
+            raise LogicError("no inner transaction available")
+        txn, apply_data = self._last_inner
+        return self.txn_field(txn, field, index, apply_data)
+
+
+def _check_key_value(key: bytes, value: int | bytes) -> None:
+    if len(key) > 64:
+        raise LogicError("key too long: length was {}, maximum is 64".format(len(key)))
+    if isinstance(value, bytes) and len(key) + len(value) > 128:
+        raise LogicError("key/value total too long")
+
+
+def _check_schema(state: dict, schema: tuple[int, int], kind: str) -> None:
+    num_uint = sum(1 for value in state.values() if isinstance(value, int))
+    num_byte_slice = len(state) - num_uint
+    if num_uint > schema[0]:
+        raise LogicError(
+            "store integer count {} exceeds schema integer count {}".format(
+                num_uint, schema[0]
+            )
+        )
+    if num_byte_slice > schema[1]:
+        raise LogicError(
+            "store bytes count {} exceeds schema bytes count {}".format(
+                num_byte_slice, schema[1]
+            )
+        )
+
+
+def _encode(value: Any) -> bytes:
+    """Canonical msgpack encoding: maps with sorted keys."""
+
+    if isinstance(value, dict):
+        value = {k: value[k] for k in sorted(value)}
+    return msgpack.packb(value, use_bin_type=True)
+
+
+def _tx_id(txn: dict) -> str:
+    return b32encode(checksum(b"TX" + _encode(txn))).decode().strip("=")
+
+
+def _jsonify(value: Any, key: str = "") -> Any:
+    """Render a msgpack transaction value the way algod's JSON API does."""
+
+    if isinstance(value, dict):
+        return {k: _jsonify(v, k) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_jsonify(v, "snd" if key == "apat" else key) for v in value]
+    if isinstance(value, bytes):
+        if key in ADDRESS_FIELDS and len(value) == 32:
+            return encode_address(value)
+        return b64encode(value).decode()
+    return value
+
+
+def _jsonify_apply_data(apply_data: dict) -> dict:
+    info: dict = {}
+    if "apid" in apply_data:
+        info["application-index"] = apply_data["apid"]
+    if "caid" in apply_data:
+        info["asset-index"] = apply_data["caid"]
+    if "lg" in apply_data:
+        info["logs"] = [b64encode(log).decode() for log in apply_data["lg"]]
+    if "dt" in apply_data:
+        info["inner-txns"] = [
+            {"txn": {"txn": _jsonify(txn)}, **_jsonify_apply_data(inner_apply_data)}
+            for txn, inner_apply_data in apply_data["dt"]
+        ]
+    if "trace" in apply_data:
+        info["opcode-trace"] = [
+            {"line": line, "op": op, "cost": cost}
+            for line, op, cost in apply_data["trace"]
+        ]
+    return info
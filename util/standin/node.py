@@ -0,0 +1,575 @@
+"""
+HTTP front end of the stand-in node.
+
+Serves the algod (`/v2/...`, `/versions`) and KMD (`/v1/...`) endpoints used by
+`util/` and `tests/` from a single in-process server backed by a `Ledger`.
+"""
+
+import json
+import re
+from bisect import bisect_left
+from base64 import b64decode, b64encode
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+from typing import Any, Callable
+from urllib.parse import parse_qs, urlsplit
+from uuid import uuid4
+
+import msgpack
+from algosdk.account import generate_account
+from algosdk.encoding import checksum, decode_address, encode_address
+
+from util.standin.ledger import MIN_FEE, App, Ledger, LedgerError
+from util.teal import normalize_teal
+
+KMD_WALLET_NAME = "unencrypted-default-wallet"
+# Number of funded accounts in the KMD wallet and their balance in microAlgos.
+GENESIS_ACCOUNTS = 3
+GENESIS_BALANCE = 1_000_000_000_000_000
+# Longest time `/v2/status/wait-for-block-after` blocks for, in seconds.
+WAIT_FOR_BLOCK_TIMEOUT = 1.0
+# Boxes listed per page by `/v2/applications/{id}/boxes`, as algod's
+# `MaxAPIBoxPerApplication`.
+MAX_API_BOX_PER_APPLICATION = 100_000
+
+
+class NotFound(Exception):
+    pass
+
+
+class _Server(ThreadingHTTPServer):
+    # The default backlog of 5 overflows when a load generator opens its
+    # connections at once, and the overflowing ones get reset.
+    request_queue_size = 128
+
+
+class StandInNode:
+    """An in-memory algod and KMD, serving HTTP on `address`."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.ledger = Ledger()
+        self.wallet_id = uuid4().hex
+        # Address -> base64 private key of the KMD wallet's keys.
+        self.wallet_keys: dict[str, str] = {}
+        for _ in range(GENESIS_ACCOUNTS):
+            private, address = generate_account()
+            self.wallet_keys[address] = private
+            self.ledger.fund(decode_address(address), GENESIS_BALANCE)
+        self.online = set(self.wallet_keys)
+        self.max_api_box_per_application = MAX_API_BOX_PER_APPLICATION
+
+        self.server = _Server((host, port), _handler(self))
+        self.server.daemon_threads = True
+        self.address = "http://{}:{}".format(*self.server.server_address[:2])
+        self._thread: Thread | None = None
+
+        self.routes: list[tuple[str, re.Pattern, Callable]] = [
+            (method, re.compile(pattern + "$"), handler)
+            for method, pattern, handler in (
+                ("GET", r"/versions", self.versions),
+                ("GET", r"/health", self.health),
+                ("GET", r"/v2/status", self.status),
+                ("GET", r"/v2/status/wait-for-block-after/(\d+)", self.wait_for_block),
+                ("GET", r"/v2/transactions/params", self.params),
+                ("POST", r"/v2/teal/compile", self.compile),
+                ("POST", r"/v2/transactions", self.send_transactions),
+                ("POST", r"/v2/standin/simulate", self.simulate),
+                ("GET", r"/v2/transactions/pending/(\w+)", self.pending_info),
+                ("GET", r"/v2/blocks/(\d+)", self.block),
+                ("GET", r"/v2/applications/(\d+)", self.application),
+                ("GET", r"/v2/applications/(\d+)/boxes", self.boxes),
+                ("GET", r"/v2/applications/(\d+)/box", self.box),
+                ("GET", r"/v2/accounts/(\w+)", self.account),
+                ("GET", r"/v2/accounts/(\w+)/applications/(\d+)", self.account_app),
+                ("GET", r"/v2/accounts/(\w+)/assets/(\d+)", self.account_asset),
+                ("GET", r"/v2/assets/(\d+)", self.asset),
+                ("GET", r"/v2/devmode/blocks/offset", self.get_offset),
+                ("POST", r"/v2/devmode/blocks/offset/(\d+)", self.set_offset),
+                ("GET", r"/v1/wallets", self.list_wallets),
+                ("POST", r"/v1/wallet/init", self.init_wallet),
+                ("POST", r"/v1/wallet/release", self.release_wallet),
+                ("POST", r"/v1/key/list", self.list_keys),
+                ("POST", r"/v1/key/export", self.export_key),
+                ("POST", r"/v1/key", self.generate_key),
+                ("POST", r"/v1/key/import", self.import_key),
+            )
+        ]
+
+    def start(self) -> "StandInNode":
+        if self._thread is None:
+            self._thread = Thread(
+                target=self.server.serve_forever, args=(0.05,), daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self._thread = None
+
+    # algod
+
+    def versions(self, request: "_Request") -> dict:
+        return {
+            "build": {
+                "branch": "standin",
+                "build_number": 0,
+                "channel": "standin",
+                "commit_hash": "",
+                "major": 3,
+                "minor": 0,
+            },
+            "genesis_hash_b64": b64encode(self.ledger.genesis_hash).decode(),
+            "genesis_id": self.ledger.genesis_id,
+            "versions": ["v2"],
+        }
+
+    def health(self, request: "_Request") -> None:
+        return None
+
+    def status(self, request: "_Request") -> dict:
+        return {
+            "last-round": self.ledger.round,
+            "last-version": "future",
+            "next-version": "future",
+            "next-version-round": self.ledger.round + 1,
+            "next-version-supported": True,
+            "stopped-at-unsupported-round": False,
+            "time-since-last-round": 0,
+            "catchup-time": 0,
+        }
+
+    def wait_for_block(self, request: "_Request", round_num: str) -> dict:
+        self.ledger.wait_for_block_after(int(round_num), WAIT_FOR_BLOCK_TIMEOUT)
+        return self.status(request)
+
+    def params(self, request: "_Request") -> dict:
+        return {
+            "consensus-version": "future",
+            "fee": 0,
+            "genesis-hash": b64encode(self.ledger.genesis_hash).decode(),
+            "genesis-id": self.ledger.genesis_id,
+            "last-round": self.ledger.round,
+            "min-fee": MIN_FEE,
+        }
+
+    def compile(self, request: "_Request") -> dict:
+        program = normalize_teal(request.body.decode())
+        try:
+            self.ledger.program(program)
+        except Exception as e:
+            raise LedgerError(str(e))
+        return {
+            "hash": encode_address(checksum(b"Program" + program)),
+            "result": b64encode(program).decode(),
+        }
+
+    def send_transactions(self, request: "_Request") -> dict:
+        tx_ids = self.ledger.submit(_unpack_stream(request.body))
+        return {"txId": tx_ids[0]}
+
+    def simulate(self, request: "_Request") -> dict:
+        """
+        Evaluate a group without committing it.
+
+        Only the stand-in serves this: unlike algod's
+        `POST /v2/transactions/simulate`, it takes the same body as
+        `POST /v2/transactions` and returns the pending transaction infos of
+        the group, with an `opcode-trace` for every app call.
+        """
+
+        return {"txn-results": self.ledger.submit(_unpack_stream(request.body), True)}
+
+    def pending_info(self, request: "_Request", tx_id: str) -> dict:
+        info = self.ledger.confirmed.get(tx_id)
+        if info is None:
+            raise NotFound("txn does not exist")
+        return info
+
+    def block(self, request: "_Request", round_num: str) -> Any:
+        block = self.ledger.blocks.get(int(round_num))
+        if block is None:
+            raise NotFound("failed to retrieve information from the ledger")
+        if request.format == "msgpack":
+            return msgpack.packb({"block": block}, use_bin_type=True)
+        return {"block": _jsonify_block(block)}
+
+    def application(self, request: "_Request", app_id: str) -> dict:
+        app = self.ledger.state.apps.get(int(app_id))
+        if app is None:
+            raise NotFound("application does not exist")
+        return {"id": app.id, "params": _app_params(app)}
+
+    def boxes(self, request: "_Request", app_id: str) -> dict:
+        app = self.ledger.state.apps.get(int(app_id))
+        if app is None:
+            raise NotFound("application does not exist")
+        # Pages of boxes in name order, the next page starting at `next`.
+        limit = self.max_api_box_per_application
+        requested = int(request.query.get("max", ["0"])[0])
+        if requested > 0:
+            limit = min(limit, requested)
+        names = sorted(app.boxes)
+        if "next" in request.query:
+            names = names[
+                bisect_left(names, _parse_box_name(request.query["next"][0])) :
+            ]
+
+        response: dict[str, Any] = {
+            "boxes": [{"name": b64encode(name).decode()} for name in names[:limit]],
+            "round": self.ledger.round,
+        }
+        if len(names) > limit:
+            response["next-token"] = "b64:" + b64encode(names[limit]).decode()
+        return response
+
+    def box(self, request: "_Request", app_id: str) -> dict:
+        app = self.ledger.state.apps.get(int(app_id))
+        if app is None:
+            raise NotFound("application does not exist")
+        name = _parse_box_name(request.query.get("name", [""])[0])
+        value = app.boxes.get(name)
+        if value is None:
+            raise NotFound("box not found")
+        return {
+            "name": b64encode(name).decode(),
+            "round": self.ledger.round,
+            "value": b64encode(value).decode(),
+        }
+
+    def account(self, request: "_Request", address: str) -> dict:
+        raw = decode_address(address)
+        ledger = self.ledger
+        state = ledger.state
+        account = state.accounts.get(raw)
+        info: dict = {
+            "address": address,
+            "amount": 0,
+            "amount-without-pending-rewards": 0,
+            "min-balance": 0,
+            "pending-rewards": 0,
+            "reward-base": 0,
+            "rewards": 0,
+            "round": ledger.round,
+            "status": "Online" if address in self.online else "Offline",
+            "total-apps-opted-in": 0,
+            "total-assets-opted-in": 0,
+            "total-created-apps": 0,
+            "total-created-assets": 0,
+            "total-boxes": 0,
+            "total-box-bytes": 0,
+        }
+        if account is None:
+            return info
+
+        info.update(
+            {
+                "amount": account.amount,
+                "amount-without-pending-rewards": account.amount,
+                "min-balance": ledger.min_balance(raw),
+                "total-apps-opted-in": len(account.local_states),
+                "total-assets-opted-in": len(account.assets),
+                "total-created-apps": len(account.created_apps),
+                "total-created-assets": len(account.created_assets),
+            }
+        )
+        if account.auth_addr is not None:
+            info["auth-addr"] = encode_address(account.auth_addr)
+        app_id = state.app_addresses.get(raw)
+        if app_id in state.apps:
+            boxes = state.apps[app_id].boxes
+            info["total-boxes"] = len(boxes)
+            info["total-box-bytes"] = sum(len(k) + len(v) for k, v in boxes.items())
+
+        if request.query.get("exclude", [""])[0] != "all":
+            info["assets"] = [
+                {"amount": amount, "asset-id": asset_id, "is-frozen": False}
+                for asset_id, amount in account.assets.items()
+            ]
+            info["apps-local-state"] = [
+                _local_state(state.apps[app_id], local_state)
+                for app_id, local_state in account.local_states.items()
+            ]
+            info["created-apps"] = [
+                {"id": app_id, "params": _app_params(state.apps[app_id])}
+                for app_id in account.created_apps
+            ]
+            info["created-assets"] = [
+                {"index": asset_id, "params": _asset_params(state.assets[asset_id])}
+                for asset_id in account.created_assets
+            ]
+        return info
+
+    def account_app(self, request: "_Request", address: str, app_id: str) -> dict:
+        state = self.ledger.state
+        account = state.accounts.get(decode_address(address))
+        app = state.apps.get(int(app_id))
+        info: dict = {"round": self.ledger.round}
+        if account is not None and app is not None:
+            if app.id in account.local_states:
+                info["app-local-state"] = _local_state(
+                    app, account.local_states[app.id]
+                )
+            if app.id in account.created_apps:
+                info["created-app"] = _app_params(app)
+        if len(info) == 1:
+            raise NotFound("account application info not found")
+        return info
+
+    def account_asset(self, request: "_Request", address: str, asset_id: str) -> dict:
+        state = self.ledger.state
+        account = state.accounts.get(decode_address(address))
+        asset = state.assets.get(int(asset_id))
+        info: dict = {"round": self.ledger.round}
+        if account is not None and asset is not None:
+            if asset.id in account.assets:
+                info["asset-holding"] = {
+                    "amount": account.assets[asset.id],
+                    "asset-id": asset.id,
+                    "is-frozen": False,
+                }
+            if asset.id in account.created_assets:
+                info["created-asset"] = _asset_params(asset)
+        if len(info) == 1:
+            raise NotFound("account asset info not found")
+        return info
+
+    def asset(self, request: "_Request", asset_id: str) -> dict:
+        asset = self.ledger.state.assets.get(int(asset_id))
+        if asset is None:
+            raise NotFound("asset does not exist")
+        return {"index": asset.id, "params": _asset_params(asset)}
+
+    def get_offset(self, request: "_Request") -> dict:
+        return {"offset": self.ledger.timestamp_offset}
+
+    def set_offset(self, request: "_Request", offset: str) -> None:
+        self.ledger.timestamp_offset = int(offset)
+
+    # KMD
+
+    def list_wallets(self, request: "_Request") -> dict:
+        return {
+            "wallets": [
+                {
+                    "driver_name": "sqlite",
+                    "driver_version": 1,
+                    "id": self.wallet_id,
+                    "mnemonic_ux": False,
+                    "name": KMD_WALLET_NAME,
+                    "supported_txs": ["pay", "keyreg"],
+                }
+            ]
+        }
+
+    def init_wallet(self, request: "_Request") -> dict:
+        if request.json().get("wallet_id") != self.wallet_id:
+            raise NotFound("wallet not found")
+        return {"wallet_handle_token": self.wallet_id, "expires_in_seconds": 60}
+
+    def release_wallet(self, request: "_Request") -> dict:
+        return {}
+
+    def list_keys(self, request: "_Request") -> dict:
+        return {"addresses": list(self.wallet_keys)}
+
+    def export_key(self, request: "_Request") -> dict:
+        private = self.wallet_keys.get(request.json().get("address"))
+        if private is None:
+            raise NotFound("key does not exist in this wallet")
+        return {"private_key": private}
+
+    def generate_key(self, request: "_Request") -> dict:
+        private, address = generate_account()
+        self.wallet_keys[address] = private
+        return {"address": address}
+
+    def import_key(self, request: "_Request") -> dict:
+        private = request.json()["private_key"]
+        address = encode_address(b64decode(private)[32:])
+        self.wallet_keys[address] = private
+        return {"address": address}
+
+
+class _Request:
+    def __init__(self, handler: BaseHTTPRequestHandler, body: bytes) -> None:
+        url = urlsplit(handler.path)
+        self.path = url.path
+        self.query = parse_qs(url.query)
+        self.format = self.query.get("format", ["json"])[0]
+        self.body = body
+
+    def json(self) -> dict:
+        return json.loads(self.body or b"{}")
+
+
+def _handler(node: StandInNode) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self) -> None:
+            self._dispatch("GET")
+
+        def do_POST(self) -> None:
+            self._dispatch("POST")
+
+        def do_DELETE(self) -> None:
+            self._dispatch("DELETE")
+
+        def _dispatch(self, method: str) -> None:
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            request = _Request(self, body)
+
+            for route_method, pattern, route in node.routes:
+                match = pattern.match(request.path)
+                if match is not None and route_method == method:
+                    break
+            else:
+                self._respond(404, {"message": "{} not found".format(request.path)})
+                return
+
+            try:
+                if route == node.wait_for_block:
+                    result = route(request, *match.groups())
+                else:
+                    # Never read the ledger halfway through applying a group.
+                    with node.ledger.condition:
+                        result = route(request, *match.groups())
+            except NotFound as e:
+                self._respond(404, {"message": str(e)})
+            except LedgerError as e:
+                self._respond(400, {"message": str(e)})
+            except Exception as e:
+                self._respond(500, {"message": "{}: {}".format(type(e).__name__, e)})
+            else:
+                self._respond(200, result)
+
+        def _respond(self, status: int, result: Any) -> None:
+            if isinstance(result, bytes):
+                body, content_type = result, "application/msgpack"
+            else:
+                body = json.dumps({} if result is None else result).encode()
+                content_type = "application/json"
+            try:
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                # The client gave up, e.g. on a cancelled wait for a block.
+                self.close_connection = True
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    return Handler
+
+
+def _unpack_stream(data: bytes) -> list[dict]:
+    unpacker = msgpack.Unpacker(raw=False, strict_map_key=False)
+    unpacker.feed(data)
+    return list(unpacker)
+
+
+def _parse_box_name(encoded: str) -> bytes:
+    encoding, _, value = encoded.partition(":")
+    match encoding:
+        case "b64":
+            return b64decode(value)
+        case "str":
+            return value.encode()
+        case "int":
+            return int(value).to_bytes(8, "big")
+        case "addr":
+            return decode_address(value)
+    raise LedgerError("invalid box name encoding {}".format(encoding))
+
+
+def _tealvalue(value: int | bytes) -> dict:
+    if isinstance(value, bytes):
+        return {"type": 1, "bytes": b64encode(value).decode(), "uint": 0}
+    return {"type": 2, "bytes": "", "uint": value}
+
+
+def _key_value(state: dict[bytes, int | bytes]) -> list[dict]:
+    return [
+        {"key": b64encode(key).decode(), "value": _tealvalue(value)}
+        for key, value in state.items()
+    ]
+
+
+def _app_params(app: App) -> dict:
+    params = {
+        "approval-program": b64encode(app.approval).decode(),
+        "clear-state-program": b64encode(app.clear).decode(),
+        "creator": encode_address(app.creator),
+        "extra-program-pages": app.extra_pages,
+        "global-state-schema": {
+            "num-uint": app.global_schema[0],
+            "num-byte-slice": app.global_schema[1],
+        },
+        "local-state-schema": {
+            "num-uint": app.local_schema[0],
+            "num-byte-slice": app.local_schema[1],
+        },
+    }
+    if app.global_state:
+        params["global-state"] = _key_value(app.global_state)
+    return params
+
+
+def _local_state(app: App, local_state: dict) -> dict:
+    info = {
+        "id": app.id,
+        "schema": {
+            "num-uint": app.local_schema[0],
+            "num-byte-slice": app.local_schema[1],
+        },
+    }
+    if local_state:
+        info["key-value"] = _key_value(local_state)
+    return info
+
+
+def _asset_params(asset) -> dict:
+    names = {
+        "t": "total",
+        "dc": "decimals",
+        "df": "default-frozen",
+        "un": "unit-name",
+        "an": "name",
+        "au": "url",
+        "am": "metadata-hash",
+        "m": "manager",
+        "r": "reserve",
+        "f": "freeze",
+        "c": "clawback",
+    }
+    params: dict = {
+        "creator": encode_address(asset.creator),
+        "decimals": 0,
+        "default-frozen": False,
+        "total": 0,
+    }
+    for key, value in asset.params.items():
+        if key in ("m", "r", "f", "c"):
+            value = encode_address(value)
+        elif key in ("un", "an", "au"):
+            value = value.decode(errors="replace")
+        elif key == "am":
+            value = b64encode(value).decode()
+        params[names[key]] = value
+    return params
+
+
+def _jsonify_block(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _jsonify_block(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_jsonify_block(item) for item in value]
+    if isinstance(value, bytes):
+        return b64encode(value).decode()
+    return value
@@ -1,8 +1,29 @@
 # Adapted from the Beaker framework
 # https://github.com/algorand-devrel/beaker
 
-from base64 import b64decode
-from typing import Any
+from base64 import b64decode, b64encode
+from collections import namedtuple
+from functools import lru_cache
+from typing import Any, Callable, Iterable
+
+from algosdk.encoding import encode_address
+
+# Types a state key can be declared with in a `StateDecoder` schema.
+UINT = "uint"
+BYTES = "bytes"
+STR = "str"
+ADDRESS = "address"
+
+# TEAL value types (and state delta actions).
+_TYPE_BYTES = 1
+_TYPE_UINT = 2
+_ACTION_DELETE = 3
+
+_BYTES_CONVERTERS: dict[str, Callable[[bytes], Any]] = {
+    BYTES: bytes,
+    STR: lambda value: value.decode("utf-8"),
+    ADDRESS: encode_address,
+}
 
 
 def decode_state(
@@ -13,9 +34,7 @@ def decode_state(
 
     for sv in state:
 
-        raw_key = b64decode(sv["key"])
-
-        key: str | bytes = raw_key if raw else _str_or_hex(raw_key)
+        key = _decode_key(sv["key"], raw)
         val: str | bytes | int | None
 
         action = (
@@ -35,7 +54,90 @@ def decode_state(
     return decoded_state
 
 
+class StateDecoder:
+    """
+    Decodes state arrays (`global-state`, `key-value` or state deltas) with a
+    known schema into compact records.
+
+    `schema` maps each key to `UINT`, `BYTES`, `STR` or `ADDRESS`, and the
+    records are named tuples with one field per key, `None` for keys missing
+    from the state. Keys outside the schema are ignored.
+
+        decoder = StateDecoder({"manager": ADDRESS, "ticket_price": UINT})
+        decoder.decode(app_info["params"]["global-state"]).ticket_price
+    """
+
+    def __init__(self, schema: dict[str, str], name: str = "State"):
+        for key, key_type in schema.items():
+            if key_type != UINT and key_type not in _BYTES_CONVERTERS:
+                raise ValueError("Unknown type {} for key {}.".format(key_type, key))
+
+        self.schema = schema
+        self.record_type = namedtuple(name, schema)
+
+        # Base64 key as found in state arrays -> (field index, type, converter).
+        self._fields: dict[str, tuple[int, str, Callable[[bytes], Any] | None]] = {
+            b64encode(key.encode()).decode(): (
+                index,
+                key_type,
+                _BYTES_CONVERTERS.get(key_type),
+            )
+            for index, (key, key_type) in enumerate(schema.items())
+        }
+        self._empty = [None] * len(schema)
+
+    def decode(self, state: list[dict[str, Any]]) -> tuple:
+        """Decode one state array into a record."""
+
+        return self.decode_many((state,))[0]
+
+    def decode_many(self, states: Iterable[list[dict[str, Any]]]) -> list[tuple]:
+        """Decode many state arrays, e.g. the local states of many accounts."""
+
+        fields = self._fields
+        empty = self._empty
+        make = self.record_type._make
+        records = []
+
+        for state in states:
+            values = empty.copy()
+            for sv in state:
+                field = fields.get(sv["key"])
+                if field is None:
+                    continue
+                index, key_type, converter = field
+
+                value = sv["value"]
+                action = value.get("action") or value["type"]
+                if action == _ACTION_DELETE:
+                    values[index] = None
+                elif (action == _TYPE_UINT) != (converter is None):
+                    raise ValueError(
+                        "Key {} holds a {}, not a {}.".format(
+                            self.record_type._fields[index],
+                            UINT if action == _TYPE_UINT else BYTES,
+                            key_type,
+                        )
+                    )
+                elif converter is None:
+                    values[index] = value["uint"]
+                else:
+                    values[index] = converter(b64decode(value["bytes"]))
+            records.append(make(values))
+
+        return records
+
+
+@lru_cache(maxsize=4096)
+def _decode_key(key: str, raw: bool) -> str | bytes:
+    raw_key = b64decode(key)
+    return raw_key if raw else _str_or_hex(raw_key)
+
+
 def _str_or_hex(v: bytes) -> str:
+    if v.isascii():
+        return v.decode("ascii")
+
     decoded: str = ""
     try:
         decoded = v.decode("utf-8")
@@ -0,0 +1,94 @@
+"""
+TEAL helpers and opcode costs shared by the stand-in node (`util.standin`) and the
+opcode profiler (`util.opcode_profile`).
+"""
+
+# Opcodes costing more than 1: charged by the stand-in node, and used to
+# estimate costs on localnet where dryrun traces carry none. Dynamically priced
+# opcodes (none of which the stand-in implements) are counted as 1.
+OPCODE_COSTS = {
+    "sha256": 35,
+    "keccak256": 130,
+    "sha512_256": 45,
+    "sha3_256": 130,
+    "ed25519verify": 1900,
+    "ed25519verify_bare": 1900,
+    "ecdsa_verify": 1700,
+    "ecdsa_pk_decompress": 650,
+    "ecdsa_pk_recover": 2000,
+    "vrf_verify": 5700,
+    "b+": 10,
+    "b-": 10,
+    "b*": 20,
+    "b/": 20,
+    "b%": 20,
+    "b|": 6,
+    "b&": 6,
+    "b^": 6,
+    "b~": 4,
+    "bsqrt": 40,
+    "sqrt": 4,
+    "divmodw": 20,
+    "expw": 10,
+}
+
+
+def tokenize(line: str) -> list[str]:
+    """Split a TEAL line into tokens, dropping comments outside strings."""
+
+    tokens: list[str] = []
+    i = 0
+    while i < len(line):
+        char = line[i]
+        if char in " \t\r":
+            i += 1
+        elif line.startswith("//", i):
+            break
+        elif char == '"':
+            j = i + 1
+            while j < len(line) and line[j] != '"':
+                j += 2 if line[j] == "\\" else 1
+            tokens.append(line[i : j + 1])
+            i = j + 1
+        else:
+            j = i
+            while (
+                j < len(line)
+                and line[j] not in " \t\r"
+                and not line.startswith("//", j)
+            ):
+                j += 1
+            tokens.append(line[i:j])
+            i = j
+    return tokens
+
+
+def normalize_teal(source: str) -> bytes:
+    """
+    "Compile" TEAL source for the stand-in node: drop comments and blank lines.
+
+    The stand-in evaluates programs from their source, so the result is the
+    source itself, only stripped so that equivalent programs compare equal.
+    """
+
+    lines = []
+    for line in source.splitlines():
+        line = _strip_comment(line).strip()
+        if line:
+            lines.append(line)
+    return "\n".join(lines).encode()
+
+
+def _strip_comment(line: str) -> str:
+    in_string = False
+    escaped = False
+    for index, char in enumerate(line):
+        if escaped:
+            escaped = False
+        elif char == "\\" and in_string:
+            escaped = True
+        elif char == '"':
+            in_string = not in_string
+        elif char == "/" and not in_string and line[index : index + 2] == "//":
+            return line[:index]
+    return line
@@ -0,0 +1,276 @@
+"""
+Transaction groups encoded once and patched per use.
+
+    template = GroupTemplate(
+        [
+            PaymentTxn(buyer, sp, app_address, price),
+            ApplicationNoOpTxn(buyer, sp, app_id, app_args=["buy_ticket", 1]),
+        ],
+        [{"sender": "buyer"}, {"sender": "buyer"}],
+    )
+    signed = template.sign(private_key, buyer=address)
+    algod_client.send_raw_transaction(b64encode(signed.encoded))
+
+The example transactions are encoded with algosdk once. Their constant fields
+are kept as canonical msgpack chunks, so each use only encodes the variable
+fields and hashes and signs the result. The output is byte for byte what
+algosdk would produce for the same transactions.
+"""
+
+import hashlib
+from base64 import b32encode, b64decode
+from functools import lru_cache
+from typing import Any, NamedTuple
+
+import msgpack
+from algosdk import encoding
+from algosdk.transaction import Transaction
+from nacl.signing import SigningKey
+
+# Msgpack keys of the fields that can be variable, per transaction type.
+FIELD_KEYS: dict[str, dict[str, str]] = {
+    "sender": {"pay": "snd", "axfer": "snd", "appl": "snd", "acfg": "snd"},
+    "receiver": {"pay": "rcv", "axfer": "arcv"},
+    "amount": {"pay": "amt", "axfer": "aamt"},
+    "app_args": {"appl": "apaa"},
+    "first_valid": {"pay": "fv", "axfer": "fv", "appl": "fv", "acfg": "fv"},
+    "last_valid": {"pay": "lv", "axfer": "lv", "appl": "lv", "acfg": "lv"},
+}
+
+_TXID_PREFIX = b"TX"
+_GROUP_PREFIX = b"TG"
+# The "grp" key and the header of its 32 byte value.
+_GROUP_ID_KEY = b"\xa3grp\xc4\x20"
+# {"sig": <64 bytes>, "txn": ...} with the signature and transaction left out.
+_SIGNED_TXN_HEADER = b"\x82\xa3sig\xc4\x40"
+# {"sgnr": <32 bytes>, "sig": <64 bytes>, "txn": ...}, for rekeyed senders.
+_AUTHORIZED_TXN_HEADER = b"\x83\xa4sgnr\xc4\x20"
+_SIGNED_TXN_SIG_KEY = b"\xa3sig\xc4\x40"
+_SIGNED_TXN_TXN_KEY = b"\xa3txn"
+
+
+class SignedGroup(NamedTuple):
+    # The signed transactions, encoded as sent to algod.
+    encoded: bytes
+    tx_ids: list[str]
+
+
+class TxnTemplate:
+    """
+    One transaction of a `GroupTemplate`: the constant parts of its canonical
+    encoding, with slots for its variable fields around its group id.
+    """
+
+    def __init__(self, txn: Transaction, variables: dict[str, str]):
+        canonical = msgpack.unpackb(
+            b64decode(encoding.msgpack_encode(txn)), raw=False, use_list=True
+        )
+        canonical.pop("grp", None)
+        self.sender_name = variables.get("sender")
+        self.constant_sender: bytes = canonical.get("snd", bytes(32))
+
+        # Msgpack key -> (variable name, field name).
+        slots: dict[str, tuple[str, str]] = {}
+        for field, name in variables.items():
+            key = FIELD_KEYS.get(field, {}).get(txn.type)
+            if key is None:
+                raise ValueError(
+                    "Field {} cannot be patched in {} transactions.".format(
+                        field, txn.type
+                    )
+                )
+            slots[key] = (name, field)
+
+        # Constant chunks (including their keys) and (variable name, field,
+        # key) slots, in key order, before and after the group id.
+        self.head: list[bytes | tuple[str, str, bytes]] = []
+        self.tail: list[bytes | tuple[str, str, bytes]] = []
+        self.constant_fields = 0
+        parts = self.head
+        for key in sorted(set(canonical) | set(slots) | {"grp"}):
+            if key == "grp":
+                parts = self.tail
+            elif key in slots:
+                name, field = slots[key]
+                parts.append((name, field, msgpack.packb(key)))
+            else:
+                encoded = msgpack.packb(key) + msgpack.packb(
+                    canonical[key], use_bin_type=True
+                )
+                if parts and isinstance(parts[-1], bytes):
+                    parts[-1] += encoded
+                else:
+                    parts.append(encoded)
+                self.constant_fields += 1
+
+    def sender(self, values: dict[str, Any]) -> bytes:
+        """The decoded address of the sender, given the variables' `values`."""
+
+        if self.sender_name is None:
+            return self.constant_sender
+        return _encode_field("sender", values[self.sender_name])
+
+    def encode(self, values: dict[str, Any]) -> tuple[int, bytes, bytes]:
+        """
+        Return the number of fields of the transaction without its group id,
+        and its encoded fields before and after the group id.
+        """
+
+        fields = self.constant_fields
+        encoded = []
+        for parts in (self.head, self.tail):
+            body = []
+            for part in parts:
+                if isinstance(part, bytes):
+                    body.append(part)
+                    continue
+
+                name, field, key = part
+                value = _encode_field(field, values[name])
+                # Canonical msgpack omits zero values.
+                if value:
+                    body.append(key)
+                    body.append(msgpack.packb(value, use_bin_type=True))
+                    fields += 1
+            encoded.append(b"".join(body))
+
+        return fields, encoded[0], encoded[1]
+
+
+class GroupTemplate:
+    """
+    A group shaped like `txns`, where `variables[i]` maps fields of `txns[i]`
+    (see `FIELD_KEYS`) to the names of the values patched into them.
+
+    Transactions are assigned a group id when there is more than one.
+    """
+
+    def __init__(self, txns: list[Transaction], variables: list[dict[str, str]]):
+        if len(txns) != len(variables):
+            raise ValueError(
+                "Expected {} variable mappings, got {}.".format(
+                    len(txns), len(variables)
+                )
+            )
+        self.txns = [
+            TxnTemplate(txn, txn_variables)
+            for txn, txn_variables in zip(txns, variables)
+        ]
+
+    def encode(self, **values: Any) -> tuple[list[bytes], list[str]]:
+        """Return the canonical encodings of the group's transactions and their ids."""
+
+        parts = [txn.encode(values) for txn in self.txns]
+        if len(parts) == 1:
+            fields, head, tail = parts[0]
+            encoded = [_map_header(fields) + head + tail]
+        else:
+            txids = [
+                _hash(_TXID_PREFIX + _map_header(fields) + head + tail)
+                for fields, head, tail in parts
+            ]
+            group_id = _GROUP_ID_KEY + _hash(
+                _GROUP_PREFIX + msgpack.packb({"txlist": txids}, use_bin_type=True)
+            )
+            encoded = [
+                _map_header(fields + 1) + head + group_id + tail
+                for fields, head, tail in parts
+            ]
+        return encoded, [_tx_id(txn) for txn in encoded]
+
+    def sign(self, private_keys: str | list[str], **values: Any) -> SignedGroup:
+        """
+        Sign the group with `private_keys` (one per transaction, or one for all).
+
+        Keys other than the sender's sign for a sender rekeyed to them.
+        """
+
+        if isinstance(private_keys, str):
+            private_keys = [private_keys] * len(self.txns)
+
+        encoded, tx_ids = self.encode(**values)
+        return SignedGroup(
+            b"".join(
+                encode_signed(
+                    txn,
+                    sign_encoded(txn, private_key),
+                    authorizing_address(template.sender(values), private_key),
+                )
+                for template, txn, private_key in zip(self.txns, encoded, private_keys)
+            ),
+            tx_ids,
+        )
+
+
+def sign_encoded(encoded: bytes, private_key: str) -> bytes:
+    """Sign a canonically encoded transaction and return its signature."""
+
+    return _signing_key(private_key).sign(_TXID_PREFIX + encoded).signature
+
+
+def encode_signed(
+    encoded: bytes, signature: bytes, authorizing_address: bytes | None = None
+) -> bytes:
+    """
+    Encode a signed transaction from its encoding and its signature.
+
+    `authorizing_address` is the (decoded) address of the signer of a rekeyed
+    sender, left out when it is `None`.
+    """
+
+    if authorizing_address is None:
+        return _SIGNED_TXN_HEADER + signature + _SIGNED_TXN_TXN_KEY + encoded
+    return (
+        _AUTHORIZED_TXN_HEADER
+        + authorizing_address
+        + _SIGNED_TXN_SIG_KEY
+        + signature
+        + _SIGNED_TXN_TXN_KEY
+        + encoded
+    )
+
+
+def authorizing_address(sender: bytes, private_key: str) -> bytes | None:
+    """The address to put in `sgnr` when `private_key` signs for `sender`."""
+
+    signer = signer_address(private_key)
+    return None if signer == sender else signer
+
+
+@lru_cache(maxsize=4096)
+def signer_address(private_key: str) -> bytes:
+    """The decoded address of `private_key`."""
+
+    return _signing_key(private_key).verify_key.encode()
+
+
+def _tx_id(encoded: bytes) -> str:
+    return b32encode(_hash(_TXID_PREFIX + encoded)).decode().strip("=")
+
+
+def _encode_field(field: str, value: Any) -> Any:
+    if field in ("sender", "receiver"):
+        return _address_bytes(value) if isinstance(value, str) else value
+    if field == "app_args":
+        return [encoding.encode_as_bytes(arg) for arg in value]
+    return value
+
+
+def _map_header(size: int) -> bytes:
+    if size < 16:
+        return bytes([0x80 | size])
+    return b"\xde" + size.to_bytes(2, "big")
+
+
+def _hash(data: bytes) -> bytes:
+    return hashlib.new("sha512_256", data).digest()
+
+
+@lru_cache(maxsize=4096)
+def _address_bytes(address: str) -> bytes:
+    return encoding.decode_address(address)
+
+
+@lru_cache(maxsize=4096)
+def _signing_key(private_key: str) -> SigningKey:
+    return SigningKey(b64decode(private_key)[:32])